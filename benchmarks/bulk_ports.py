@@ -0,0 +1,75 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Port mode/enabled changes one by one against a temporary port group, on a simulated device
+with a fixed latency per API call. Usage: python -m benchmarks.bulk_ports [latency_ms] [max_workers]
+"""
+import logging
+import sys
+import time
+from threading import Lock
+
+from ixia_visionedge.driver_commands import DriverCommands
+
+
+class _RuntimeConfig(object):
+    def __init__(self, values):
+        self._values = values
+
+    def read_key(self, key, default_value=None):
+        return self._values.get(key, default_value)
+
+
+class _SimulatedApiClient(object):
+    def __init__(self, port_count, latency):
+        self.calls = 0
+        self._port_count = port_count
+        self._latency = latency
+        self._lock = Lock()
+
+    def __getattr__(self, name):
+        def call(*args):
+            with self._lock:
+                self.calls += 1
+            time.sleep(self._latency)
+            if name == "getSystemProperty":
+                return {"software_version": "simulated"}
+            if name == "createPortGroup":
+                return {"id": 1}
+            if name == "getAllPortsProperties":
+                return [{"id": ident, "mode": "BIDIRECTIONAL", "enabled": True} for ident in range(self._port_count)]
+
+        return call
+
+
+def run(port_count, bulk_ports_min, latency, max_workers):
+    """
+    :return: number of API calls, wall time in seconds
+    """
+    logger = logging.getLogger("benchmark")
+    driver = DriverCommands(logger, _RuntimeConfig({"BULK_PORTS.MIN_PORTS": bulk_ports_min,
+                                                    "MAX_CONCURRENCY": max_workers}))
+    api_client = _SimulatedApiClient(port_count, latency)
+    driver._nto_session._session = api_client
+    driver._nto_session._capability_store = None
+    driver._nto_session.ifc_cluster
+    api_client.calls = 0
+    start_time = time.time()
+    driver._modify_ports(range(port_count), {"mode": "BIDIRECTIONAL", "enabled": True})
+    return api_client.calls, time.time() - start_time
+
+
+def main(argv):
+    latency = float(argv[1]) / 1000 if len(argv) > 1 else 0.05
+    max_workers = int(argv[2]) if len(argv) > 2 else 8
+    print("latency {:.0f}ms, {} workers".format(latency * 1000, max_workers))
+    print("{:>6} {:>14} {:>10} {:>14} {:>10}".format("ports", "per port calls", "time, s", "group calls", "time, s"))
+    for port_count in [4, 16, 64, 256]:
+        port_calls, port_time = run(port_count, 0, latency, max_workers)
+        group_calls, group_time = run(port_count, 2, latency, max_workers)
+        print("{:>6} {:>14} {:>10.2f} {:>14} {:>10.2f}".format(port_count, port_calls, port_time, group_calls,
+                                                                group_time))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,86 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import time
+from threading import Event, Lock
+
+from ixia_visionedge.deadline import current_deadline, remaining_timeout
+from ixia_visionedge.ixia_nto import NtoDeadlineExceeded
+
+
+class _PendingItem(object):
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.done = Event()
+
+
+class CoalescingWindow(object):
+    """
+    Collects items submitted by concurrent callers during a short window and processes
+    them with a single flush call, every caller receives its own result
+    """
+
+    def __init__(self, window, flush):
+        """
+        :param window: window length, seconds
+        :param flush: callable with a list of items, returns list of results in the same order,
+            an exception instance as a result is raised to the caller of the item
+        """
+        self._window = window
+        self._flush = flush
+        self._lock = Lock()
+        self._pending = None
+
+    def submit(self, item):
+        pending_item = _PendingItem(item)
+        with self._lock:
+            is_leader = self._pending is None
+            if is_leader:
+                self._pending = []
+            self._pending.append(pending_item)
+
+        if is_leader:
+            time.sleep(self._window)
+            with self._lock:
+                batch, self._pending = self._pending, None
+            self._process(batch)
+        else:
+            self._wait(pending_item)
+
+        if pending_item.error is not None:
+            raise pending_item.error
+        return pending_item.result
+
+    def _wait(self, pending_item):
+        """
+        Wait for the batch within the deadline of the caller. On expiry the item is dropped if the window
+        is still open, otherwise it is already being processed and its outcome is unknown
+        :raises NtoDeadlineExceeded: if the deadline expired before the item was processed
+        """
+        try:
+            if pending_item.done.wait(remaining_timeout()):
+                return
+        except NtoDeadlineExceeded:
+            pass
+        with self._lock:
+            if pending_item.done.is_set():
+                return
+            dropped = self._pending is not None and pending_item in self._pending
+            if dropped:
+                self._pending.remove(pending_item)
+        deadline = current_deadline()
+        raise NtoDeadlineExceeded("{} exceeded its deadline of {}s waiting for the batch, {}".format(
+            deadline.name, deadline.timeout, "not applied" if dropped else "the batch is still running"))
+
+    def _process(self, batch):
+        try:
+            results = self._flush([pending_item.item for pending_item in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        for pending_item, result in zip(batch, results):
+            if isinstance(result, Exception):
+                pending_item.error = result
+            else:
+                pending_item.result = result
+            pending_item.done.set()
@@ -0,0 +1,70 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import json
+import os
+from threading import Lock
+
+
+class CapabilityProfile(object):
+    """
+    Capabilities of a device probed once per address and firmware version
+    """
+
+    def __init__(self, address, firmware, cluster):
+        """
+        :param firmware: software version of the device
+        :param cluster: device is a CTE cluster
+        """
+        self.address = address
+        self.firmware = firmware
+        self.cluster = bool(cluster)
+
+    def to_dict(self):
+        return {"address": self.address, "firmware": self.firmware, "cluster": self.cluster}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("address"), data.get("firmware"), data.get("cluster"))
+
+
+class CapabilityStore(object):
+    """
+    Local JSON file of capability profiles, one per device address. A profile is used only while
+    the firmware version of the device is the same
+    """
+
+    def __init__(self, path):
+        """
+        :param path: profiles file
+        """
+        self._path = path
+        self._lock = Lock()
+
+    def _read(self):
+        if not os.path.isfile(self._path):
+            return {}
+        try:
+            with open(self._path) as profiles_file:
+                return json.load(profiles_file)
+        except ValueError:
+            return {}
+
+    def load(self, address, firmware):
+        """
+        :rtype: CapabilityProfile
+        :return: profile, None if the device is unknown or its firmware was changed
+        """
+        with self._lock:
+            data = self._read().get(address)
+        if data and data.get("firmware") == firmware:
+            return CapabilityProfile.from_dict(data)
+
+    def save(self, profile):
+        with self._lock:
+            profiles = self._read()
+            profiles[profile.address] = profile.to_dict()
+            profiles_dir = os.path.dirname(self._path)
+            if profiles_dir and not os.path.isdir(profiles_dir):
+                os.makedirs(profiles_dir)
+            with open(self._path, "w") as profiles_file:
+                json.dump(profiles, profiles_file, indent=2, sort_keys=True)
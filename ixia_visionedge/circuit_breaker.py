@@ -0,0 +1,93 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import time
+from threading import Lock
+
+from ixia_visionedge.ixia_nto import NtoException
+from ixia_visionedge.metrics import Metrics
+
+
+class NtoCircuitOpen(NtoException):
+    pass
+
+
+class CircuitBreaker(object):
+    """
+    Fails calls to an unhealthy device immediately. The circuit opens after consecutive failures,
+    after the reset timeout a single caller probes the device, the circuit closes if the probe succeeds
+    """
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(self, name, failure_threshold, reset_timeout, logger):
+        """
+        :param name: device address, used in logs
+        :param failure_threshold: consecutive failures opening the circuit
+        :param reset_timeout: seconds before probing an open circuit
+        """
+        self._name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._logger = logger
+        self._lock = Lock()
+        self._failures = 0
+        self._opened = 0
+        self.state = self.CLOSED
+        self.metrics = Metrics()
+        self.metrics.set("circuit.state", self.state)
+
+    def _set_state(self, state):
+        if state != self.state:
+            self._logger.warning("Circuit breaker of {}: {} -> {}".format(self._name, self.state, state))
+            self.state = state
+            self.metrics.set("circuit.state", state)
+            if state == self.OPEN:
+                self.metrics.increment("circuit.opened")
+
+    def before_call(self, probe):
+        """
+        :param probe: cheap device call, made by the caller which takes an expired open circuit to half-open
+        :raises NtoCircuitOpen: if the circuit is open
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self._opened + self._reset_timeout - time.time()
+            if self.state == self.HALF_OPEN or remaining > 0:
+                self.metrics.increment("circuit.rejected")
+                raise NtoCircuitOpen("Device {} is unavailable, circuit breaker is {}, next probe in {:.0f}s".format(
+                    self._name, self.state, max(0, remaining)))
+            self._set_state(self.HALF_OPEN)
+        try:
+            probe()
+        except Exception as e:
+            self.record_failure()
+            raise NtoCircuitOpen("Device {} is unavailable, probe failed: {}".format(self._name, e))
+        self.record_success()
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+                self._opened = time.time()
+                self._set_state(self.OPEN)
+
+
+_circuit_breakers = {}
+_circuit_breakers_lock = Lock()
+
+
+def get_circuit_breaker(address, failure_threshold, reset_timeout, logger):
+    """
+    Circuit breaker shared by all sessions of the device address
+    """
+    with _circuit_breakers_lock:
+        if address not in _circuit_breakers:
+            _circuit_breakers[address] = CircuitBreaker(address, failure_threshold, reset_timeout, logger)
+        return _circuit_breakers[address]
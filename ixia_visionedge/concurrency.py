@@ -0,0 +1,95 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from multiprocessing.pool import ThreadPool
+try:
+    from itertools import izip_longest as zip_longest
+except ImportError:
+    from itertools import zip_longest
+from threading import BoundedSemaphore
+
+from ixia_visionedge.deadline import current_deadline, use_deadline
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class ParallelExecutionException(Exception):
+    def __init__(self, errors):
+        self.errors = errors
+        super(ParallelExecutionException, self).__init__(", ".join(str(error) for error in errors))
+
+
+def _call_safe(func, item):
+    try:
+        return func(item)
+    except Exception as e:
+        return e
+
+
+def _call_with_deadline(deadline, func, item):
+    with use_deadline(deadline):
+        return func(item)
+
+
+def run_parallel(func, items, max_workers=DEFAULT_MAX_WORKERS, return_exceptions=False):
+    """
+    Call func for every item using a pool of threads, the deadline of the caller applies to the calls
+    :param func: callable with a single argument
+    :param items: iterable of arguments
+    :param max_workers: maximum number of concurrent calls
+    :param return_exceptions: return exceptions in place of the results of failed calls
+    :return: list of results, in the order of the items
+    :raises ParallelExecutionException: if any of the calls failed, after all calls are completed
+    """
+    items = list(items)
+    if return_exceptions:
+        return run_parallel(lambda item: _call_safe(func, item), items, max_workers)
+    if len(items) < 2 or max_workers < 2:
+        return [func(item) for item in items]
+
+    pool = ThreadPool(min(max_workers, len(items)))
+    try:
+        deadline = current_deadline()
+        async_results = [pool.apply_async(_call_with_deadline, (deadline, func, item)) for item in items]
+        results = []
+        errors = []
+        for async_result in async_results:
+            try:
+                results.append(async_result.get())
+            except Exception as e:
+                results.append(None)
+                errors.append(e)
+    finally:
+        pool.close()
+        pool.join()
+
+    if errors:
+        raise ParallelExecutionException(errors)
+    return results
+
+
+def run_partitioned(func, items, partition, max_workers=DEFAULT_MAX_WORKERS, partition_workers=1,
+                    return_exceptions=False):
+    """
+    run_parallel with a limit of concurrent calls per partition, e.g. per cluster member.
+    Items of different partitions are interleaved so a busy partition does not hold the whole pool
+    :param partition: callable with an item, returns its partition key
+    :param partition_workers: maximum number of concurrent calls of a partition
+    :return: list of results, in the order of the items
+    """
+    items = list(items)
+    keys = [partition(item) for item in items]
+    semaphores = dict((key, BoundedSemaphore(max(1, partition_workers))) for key in set(keys))
+    queues = {}
+    for index, key in enumerate(keys):
+        queues.setdefault(key, []).append(index)
+    order = [index for round_indexes in zip_longest(*queues.values()) for index in round_indexes
+             if index is not None]
+
+    def call(index):
+        with semaphores[keys[index]]:
+            return func(items[index])
+
+    results = [None] * len(items)
+    for index, result in zip(order, run_parallel(call, order, max_workers, return_exceptions)):
+        results[index] = result
+    return results
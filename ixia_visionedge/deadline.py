@@ -0,0 +1,62 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import time
+from contextlib import contextmanager
+from threading import local
+
+from ixia_visionedge.ixia_nto import NtoDeadlineExceeded
+
+_state = local()
+
+
+class Deadline(object):
+    def __init__(self, name, timeout):
+        self.name = name
+        self.timeout = timeout
+        self.expires = time.time() + timeout
+
+    def remaining(self):
+        return self.expires - time.time()
+
+
+def current_deadline():
+    return getattr(_state, "deadline", None)
+
+
+@contextmanager
+def use_deadline(deadline):
+    """
+    Run the block with the given deadline in the current thread, used to pass a deadline to worker threads
+    """
+    previous = current_deadline()
+    _state.deadline = deadline
+    try:
+        yield deadline
+    finally:
+        _state.deadline = previous
+
+
+def command_deadline(name, timeout):
+    """
+    Time budget of a command, a nested deadline never extends the outer one
+    :param name: command name, used in the error message
+    :param timeout: seconds, 0 or None for no deadline
+    """
+    deadline = current_deadline()
+    if timeout and (deadline is None or deadline.remaining() > timeout):
+        deadline = Deadline(name, timeout)
+    return use_deadline(deadline)
+
+
+def remaining_timeout():
+    """
+    :return: remaining budget of the current deadline in seconds, None if there is no deadline
+    :raises NtoDeadlineExceeded: if the budget is exhausted
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return None
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise NtoDeadlineExceeded("{} exceeded its deadline of {}s".format(deadline.name, deadline.timeout))
+    return remaining
@@ -1,51 +1,147 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
+import os
 import re
-
-from functools32 import lru_cache
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+from uuid import uuid4
 
 from cloudshell.layer_one.core.driver_commands_interface import DriverCommandsInterface
 from cloudshell.layer_one.core.response.resource_info.entities.chassis import Chassis
 from cloudshell.layer_one.core.response.resource_info.entities.blade import Blade
 from cloudshell.layer_one.core.response.resource_info.entities.port import Port
+from cloudshell.layer_one.core.response.resource_info.entities.attributes import StringAttribute
 from cloudshell.layer_one.core.response.response_info import ResourceDescriptionResponseInfo
 from cloudshell.layer_one.core.response.response_info import GetStateIdResponseInfo
+from cloudshell.layer_one.core.response.response_info import AttributeValueResponseInfo
 # from ixia_visionedge.data_mock.br_ports_data import get_ports
-from ixia_visionedge.ixia_nto import NtoApiClient, NtoAuthException
+from ixia_visionedge.batching import CoalescingWindow
+from ixia_visionedge.capabilities import CapabilityProfile, CapabilityStore
+from ixia_visionedge.circuit_breaker import get_circuit_breaker
+from ixia_visionedge.concurrency import run_parallel, run_partitioned, DEFAULT_MAX_WORKERS
+from ixia_visionedge.deadline import command_deadline, remaining_timeout
+from ixia_visionedge.drop_watchdog import DropWatchdog
+from ixia_visionedge.filter_memory import FilterMemoryModel, FilterMemoryException
+from ixia_visionedge.filter_pool import FilterPool
+from ixia_visionedge.ixia_nto import NtoApiClient, NtoAuthException, NtoDeadlineExceeded, NtoException
+from ixia_visionedge.mapping_plan import MappingPlan
+from ixia_visionedge.metrics import Metrics
+from ixia_visionedge.neighbors import NeighborCache
+from ixia_visionedge.port_attributes import PortAttributeReader
+from ixia_visionedge.port_state_cache import PortStateCache
+from ixia_visionedge.retry_policy import RetryPolicy, NtoRetriesExhausted
+from ixia_visionedge.snapshots import SnapshotStore
+from ixia_visionedge.stats_sampler import StatsSampler
+from ixia_visionedge.transceiver_info import TransceiverInfoCache
+
+
+class NtoPortGroupNotDeleted(NtoException):
+    pass
 
 
 class NtoSession(object):
     MAX_RETRIES = 3
-
-    def __init__(self, address=None, username=None, password=None, logger=None):
+    PROBE_TIMEOUT = 10
+    CREATED_NAME_PREFIX = "CS_"
+    # getCteCluster status codes of a standalone device
+    CTE_NOT_SUPPORTED_CODES = (400, 404, 501)
+    PORT_PROPERTIES = ["name", "default_name", "mode", "enabled"]
+
+    def __init__(self, address=None, username=None, password=None, logger=None, pool_size=1, filter_memory=None,
+                 retry_policy=None, circuit_breaker_threshold=0, circuit_breaker_reset=30, capability_store=None):
         self._address = address
         self._username = username
         self._password = password
         self._logger = logger
+        self._pool_size = pool_size
+        self._filter_memory = filter_memory
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._circuit_breaker_threshold = circuit_breaker_threshold
+        self._circuit_breaker_reset = circuit_breaker_reset
+        self.metrics = Metrics()
+        self._capability_store = capability_store
+        self._capabilities = None
+        self._capabilities_checked = False
+        self._capabilities_lock = Lock()
 
         self._session = None
+        self._session_lock = Lock()
+        self._port_states = PortStateCache()
 
     def set_login_details(self, address, username, password):
+        if self._address is not None and address != self._address:
+            # another device, its session, capabilities and port states are not valid
+            with self._session_lock, self._capabilities_lock:
+                self._session = None
+                self._capabilities = None
+            self._port_states.invalidate()
+        # the firmware may be upgraded between logins, the profile is checked against it once per login
+        self._capabilities_checked = False
         self._address = address
         self._username = username
         self._password = password
 
+    @property
+    def address(self):
+        return self._address
+
     def _init_session(self):
         if self._address and self._username and self._password:
-            return NtoApiClient(self._address, self._username, self._password, debug=True, logger=self._logger)
+            return NtoApiClient(self._address, self._username, self._password, debug=True, logger=self._logger,
+                                maxsize=self._pool_size, timeout_provider=remaining_timeout)
         raise Exception("Login details are not defined")
 
     @property
-    @lru_cache()
-    def ifc_cluster(self):
+    def capabilities(self):
+        """
+        Capability profile of the device for the firmware version reported after login
+        :rtype: CapabilityProfile
+        """
+        if not self._capabilities_checked:
+            with self._capabilities_lock:
+                if not self._capabilities_checked:
+                    firmware = (self.getSystemProperty("system_info") or {}).get("software_version")
+                    if self._capabilities is None or self._capabilities.firmware != firmware:
+                        if self._capabilities is not None:
+                            self._logger.info("Firmware of {} changed to {}".format(self._address, firmware))
+                            self._port_states.invalidate()
+                        self._capabilities = self._probe_capabilities(firmware)
+                    self._capabilities_checked = True
+        return self._capabilities
+
+    def _probe_capabilities(self, firmware):
+        """
+        The stored profile is used if the firmware version is the same, otherwise the CTE API is probed.
+        A device answering the CTE request with a CTE_NOT_SUPPORTED_CODES status is standalone, other errors
+        are raised without saving the profile and probed again with the next call
+        """
+        profile = self._capability_store.load(self._address, firmware) if self._capability_store else None
+        if profile:
+            self._logger.debug("Capabilities of {} {} loaded, cluster: {}".format(self._address, firmware,
+                                                                                  profile.cluster))
+            return profile
+
         try:
-            cluster_prop = self.getCteCluster()
-        except:
-            cluster_prop = None
+            cluster = bool(self.getCteCluster())
+        except NtoException as e:
+            if e.code not in self.CTE_NOT_SUPPORTED_CODES:
+                raise
+            self._logger.debug("CTE cluster is not available: {}".format(e))
+            cluster = False
+        profile = CapabilityProfile(self._address, firmware, cluster)
+        self._logger.info("Capabilities of {} {} probed, cluster: {}".format(self._address, firmware, cluster))
+        if self._capability_store:
+            try:
+                self._capability_store.save(profile)
+            except Exception as e:
+                self._logger.warning("Cannot save capabilities of {}: {}".format(self._address, e))
+        return profile
 
-        if cluster_prop:
-            return True
-        return False
+    @property
+    def ifc_cluster(self):
+        return self.capabilities.cluster
 
     def _auth_call(self, name):
         """
@@ -55,18 +151,121 @@ class NtoSession(object):
         """
 
         def wrap_func(*args, **kwargs):
-            retry = 0
-            if not self._session:
-                self._session = self._init_session()
-            while retry < self.MAX_RETRIES:
-                try:
-                    return getattr(self._session, name)(*args, **kwargs)
-                except NtoAuthException:
-                    self._session = self._init_session()
-                    retry += 1
+            circuit_breaker = self._circuit_breaker
+            if not circuit_breaker:
+                return self._call(name, args, kwargs)
+            circuit_breaker.before_call(self._probe)
+            try:
+                result = self._call(name, args, kwargs)
+            except self._retry_policy.RETRYABLE_ERRORS + (NtoRetriesExhausted,):
+                circuit_breaker.record_failure()
+                raise
+            except NtoDeadlineExceeded as e:
+                # a request timed out by the deadline is a failure, an exhausted budget says nothing of the device
+                if e.transport_error is not None:
+                    circuit_breaker.record_failure()
+                raise
+            except NtoException:
+                # error response, the device is responding
+                circuit_breaker.record_success()
+                raise
+            circuit_breaker.record_success()
+            return result
 
         return wrap_func
 
+    @property
+    def _circuit_breaker(self):
+        if self._circuit_breaker_threshold > 0 and self._address:
+            return get_circuit_breaker(self._address, self._circuit_breaker_threshold, self._circuit_breaker_reset,
+                                       self._logger)
+
+    def _ensure_session(self):
+        if not self._session:
+            with self._session_lock:
+                if not self._session:
+                    self._session = self._init_session()
+
+    def _probe(self):
+        """
+        Half-open circuit breaker probe
+        """
+        with command_deadline("Circuit breaker probe", self.PROBE_TIMEOUT):
+            self._ensure_session()
+            self._session.getSystemProperty("system_info")
+
+    def get_metrics(self):
+        metrics = self.metrics.snapshot()
+        circuit_breaker = self._circuit_breaker
+        if circuit_breaker:
+            metrics.update(circuit_breaker.metrics.snapshot())
+        return metrics
+
+    def _call(self, name, args, kwargs):
+        """
+        Call the API client method, the session is re-initialized on auth errors,
+        transport errors are retried according to the retry policy
+        """
+        auth_retry = 0
+        attempt = 0
+        if self._retry_policy.is_checked(name) and not args[0].get("name"):
+            # unique name to find the object created by a failed call
+            args = (dict(args[0], name="{}{}".format(self.CREATED_NAME_PREFIX, uuid4().hex[:12])),) + args[1:]
+        self._ensure_session()
+        while True:
+            session = self._session
+            try:
+                return getattr(session, name)(*args, **kwargs)
+            except NtoAuthException:
+                auth_retry += 1
+                if auth_retry >= self.MAX_RETRIES:
+                    raise
+                self._count_retry(name)
+                with self._session_lock:
+                    # re-initialized once for concurrent calls failed with the same session
+                    if self._session is session:
+                        self._session = self._init_session()
+            except NtoException as e:
+                if attempt and e.code == 404 and name.startswith("delete"):
+                    # the response of the failed attempt was lost, the object is already deleted
+                    self._logger.warning("{} retry failed with {}, the object is deleted".format(name, e))
+                    return None
+                raise
+            except self._retry_policy.RETRYABLE_ERRORS as e:
+                attempt += 1
+                if not self._retry_policy.allows(name):
+                    raise
+                if attempt >= self._retry_policy.max_attempts:
+                    raise NtoRetriesExhausted("{} failed after {} attempts: {}".format(name, attempt, e))
+                if self._retry_policy.is_checked(name):
+                    response = self._find_created(name, args[0])
+                    if response is not None:
+                        self._logger.warning("{} failed with {}, but the object is created".format(name, e))
+                        return response
+                delay = self._retry_policy.delay(attempt)
+                remaining = remaining_timeout()
+                if remaining is not None and remaining <= delay:
+                    raise
+                self._logger.warning("{} failed with {}, retry {} in {:.2f}s, retries in total: {}".format(
+                    name, e, attempt, delay, self._count_retry(name)))
+                time.sleep(delay)
+
+    def _count_retry(self, name):
+        self.metrics.increment("retries.{}".format(name))
+        return self.metrics.increment("retries.total")
+
+    def _find_created(self, name, request_data):
+        """
+        Existence check of an object requested by a failed creation call, by the name unique to the request
+        :return: creation response with the identifier of the found object, None if not found
+        """
+        search = {"createPortGroup": self.searchPortGroups,
+                  "createCteFilter": self.searchCteFilter}.get(name, self.searchFilters)
+        found = [data for data in search({"name": request_data["name"]}) or []
+                 if data.get("name") == request_data["name"]]
+        if found:
+            return {self._identifier_key: found[0].get(self._identifier_key)}
+
     def __getattr__(self, item):
 
         return self._auth_call(item)
@@ -77,29 +276,169 @@ class NtoSession(object):
     def _normalize_identifier(self, identifier):
         return str(identifier)
 
-    def get_ports(self):
+    @property
+    def _identifier_key(self):
+        return "uuid" if self.ifc_cluster else "id"
+
+    def get_ports(self, extra_properties=None):
+        """
+        Bulk port fetch, projected to the fields used by the driver, seeds port states
+        :param extra_properties: additional port properties
+        """
+        properties = ",".join([self._identifier_key] + self.PORT_PROPERTIES + list(extra_properties or []))
         if self.ifc_cluster:
-            return self.getAllCtePorts()
-        return self.getAllPorts()
+            port_list = self.getAllCtePortsProperties(properties)
+        else:
+            port_list = self.getAllPortsProperties(properties)
+        self._port_states.seed(port_list, self._identifier_key)
+        return port_list
 
-    def get_port_data(self, port_ident):
+    def get_port_stats(self, stat_names, port_idents):
+        """
+        Stats of several ports with one request, standalone only
+        :return: stats_snapshot records
+        """
+        if self.ifc_cluster:
+            raise Exception("Port stats are not supported in cluster mode")
+        port_idents = [self._normalize_identifier(port_ident) for port_ident in port_idents]
+        return self.getStats({"stat_name": list(stat_names), "port": ",".join(port_idents)}).get("stats_snapshot")
+
+    def reset_drops(self, port_idents):
+        """
+        Reset overflow drop counters of several tool ports with one request, standalone only
+        """
+        if self.ifc_cluster:
+            raise Exception("Drops reset is not supported in cluster mode")
+        return self.resetDrops({"PORT": [self._normalize_identifier(port_ident) for port_ident in port_idents]})
+
+    def get_cte_members(self):
+        return self.getAllCteMembers()
+
+    def get_neighbors(self, port_idents):
+        if self.ifc_cluster:
+            raise Exception("Neighbors are not supported in cluster mode")
+        return self.getAllNeighbors([self._normalize_identifier(port_ident) for port_ident in port_idents])
+
+    def get_system_info(self):
+        return self.getSystemProperties("system_info").get("system_info") or {}
+
+    def get_transceiver_info(self):
+        if self.ifc_cluster:
+            raise Exception("Transceiver info is not supported in cluster mode")
+        return self.getTranceiverInfo()
+
+    def get_ports_properties(self, properties):
+        if self.ifc_cluster:
+            return self.getAllCtePortsProperties(properties)
+        return self.getAllPortsProperties(properties)
+
+    def get_port_properties(self, port_ident, properties):
+        """
+        Projected properties of one port, the full port in cluster mode
+        """
         port_ident = self._normalize_identifier(port_ident)
         if self.ifc_cluster:
             return self.getCtePort(port_ident)
-        return self.getPort(port_ident)
+        return self.getPortProperties(port_ident, properties)
 
-    def modify_port(self, port_ident, request_data):
+    def get_port_data(self, port_ident):
         port_ident = self._normalize_identifier(port_ident)
         if self.ifc_cluster:
-            self.modifyCtePort(port_ident, request_data)
+            port_data = self.getCtePort(port_ident)
         else:
-            self.modifyPort(port_ident, request_data)
+            port_data = self.getPort(port_ident)
+        if port_data and port_data.get(self._identifier_key) is not None:
+            self._port_states.update(port_data.get(self._identifier_key), port_data)
+        return port_data
+
+    def change_port_speed(self, port_idents, mode):
+        """
+        Change speed configuration of several ports with one request, standalone only
+        :param port_idents: port identifiers
+        :param mode: qsfp28_port_mode value, "MODE_QSFP"
+        """
+        if self.ifc_cluster:
+            raise Exception("Port speed change is not supported in cluster mode")
+        port_idents = [self._normalize_identifier(port_ident) for port_ident in port_idents]
+        try:
+            self.changePortSpeed({"port_list": port_idents, "qsfp28_port_mode": mode})
+        finally:
+            for port_ident in port_idents:
+                self._port_states.invalidate(port_ident)
+
+    def port_state_holds(self, port_ident, request_data):
+        return self._port_states.holds(port_ident, request_data)
+
+    def modify_port(self, port_ident, request_data):
+        port_ident = self._normalize_identifier(port_ident)
+        if self._port_states.holds(port_ident, request_data):
+            saved_writes = self._port_states.register_saved_write()
+            self._logger.debug("Port {} is already in state {}, modify skipped, saved writes: {}".format(
+                port_ident, request_data, saved_writes))
+            return
+        try:
+            if self.ifc_cluster:
+                self.modifyCtePort(port_ident, request_data)
+            else:
+                self.modifyPort(port_ident, request_data)
+        except Exception:
+            self._port_states.invalidate(port_ident)
+            raise
+        self._port_states.update(port_ident, request_data)
+
+    def modify_ports_with_group(self, port_idents, request_data, group_request_data):
+        """
+        Apply mode/enabled state to several ports at once with a temporary port group, standalone only.
+        Port states are read back with one bulk fetch after the group is deleted, ports not in the requested
+        state are modified one by one
+        :param port_idents: port identifiers, the ports must not be members of other port groups
+        :param request_data: {"mode": ..., "enabled": ...}
+        :param group_request_data: temporary port group creation data
+        :return: number of API calls
+        :raises NtoPortGroupNotDeleted: if the temporary group is left on the device
+        """
+        if self.ifc_cluster:
+            raise Exception("Port groups are not supported in cluster mode")
+        response = self.createPortGroup(group_request_data)
+        port_group_id = self._normalize_identifier(response.get("id"))
+        calls = 1
+        try:
+            calls += 1
+            if request_data.get("enabled"):
+                self.enablePortGroup(port_group_id)
+            else:
+                self.disablePortGroup(port_group_id)
+        finally:
+            for port_ident in port_idents:
+                self._port_states.invalidate(port_ident)
+            try:
+                calls += 1
+                self.deletePortGroup(port_group_id)
+            except Exception as e:
+                raise NtoPortGroupNotDeleted("Temporary port group {} is not deleted, ports {} cannot be mapped "
+                                             "until it is removed: {}".format(port_group_id, port_idents, e))
+        self.get_ports()
+        calls += 1
+        mismatched_ports = [port_ident for port_ident in port_idents
+                            if not self._port_states.holds(port_ident, request_data)]
+        if mismatched_ports:
+            self._logger.warning("Ports {} are not in state {} after the port group change, modifying them one by "
+                                 "one".format(mismatched_ports, request_data))
+        for port_ident in mismatched_ports:
+            self.modify_port(port_ident, request_data)
+            calls += 1
+        return calls
 
     def get_filters(self):
         if self.ifc_cluster:
             return self.getAllCteFilters()
         return self.getAllFilters()
 
+    def get_filters_properties(self, properties):
+        if self.ifc_cluster:
+            return self.getAllCteFiltersProperties(properties)
+        return self.getAllFiltersProperties(properties)
+
     def get_filter(self, ident):
         ident = self._normalize_identifier(ident)
         if self.ifc_cluster:
@@ -108,9 +447,15 @@ class NtoSession(object):
 
     def create_filter(self, request_data):
         if self.ifc_cluster:
-            self.createCteFilter(request_data)
+            return self.createCteFilter(request_data)
+        return self.createFilter(request_data)
+
+    def modify_filter(self, ident, request_data):
+        ident = self._normalize_identifier(ident)
+        if self.ifc_cluster:
+            self.modifyCteFilter(ident, request_data)
         else:
-            self.createFilter(request_data)
+            self.modifyFilter(ident, request_data)
 
     def delete_filter(self, ident):
         ident = self._normalize_identifier(ident)
@@ -119,6 +464,79 @@ class NtoSession(object):
         else:
             self.deleteFilter(ident)
 
+    def reserve_filter_memory(self, filter_count, freed_count=0):
+        """
+        Pre-flight filter memory check, nothing is checked in cluster mode
+        :raises FilterMemoryException: if the filters do not fit
+        """
+        if not self._filter_memory or filter_count <= 0 or self.ifc_cluster:
+            return
+        self._filter_memory.reserve(filter_count, self.getMemoryMeters, freed_count)
+
+    def release_filter_memory(self, filter_count):
+        if self._filter_memory and filter_count > 0:
+            self._filter_memory.release(filter_count)
+
+    def get_port_group(self, ident):
+        if self.ifc_cluster:
+            raise Exception("Port groups are not supported in cluster mode")
+        return self.getPortGroup(self._normalize_identifier(ident))
+
+    def create_port_group(self, request_data):
+        if self.ifc_cluster:
+            raise Exception("Port groups are not supported in cluster mode")
+        return self.createPortGroup(request_data)
+
+    def modify_port_group(self, ident, request_data):
+        if self.ifc_cluster:
+            raise Exception("Port groups are not supported in cluster mode")
+        self.modifyPortGroup(self._normalize_identifier(ident), request_data)
+
+    def delete_port_group(self, ident):
+        if self.ifc_cluster:
+            raise Exception("Port groups are not supported in cluster mode")
+        self.deletePortGroup(self._normalize_identifier(ident))
+
+    def search_port_groups(self, request_data):
+        if self.ifc_cluster:
+            raise Exception("Port groups are not supported in cluster mode")
+        return self.searchPortGroups(request_data)
+
+    def search_ports(self, request_data):
+        if self.ifc_cluster:
+            return self.searchCtePorts(request_data)
+        return self.searchPorts(request_data)
+
+    def search_filters(self, request_data):
+        if self.ifc_cluster:
+            return self.searchCteFilter(request_data)
+        return self.searchFilters(request_data)
+
+    def clear_filters_and_ports(self):
+        """
+        Delete all filters and port groups and set all ports to default values
+        """
+        if self.ifc_cluster:
+            self.clearCteFiltersAndPort()
+        else:
+            self.clearFiltersAndPorts()
+        self._port_states.invalidate()
+        if self._filter_memory:
+            self._filter_memory.invalidate()
+
+    def export_config(self, request_data):
+        if self.ifc_cluster:
+            raise Exception("Configuration export is not supported in cluster mode")
+        self.exportConfig(request_data)
+
+    def import_config(self, request_data):
+        if self.ifc_cluster:
+            raise Exception("Configuration import is not supported in cluster mode")
+        self.importConfigChecked(dict(request_data))
+        self._port_states.invalidate()
+        if self._filter_memory:
+            self._filter_memory.invalidate()
+
 
 class DriverCommands(DriverCommandsInterface):
     """
@@ -127,8 +545,16 @@ class DriverCommands(DriverCommandsInterface):
 
     class _API_KEYS:
         NAME = "name"
+        DEFAULT_NAME = "default_name"
         MODE = "mode"
         ENABLED = "enabled"
+        DESCRIPTION = "description"
+        TYPE = "type"
+        LINK_SETTINGS = "link_settings"
+        LINK_STATUS = "link_status"
+        SERIAL_NUMBER = "serial_number"
+        SOFTWARE_VERSION = "software_version"
+        PORT_LIST = "port_list"
 
     class _DEFAULT_KEYS(_API_KEYS):
         IDENTIFIER = "id"
@@ -136,6 +562,8 @@ class DriverCommands(DriverCommandsInterface):
         DST_PORT_LIST = "dest_port_list"
         SRC_FILTER_LIST = "source_filter_list"
         DST_FILTER_LIST = "dest_filter_list"
+        SRC_PORT_GROUP_LIST = "source_port_group_list"
+        PORT_GROUP_ID = "port_group_id"
 
     class _CLUSTER_KEYS(_API_KEYS):
         IDENTIFIER = "uuid"
@@ -143,12 +571,52 @@ class DriverCommands(DriverCommandsInterface):
         DST_PORT_LIST = "dest_port_uuid_list"
         SRC_FILTER_LIST = "source_filter_uuid_list"
         DST_FILTER_LIST = "dest_filter_uuid_list"
+        SRC_PORT_GROUP_LIST = "source_port_group_uuid_list"
+        PORT_GROUP_ID = "port_group_uuid"
 
     class _API_VALUES:
         BIDI = "BIDIRECTIONAL"
         NETWORK = "NETWORK"
+        TOOL = "TOOL"
         PASS_ALL = "PASS_ALL"
+        DENY_ALL = "DENY_ALL"
         BLADE_ID = "1"
+        DRIVER_TAG = "CloudShell L1"
+        POOL_TAG = "CloudShell L1 pool"
+        AGGREGATION_GROUP_TYPE = "INTERCONNECT"
+        AGGREGATION_GROUP_PREFIX = "CS_AGG_"
+        BULK_GROUP_PREFIX = "CS_TMP_"
+        LINK_SETTINGS_AUTO = "AUTO"
+        CTE_MEMBER_KEY = "cte_member_uuid"
+
+    _STAT_NAMES = ["np_total_rx_count_bytes", "tp_total_tx_count_bytes", "tp_total_drop_count_packets"]
+    _SNAPSHOT_SECTIONS = {"filters": "ALL", "ports": "ALL", "port_groups": "ALL"}
+
+    _CREATE_FILTER_KIND = "create_filter"
+
+    class _PORT_ATTRIBUTES:
+        PORT_SPEED = "Port Speed"
+        DUPLEX = "Duplex"
+        AUTO_NEGOTIATION = "Auto Negotiation"
+        RX_POWER = "Rx Power (dBm)"
+        TX_POWER = "Tx Power (dBm)"
+        WAVELENGTH = "Wavelength"
+        NEIGHBOR = "Neighbor"
+        UTILIZATION = "Utilization (%)"
+        DROP_RATE = "Drop Rate (pps)"
+
+    # qsfp28_port_mode by Port Speed value
+    _PORT_SPEED_MODES = {"100G": "MODE_QSFP28", "40G": "MODE_QSFP", "25G": "MODE_SFP28", "10G": "MODE_SFP"}
+
+    # transceiver info headers by attribute, prefix match
+    _TRANSCEIVER_HEADERS = {_PORT_ATTRIBUTES.RX_POWER: "rx power",
+                            _PORT_ATTRIBUTES.TX_POWER: "tx power",
+                            _PORT_ATTRIBUTES.WAVELENGTH: "wavelength"}
+
+    class _MAPPING_COMMANDS:
+        MAP_BIDI = "MapBidi"
+        MAP_UNI = "MapUni"
+        MAP_CLEAR_TO = "MapClearTo"
 
     def __init__(self, logger, runtime_config):
         """
@@ -161,16 +629,120 @@ class DriverCommands(DriverCommandsInterface):
 
         # self._KEYS = self._CLUSTER_KEYS if self._ifc_cluster else self._DEFAULT_KEYS
         self._VALUES = self._API_VALUES
+        self._multi_dest_filters = runtime_config.read_key('MULTI_DEST_FILTERS', False)
+        self._max_workers = self._read_int_key('MAX_CONCURRENCY', DEFAULT_MAX_WORKERS)
+        self._member_concurrency = self._read_int_key('CLUSTER.MEMBER_CONCURRENCY', 0)
+        self._member_key = runtime_config.read_key('CLUSTER.MEMBER_KEY', None) or self._VALUES.CTE_MEMBER_KEY
+        self._cte_members = None
+        self._port_members = None
+        self._full_clear = runtime_config.read_key('FULL_CLEAR.ENABLED', False)
+        self._full_clear_managed_only = runtime_config.read_key('FULL_CLEAR.MANAGED_FILTERS_ONLY', True)
+        self._aggregation = runtime_config.read_key('AGGREGATION.ENABLED', False)
+        self._bulk_ports_min = self._read_int_key('BULK_PORTS.MIN_PORTS', 0)
+        self._default_deadline = self._read_int_key('DEADLINES.DEFAULT', 0)
+        self._autoload_port_search = runtime_config.read_key('AUTOLOAD.PORT_SEARCH', None)
+        self._autoload_filter_search = runtime_config.read_key('AUTOLOAD.FILTER_SEARCH', None)
+        self._autoload_blades = runtime_config.read_key('AUTOLOAD.BLADES', None) or []
+        self._autoload_port_ranges = runtime_config.read_key('AUTOLOAD.PORT_RANGES', None) or []
+        self._port_attributes = PortAttributeReader(lambda properties: self._nto_session.get_ports_properties(
+            properties), [self._API_KEYS.LINK_SETTINGS, self._API_KEYS.LINK_STATUS],
+            self._read_int_key('ATTRIBUTES.CACHE_TTL_SEC', 5),
+            self._read_int_key('ATTRIBUTES.BATCH_WINDOW_MS', 50) / 1000.0, self._logger)
+        self._transceivers = TransceiverInfoCache(lambda: self._nto_session.get_transceiver_info(),
+                                                  self._read_int_key('ATTRIBUTES.TRANSCEIVER_REFRESH_SEC', 60),
+                                                  self._logger)
+        self._port_speed_modes = runtime_config.read_key('ATTRIBUTES.SPEED_MODES', self._PORT_SPEED_MODES)
+        speed_window = self._read_int_key('ATTRIBUTES.SPEED_WINDOW_MS', 0)
+        self._speed_window = CoalescingWindow(speed_window / 1000.0,
+                                              self._change_port_speeds) if speed_window > 0 else None
+        self._port_inventory = None
+        coalescing_window = self._read_int_key('COALESCING.WINDOW_MS', 0)
+        self._mapping_window = CoalescingWindow(coalescing_window / 1000.0,
+                                                self._apply_mapping_commands) if coalescing_window > 0 else None
+        self._snapshots = SnapshotStore(runtime_config.read_key('SNAPSHOTS.PATH', None) or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), '..', 'Snapshots'))
+        self._snapshot_sections = runtime_config.read_key('SNAPSHOTS.SECTIONS', self._SNAPSHOT_SECTIONS)
+
+        filter_memory_threshold = self._read_int_key('FILTER_MEMORY.THRESHOLD_PCT', 0)
+        filter_memory = FilterMemoryModel(filter_memory_threshold,
+                                          self._read_float_key('FILTER_MEMORY.FILTER_COST_PCT', 1.0),
+                                          self._read_int_key('FILTER_MEMORY.REFRESH_SEC', 60)
+                                          ) if filter_memory_threshold > 0 else None
+
+        retry_policy = RetryPolicy(self._read_int_key('RETRIES.MAX_ATTEMPTS', 3),
+                                   self._read_int_key('RETRIES.BASE_DELAY_MS', 500) / 1000.0,
+                                   self._read_int_key('RETRIES.MAX_DELAY_MS', 8000) / 1000.0)
+
+        self._nto_session = NtoSession(logger=self._logger, pool_size=self._max_workers, filter_memory=filter_memory,
+                                       retry_policy=retry_policy,
+                                       circuit_breaker_threshold=self._read_int_key(
+                                           'CIRCUIT_BREAKER.FAILURE_THRESHOLD', 0),
+                                       circuit_breaker_reset=self._read_int_key('CIRCUIT_BREAKER.RESET_SEC', 30),
+                                       capability_store=CapabilityStore(
+                                           runtime_config.read_key('CAPABILITIES.PATH', None) or os.path.join(
+                                               os.path.dirname(os.path.abspath(__file__)), '..',
+                                               'capabilities.json')))
+
+        filter_pool_high = self._read_int_key('FILTER_POOL.HIGH_WATERMARK', 0)
+        self._filter_pool = FilterPool(self._read_int_key('FILTER_POOL.LOW_WATERMARK', 0), filter_pool_high,
+                                       self._create_idle_filter, self._nto_session.delete_filter,
+                                       self._discover_idle_filters, self._logger,
+                                       self._read_int_key('FILTER_POOL.MAINTENANCE_SEC', 60)
+                                       ) if filter_pool_high > 0 else None
+
+        neighbors_chunk_size = self._read_int_key('NEIGHBORS.CHUNK_SIZE', 0)
+        self._neighbors = NeighborCache(self._nto_session.get_neighbors, neighbors_chunk_size, self._run_parallel,
+                                        self._logger) if neighbors_chunk_size > 0 else None
+
+        stats_interval = self._read_int_key('STATS.INTERVAL_SEC', 0)
+        self._stats_sampler = StatsSampler(self._nto_session.get_port_stats,
+                                           runtime_config.read_key('STATS.STAT_NAMES', None) or self._STAT_NAMES,
+                                           self._get_mapped_port_idents, self._read_int_key('STATS.SAMPLES', 60),
+                                           stats_interval, self._logger,
+                                           self._read_int_key('STATS.PORTS_REFRESH_SEC', 60)
+                                           ) if stats_interval > 0 else None
+        drop_watchdog_interval = self._read_int_key('DROP_WATCHDOG.INTERVAL_SEC', 0)
+        self._drop_watchdog = DropWatchdog(
+            self._nto_session.get_port_stats, self._get_tool_ports,
+            self._nto_session.reset_drops if runtime_config.read_key('DROP_WATCHDOG.RESET_DROPS', False) else None,
+            runtime_config.read_key('DROP_WATCHDOG.REPORT_PATH', None) or os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), '..', 'Logs', 'drops_report.log'),
+            drop_watchdog_interval, self._logger) if drop_watchdog_interval > 0 else None
+
+    def _read_int_key(self, key, default_value):
+        value = self._runtime_config.read_key(key, default_value)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            self._logger.warning("Wrong value {} for {}, using default {}".format(value, key, default_value))
+            return default_value
 
-        self._nto_session = NtoSession(logger=self._logger)
+    @contextmanager
+    def _command_deadline(self, command_name):
+        """
+        Time budget of the command from DEADLINES.<command_name>, DEADLINES.DEFAULT if not set,
+        the session metrics are logged when the command ends
+        """
+        try:
+            with command_deadline(command_name,
+                                  self._read_int_key('DEADLINES.{}'.format(command_name), self._default_deadline)):
+                yield
+        finally:
+            self._logger.debug("{} metrics: {}".format(command_name, self._nto_session.get_metrics()))
+
+    def _read_float_key(self, key, default_value):
+        value = self._runtime_config.read_key(key, default_value)
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            self._logger.warning("Wrong value {} for {}, using default {}".format(value, key, default_value))
+            return default_value
 
     @property
-    @lru_cache()
     def _ifc_cluster(self):
         return self._nto_session.ifc_cluster
 
     @property
-    @lru_cache()
     def _KEYS(self):
         return self._CLUSTER_KEYS if self._ifc_cluster else self._DEFAULT_KEYS
 
@@ -193,7 +765,25 @@ class DriverCommands(DriverCommandsInterface):
                 self._logger.info(device_info)
         """
         self._logger.debug('Login')
+        if self._nto_session.address is not None and address != self._nto_session.address:
+            self._port_inventory = None
+            self._cte_members = None
+            self._port_members = None
+            self._port_attributes.invalidate()
+            self._transceivers.invalidate()
+            if self._neighbors:
+                self._neighbors.invalidate()
+            if self._filter_pool:
+                self._filter_pool.reset()
+            if self._stats_sampler:
+                self._stats_sampler.reset()
+            if self._drop_watchdog:
+                self._drop_watchdog.reset()
         self._nto_session.set_login_details(address, username, password)
+        if self._stats_sampler:
+            self._stats_sampler.start()
+        if self._drop_watchdog:
+            self._drop_watchdog.start()
         self._logger.info('completed log in')
 
     def get_state_id(self):
@@ -244,12 +834,19 @@ class DriverCommands(DriverCommandsInterface):
 
         """
         self._logger.info("MapBidi({}<=>{})".format(src_port, dst_port))
-        src_port_ident = self._get_port_identifier(self._from_cs_port(src_port))
-        dst_port_ident = self._get_port_identifier(self._from_cs_port(dst_port))
-        self._enable_port(src_port_ident)
-        self._enable_port(dst_port_ident)
-        self._create_filter(src_port_ident, dst_port_ident)
-        self._create_filter(dst_port_ident, src_port_ident)
+        with self._command_deadline(self._MAPPING_COMMANDS.MAP_BIDI):
+            self._submit_mapping_command(self._MAPPING_COMMANDS.MAP_BIDI, src_port, [dst_port])
+
+    def _map_bidi(self, src_port, dst_port):
+        src_port_data, dst_port_data = self._run_parallel(self._get_port_data, [self._from_cs_port(src_port),
+                                                                                self._from_cs_port(dst_port)])
+        src_port_ident = src_port_data.get(self._KEYS.IDENTIFIER)
+        dst_port_ident = dst_port_data.get(self._KEYS.IDENTIFIER)
+        plan = self._create_plan()
+        enable_operations = [self._plan_enable_port(plan, src_port_data), self._plan_enable_port(plan, dst_port_data)]
+        self._plan_create_filter(plan, src_port_ident, [dst_port_ident], enable_operations)
+        self._plan_create_filter(plan, dst_port_ident, [src_port_ident], enable_operations)
+        self._execute_plan(plan)
 
     def map_uni(self, src_port, dst_ports):
         """
@@ -267,12 +864,35 @@ class DriverCommands(DriverCommandsInterface):
                     session.send_command('map {0} also-to {1}'.format(convert_port(src_port), convert_port(dst_port)))
         """
         self._logger.info("MapUni({}->{})".format(src_port, dst_ports))
-        src_port_ident = self._get_port_identifier(self._from_cs_port(src_port))
-        self._enable_port(src_port_ident)
-        for dst_port in dst_ports:
-            dst_port_ident = self._get_port_identifier(self._from_cs_port(dst_port))
-            self._enable_port(dst_port_ident)
-            self._create_filter(src_port_ident, dst_port_ident)
+        with self._command_deadline(self._MAPPING_COMMANDS.MAP_UNI):
+            self._submit_mapping_command(self._MAPPING_COMMANDS.MAP_UNI, src_port, dst_ports)
+
+    def _map_uni(self, src_port, dst_ports):
+        port_data_list = self._run_per_member(self._get_port_data,
+                                              [self._from_cs_port(port) for port in [src_port] + list(dst_ports)])
+        src_port_data = port_data_list[0]
+        dst_port_data_list = port_data_list[1:]
+        src_port_ident = src_port_data.get(self._KEYS.IDENTIFIER)
+        plan = self._create_plan()
+        aggregation = self._aggregates(src_port_data, len(dst_port_data_list))
+        src_enable_operation = self._plan_enable_port(plan, src_port_data,
+                                                      self._VALUES.NETWORK if aggregation else None)
+        if aggregation:
+            for dst_port_data in dst_port_data_list:
+                dst_enable_operation = self._plan_enable_port(plan, dst_port_data)
+                self._plan_aggregation(plan, src_port_data, dst_port_data.get(self._KEYS.IDENTIFIER),
+                                       [src_enable_operation, dst_enable_operation])
+        elif self._multi_dest_filters:
+            enable_operations = [src_enable_operation] + [self._plan_enable_port(plan, port_data)
+                                                          for port_data in dst_port_data_list]
+            dst_port_idents = [port_data.get(self._KEYS.IDENTIFIER) for port_data in dst_port_data_list]
+            self._plan_multi_dest_filter(plan, src_port_data, dst_port_idents, enable_operations)
+        else:
+            for dst_port_data in dst_port_data_list:
+                dst_enable_operation = self._plan_enable_port(plan, dst_port_data)
+                self._plan_create_filter(plan, src_port_ident, [dst_port_data.get(self._KEYS.IDENTIFIER)],
+                                         [src_enable_operation, dst_enable_operation])
+        self._execute_plan(plan)
 
     def get_resource_description(self, address):
         """
@@ -308,14 +928,27 @@ class DriverCommands(DriverCommandsInterface):
             return ResourceDescriptionResponseInfo([chassis])
         """
         self._logger.info("GetResourceDescriptions")
+        with self._command_deadline("GetResourceDescription"):
+            return self._get_resource_description(address)
+
+    def _get_resource_description(self, address):
         chassis_id = "1"
         chassis_model_name = "Ixia Visionedge Chassis"
-        chassis = Chassis(chassis_id, address, chassis_model_name)
+        system_info = self._nto_session.get_system_info()
+        chassis = Chassis(chassis_id, address, chassis_model_name, system_info.get(self._KEYS.SERIAL_NUMBER))
+        chassis.set_serial_number(system_info.get(self._KEYS.SERIAL_NUMBER))
+        chassis.set_os_version(system_info.get(self._KEYS.SOFTWARE_VERSION))
 
         blade_table = {}
 
         port_table = {}
-        port_list = self._get_ports()
+        scoped = bool(self._autoload_port_search or self._autoload_port_ranges or self._autoload_blades)
+        if self._ifc_cluster:
+            self._refresh_port_members()
+        if scoped:
+            port_list = self._get_scoped_ports()
+        else:
+            port_list = self._get_ports([self._KEYS.LINK_SETTINGS, self._KEYS.LINK_STATUS])
         # port_list = get_ports()
         if not port_list:
             raise Exception("Ports are not defined.")
@@ -326,11 +959,15 @@ class DriverCommands(DriverCommandsInterface):
             if not blade_id or not port_id:
                 self._logger.debug(
                     "Extracting default port name for uuid: {}, name: {}".format(port_uuid, port_name))
-                blade_id, port_id = self._parse_port_name(self._get_port_data(port_name).get('default_name'))
+                default_name = port_info.get(self._KEYS.DEFAULT_NAME) or self._get_port_data(port_name).get(
+                    self._KEYS.DEFAULT_NAME)
+                blade_id, port_id = self._parse_port_name(default_name)
 
             if not blade_id or not port_id:
                 self._logger.error("Cannot identify port id, uuid: {}, name: {}".format(port_uuid, port_name))
                 continue
+            if not self._in_autoload_scope(blade_id, port_id):
+                continue
 
             blade = blade_table.get(blade_id)
             if not blade:
@@ -339,18 +976,54 @@ class DriverCommands(DriverCommandsInterface):
                 blade_table[blade_id] = blade
             port = Port(port_id)
             port.set_parent_resource(blade)
+            port.set_port_speed(self._port_attribute_value(port_info, self._PORT_ATTRIBUTES.PORT_SPEED))
             port_table[port_uuid] = port
 
-        filters = self._get_filters()
-        for f in filters:
-            f_inf = self._get_filter(f.get(self._KEYS.IDENTIFIER))
+        if self._neighbors:
+            self._set_port_neighbors(port_table)
+
+        port_groups = {}
+        filter_members = {}
+        if scoped:
+            filters = self._get_scoped_filters(port_list)
+        else:
+            filters = self._fetch_per_member(self._nto_session.search_filters, self._autoload_filter_search,
+                                             filter_members) if self._ifc_cluster else None
+        if filters is None:
+            if self._autoload_filter_search:
+                filters = self._nto_session.search_filters(self._autoload_filter_search)
+            else:
+                filters = self._get_filters()
+
+        def get_filter_data(filter_summary):
+            return self._get_filter(filter_summary.get(self._KEYS.IDENTIFIER))
+
+        def filter_member(filter_summary):
+            return filter_members.get(str(filter_summary.get(self._KEYS.IDENTIFIER)))
+
+        if filter_members:
+            filter_data_list = run_partitioned(get_filter_data, filters, filter_member, self._max_workers,
+                                               self._member_workers())
+        else:
+            filter_data_list = self._run_parallel(get_filter_data, filters)
+        for f_inf in filter_data_list:
             src_list = f_inf.get(self._KEYS.SRC_PORT_LIST)
             dst_list = f_inf.get(self._KEYS.DST_PORT_LIST)
             if src_list and dst_list:
                 src_port = port_table.get(src_list[0])
-                dst_port = port_table.get(dst_list[0])
-                if src_port and dst_port:
-                    dst_port.add_mapping(src_port)
+                for dst_uuid in dst_list:
+                    dst_port = port_table.get(dst_uuid)
+                    if src_port and dst_port:
+                        dst_port.add_mapping(src_port)
+            for port_group_id in f_inf.get(self._KEYS.SRC_PORT_GROUP_LIST) or []:
+                if port_group_id not in port_groups:
+                    port_groups[port_group_id] = self._nto_session.get_port_group(port_group_id)
+                for src_uuid in port_groups[port_group_id].get(self._KEYS.PORT_LIST) or []:
+                    src_port = port_table.get(src_uuid)
+                    for dst_uuid in dst_list or []:
+                        dst_port = port_table.get(dst_uuid)
+                        if src_port and dst_port:
+                            dst_port.add_mapping(src_port)
 
         return ResourceDescriptionResponseInfo([chassis])
 
@@ -374,11 +1047,10 @@ class DriverCommands(DriverCommandsInterface):
                     raise Exception('self.__class__.__name__', ','.join(exceptions))
         """
         self._logger.info("MapClear({})".format(ports))
-        for port in ports:
-            src_filter_list, dst_filter_list = self._get_port_filters(self._from_cs_port(port))
-            if not src_filter_list and not dst_filter_list:
-                continue
-            map(lambda uuid: self._delete_filter(uuid), src_filter_list + dst_filter_list)
+        with self._command_deadline("MapClear"):
+            if self._full_clear and self._is_full_device_clear(ports) and self._clear_device():
+                return
+            self._teardown_ports([self._from_cs_port(port) for port in ports])
 
     def map_clear_to(self, src_port, dst_ports):
         """
@@ -399,16 +1071,228 @@ class DriverCommands(DriverCommandsInterface):
         """
 
         self._logger.debug("MapClearTo({}->{})".format(src_port, dst_ports))
-        src_port_ident = self._get_port_identifier(self._from_cs_port(src_port))
-        dst_port_idents = [self._get_port_identifier(self._from_cs_port(port)) for port in dst_ports]
+        with self._command_deadline(self._MAPPING_COMMANDS.MAP_CLEAR_TO):
+            self._submit_mapping_command(self._MAPPING_COMMANDS.MAP_CLEAR_TO, src_port, dst_ports)
+
+    def _map_clear_to(self, src_port, dst_ports):
+        self._clear_links(self._from_cs_port(src_port), [self._from_cs_port(port) for port in dst_ports])
+
+    def _clear_links(self, src_port_name, dst_port_names):
+        port_data_list = self._run_per_member(self._get_port_data, [src_port_name] + list(dst_port_names))
+        src_port_ident = port_data_list[0].get(self._KEYS.IDENTIFIER)
+        dst_port_idents = [port_data.get(self._KEYS.IDENTIFIER) for port_data in port_data_list[1:]]
+
+        port_group_id = port_data_list[0].get(self._KEYS.PORT_GROUP_ID)
+        if port_group_id is not None and not self._ifc_cluster:
+            self._detach_group_member(port_group_id, src_port_ident, dst_port_idents)
+            return
 
-        src_filters, dst_filters = self._get_port_filters(self._from_cs_port(src_port))
+        dst_filters = port_data_list[0].get(self._KEYS.DST_FILTER_LIST)
         if not dst_filters:
             return
         for filter_uuid in dst_filters:
-            src_ports, dst_ports = self._get_filter_ports(filter_uuid)
+            filter_data = self._get_filter(filter_uuid)
+            src_ports = filter_data.get(self._KEYS.SRC_PORT_LIST) or []
+            dst_ports = filter_data.get(self._KEYS.DST_PORT_LIST) or []
             if src_port_ident in src_ports and any(uuid in dst_ports for uuid in dst_port_idents):
-                self._delete_filter(filter_uuid)
+                self._detach_filter_destinations(filter_uuid, dst_port_idents, src_ports, dst_ports, filter_data)
+
+    def apply_topology(self, mappings):
+        """
+        Bring the device to the desired set of mappings, only the difference is applied
+        :param mappings: list of unidirectional mappings (src_port, dst_port),
+            [('192.168.42.240/1/21', '192.168.42.240/1/22')], bidirectional mapping is two pairs
+        :type mappings: list
+        :return: change summary
+        :rtype: dict
+        :raises Exception: if command failed, applying the same topology again completes it
+        """
+        self._logger.info("ApplyTopology({} mappings)".format(len(mappings)))
+        with self._command_deadline("ApplyTopology"):
+            return self._apply_topology(mappings)
+
+    def _apply_topology(self, mappings):
+        start_time = time.time()
+        port_index = self._get_port_index(refresh=True)
+        desired_mappings = OrderedDict()
+        for src_port, dst_port in mappings:
+            dst_port_idents = desired_mappings.setdefault(self._get_indexed_port_identifier(port_index, src_port), [])
+            dst_port_ident = self._get_indexed_port_identifier(port_index, dst_port)
+            if dst_port_ident not in dst_port_idents:
+                dst_port_idents.append(dst_port_ident)
+        desired_links = set((src, dst) for src, dst_list in desired_mappings.items() for dst in dst_list)
+        desired_ports = set(port for link in desired_links for port in link)
+        desired_dst_ports = set(dst for src, dst in desired_links)
+
+        filters_data = self._get_filters_data()
+        port_groups = self._get_aggregation_groups(list(set(
+            filter_data.get(self._KEYS.SRC_PORT_GROUP_LIST)[0] for filter_data in filters_data
+            if self._is_group_mapping_filter(filter_data))))
+
+        delete_filters = []
+        delete_filter_data = {}
+        shrink_filters = {}
+        kept_filters = {}
+        delete_groups = []
+        shrink_groups = {}
+        group_member_ports = set()
+        existing_links = set()
+        busy_ports = set()
+        touched_ports = set()
+        for filter_data in filters_data:
+            filter_uuid = filter_data.get(self._KEYS.IDENTIFIER)
+            src_ports = filter_data.get(self._KEYS.SRC_PORT_LIST) or []
+            dst_ports = filter_data.get(self._KEYS.DST_PORT_LIST) or []
+            port_group_id = (filter_data.get(self._KEYS.SRC_PORT_GROUP_LIST)[0]
+                             if self._is_group_mapping_filter(filter_data) else None)
+            if port_group_id in port_groups:
+                # aggregation group filter, its links are the group members to the destination
+                dst_port_ident = dst_ports[0]
+                member_ports = port_groups[port_group_id].get(self._KEYS.PORT_LIST) or []
+                kept_members = [uuid for uuid in member_ports if (uuid, dst_port_ident) in desired_links and
+                                (uuid, dst_port_ident) not in existing_links and uuid not in desired_dst_ports]
+                existing_links.update((uuid, dst_port_ident) for uuid in kept_members)
+                if not kept_members:
+                    delete_filters.append(filter_uuid)
+                    delete_filter_data[filter_uuid] = filter_data
+                    delete_groups.append(port_group_id)
+                    touched_ports.update(member_ports + dst_ports)
+                    continue
+                if len(kept_members) != len(member_ports):
+                    shrink_groups[port_group_id] = kept_members
+                    touched_ports.update(uuid for uuid in member_ports if uuid not in kept_members)
+                group_member_ports.update(kept_members)
+                busy_ports.update(kept_members + dst_ports)
+                continue
+            if not self._is_mapping_filter(filter_data):
+                busy_ports.update(src_ports + dst_ports)
+                continue
+            src_port_ident = src_ports[0]
+            if filter_data.get(self._KEYS.DESCRIPTION) != self._VALUES.DRIVER_TAG:
+                # filters not created by the driver are never changed, their desired links are kept
+                existing_links.update((src_port_ident, uuid) for uuid in dst_ports
+                                      if (src_port_ident, uuid) in desired_links)
+                busy_ports.update(src_ports + dst_ports)
+                continue
+            kept_dst_ports = [uuid for uuid in dst_ports if
+                              (src_port_ident, uuid) in desired_links and (src_port_ident, uuid) not in existing_links]
+            existing_links.update((src_port_ident, uuid) for uuid in kept_dst_ports)
+            if not kept_dst_ports:
+                delete_filters.append(filter_uuid)
+                delete_filter_data[filter_uuid] = filter_data
+                touched_ports.update(src_ports + dst_ports)
+                continue
+            if len(kept_dst_ports) != len(dst_ports):
+                shrink_filters[filter_uuid] = kept_dst_ports
+                touched_ports.update(uuid for uuid in dst_ports if uuid not in kept_dst_ports)
+            kept_filters.setdefault(src_port_ident, (filter_uuid, kept_dst_ports))
+            busy_ports.update([src_port_ident] + kept_dst_ports)
+
+        missing_mappings = OrderedDict()
+        for src_port_ident, dst_port_idents in desired_mappings.items():
+            for dst_port_ident in dst_port_idents:
+                if (src_port_ident, dst_port_ident) not in existing_links:
+                    missing_mappings.setdefault(src_port_ident, []).append(dst_port_ident)
+
+        extend_filters = {}
+        create_filters = []
+        for src_port_ident, dst_port_idents in missing_mappings.items():
+            if not self._multi_dest_filters:
+                create_filters.extend((src_port_ident, [uuid]) for uuid in dst_port_idents)
+            elif src_port_ident in kept_filters:
+                filter_uuid, kept_dst_ports = kept_filters[src_port_ident]
+                # a shrunk filter is extended with the same modifyFilter call
+                shrink_filters.pop(filter_uuid, None)
+                extend_filters[filter_uuid] = kept_dst_ports + dst_port_idents
+            else:
+                create_filters.append((src_port_ident, dst_port_idents))
+
+        enabled_state = {self._KEYS.MODE: self._VALUES.BIDI, self._KEYS.ENABLED: True}
+        member_state = {self._KEYS.MODE: self._VALUES.NETWORK, self._KEYS.ENABLED: True}
+        enable_ports = [uuid for uuid in desired_ports - group_member_ports
+                        if not self._nto_session.port_state_holds(uuid, enabled_state)]
+        enable_members = [uuid for uuid in group_member_ports
+                          if not self._nto_session.port_state_holds(uuid, member_state)]
+        disable_ports = [uuid for uuid in touched_ports - desired_ports - busy_ports
+                         if not self._nto_session.port_state_holds(uuid, self._disabled_port_state())]
+
+        self._nto_session.reserve_filter_memory(len(create_filters), len(delete_filters))
+        created_filters = []
+        try:
+            self._run_parallel(lambda uuid: self._retire_filter(uuid, delete_filter_data[uuid]), delete_filters)
+            self._run_parallel(self._nto_session.delete_port_group, delete_groups)
+            self._run_parallel(lambda uuid: self._nto_session.modify_port_group(
+                uuid, {self._KEYS.PORT_LIST: shrink_groups[uuid]}), list(shrink_groups))
+            self._run_parallel(lambda uuid: self._nto_session.modify_filter(
+                uuid, {self._KEYS.DST_PORT_LIST: shrink_filters[uuid]}), list(shrink_filters))
+            self._modify_ports(enable_ports, enabled_state)
+            self._modify_ports(enable_members, member_state)
+            self._run_parallel(lambda uuid: self._nto_session.modify_filter(
+                uuid, {self._KEYS.DST_PORT_LIST: extend_filters[uuid]}), list(extend_filters))
+            self._run_parallel(lambda args: created_filters.append(self._create_filter(*args)), create_filters)
+        finally:
+            # reservation of the filters not created is returned
+            self._nto_session.release_filter_memory(len(create_filters) - len(created_filters))
+        self._modify_ports(disable_ports, self._disabled_port_state())
+
+        summary = OrderedDict([("filters_created", len(create_filters)),
+                               ("filters_deleted", len(delete_filters)),
+                               ("filters_modified", len(shrink_filters) + len(extend_filters)),
+                               ("port_groups_modified", len(shrink_groups) + len(delete_groups)),
+                               ("ports_enabled", len(enable_ports) + len(enable_members)),
+                               ("ports_disabled", len(disable_ports)),
+                               ("links_unchanged", len(existing_links))])
+        self._logger.info("Topology applied in {:.2f}s, {}".format(time.time() - start_time, dict(summary)))
+        return summary
+
+    def save_snapshot(self, reservation_id):
+        """
+        Export filter and port configuration of the device to a local snapshot in one call
+        :param reservation_id: reservation id, snapshot key
+        :type reservation_id: str
+        :return: None
+        :raises Exception: if command failed
+        """
+        self._logger.info("SaveSnapshot({})".format(reservation_id))
+        with self._command_deadline("SaveSnapshot"):
+            self._save_snapshot(reservation_id)
+
+    def _save_snapshot(self, reservation_id):
+        port_list = self._get_ports()
+        request_data = {'boundary': 'INCLUDE',
+                        'export_type': 'CUSTOM',
+                        'description': 'CloudShell reservation {}'.format(reservation_id),
+                        'file_name': self._snapshots.config_path(reservation_id)}
+        request_data.update(self._snapshot_sections)
+        self._nto_session.export_config(request_data)
+        self._snapshots.save_metadata(reservation_id, {'created': time.time(),
+                                                       'sections': self._snapshot_sections,
+                                                       'inventory': self._get_inventory_signature(port_list)})
+
+    def restore_snapshot(self, reservation_id):
+        """
+        Restore configuration saved by save_snapshot with a single import
+        :param reservation_id: reservation id, snapshot key
+        :type reservation_id: str
+        :return: None
+        :raises Exception: if the snapshot does not match the device inventory or command failed
+        """
+        self._logger.info("RestoreSnapshot({})".format(reservation_id))
+        with self._command_deadline("RestoreSnapshot"):
+            self._restore_snapshot(reservation_id)
+
+    def _restore_snapshot(self, reservation_id):
+        metadata = self._snapshots.load_metadata(reservation_id)
+        if metadata.get('inventory') != self._get_inventory_signature(self._get_ports()):
+            raise Exception("Snapshot for reservation {} does not match device inventory".format(reservation_id))
+        request_data = {'boundary': 'INCLUDE',
+                        'import_type': 'CUSTOM',
+                        'file_name': self._snapshots.config_path(reservation_id)}
+        request_data.update(metadata.get('sections') or {})
+        self._nto_session.import_config(request_data)
+        if self._filter_pool:
+            self._filter_pool.reset()
+        self._get_ports()
 
     def get_attribute_value(self, cs_address, attribute_name):
         """
@@ -427,7 +1311,20 @@ class DriverCommands(DriverCommandsInterface):
                 value = session.send_command(command)
                 return AttributeValueResponseInfo(value)
         """
-        raise NotImplementedError
+        self._logger.debug("GetAttributeValue({}, {})".format(cs_address, attribute_name))
+        with self._command_deadline("GetAttributeValue"):
+            port_name = self._from_cs_port(cs_address)
+            if attribute_name == self._PORT_ATTRIBUTES.NEIGHBOR:
+                if not self._neighbors:
+                    return AttributeValueResponseInfo("NA")
+                return AttributeValueResponseInfo(self._neighbors.get(self._get_port_identifier(port_name)))
+            if attribute_name in (self._PORT_ATTRIBUTES.UTILIZATION, self._PORT_ATTRIBUTES.DROP_RATE) and \
+                    not self._stats_sampler:
+                return AttributeValueResponseInfo("NA")
+            port_data = self._port_attributes.get(port_name)
+            if attribute_name in (self._PORT_ATTRIBUTES.UTILIZATION, self._PORT_ATTRIBUTES.DROP_RATE):
+                return AttributeValueResponseInfo(self._port_stats_value(port_name, port_data, attribute_name))
+            return AttributeValueResponseInfo(self._port_attribute_value(port_data, attribute_name))
 
     def set_attribute_value(self, cs_address, attribute_name, attribute_value):
         """
@@ -448,7 +1345,20 @@ class DriverCommands(DriverCommandsInterface):
                 session.send_command(command)
                 return AttributeValueResponseInfo(attribute_value)
         """
-        raise NotImplementedError
+        self._logger.info("SetAttributeValue({}, {}, {})".format(cs_address, attribute_name, attribute_value))
+        if attribute_name != self._PORT_ATTRIBUTES.PORT_SPEED:
+            raise Exception("Attribute {} is read only".format(attribute_name))
+        mode = self._port_speed_mode(attribute_value)
+        with self._command_deadline("SetAttributeValue"):
+            port_name = self._from_cs_port(cs_address)
+            item = (self._get_port_identifier(port_name), port_name, mode)
+            if self._speed_window:
+                self._speed_window.submit(item)
+            else:
+                error = self._change_port_speeds([item])[0]
+                if error:
+                    raise error
+        return AttributeValueResponseInfo(attribute_value)
 
     def map_tap(self, src_port, dst_ports):
         """
@@ -464,7 +1374,8 @@ class DriverCommands(DriverCommandsInterface):
             return self.map_uni(src_port, dst_ports)
         """
         self._logger.info("MapTap({}->{})".format(src_port, dst_ports))
-        self.map_uni(src_port, dst_ports)
+        with self._command_deadline("MapTap"):
+            self._submit_mapping_command(self._MAPPING_COMMANDS.MAP_UNI, src_port, dst_ports)
 
     def set_speed_manual(self, src_port, dst_port, speed, duplex):
         """
@@ -477,8 +1388,239 @@ class DriverCommands(DriverCommandsInterface):
         """
         raise NotImplementedError
 
-    def _get_ports(self):
-        return self._nto_session.get_ports()
+    def _change_port_speeds(self, items):
+        """
+        One changePortSpeed call per target mode
+        :param items: list of (port identifier, port name, mode)
+        :return: list of errors, None for changed ports
+        """
+        ports_by_mode = OrderedDict()
+        for port_ident, _, mode in items:
+            ports_by_mode.setdefault(mode, [])
+            if port_ident not in ports_by_mode[mode]:
+                ports_by_mode[mode].append(port_ident)
+
+        errors = {}
+        for mode, port_idents in ports_by_mode.items():
+            try:
+                self._nto_session.change_port_speed(port_idents, mode)
+            except Exception as e:
+                self._logger.error("Failed to change speed of ports {} to {}: {}".format(port_idents, mode, e))
+                errors[mode] = e
+
+        for _, port_name, _ in items:
+            self._port_attributes.invalidate(port_name)
+        # speed modes split or merge ports
+        self._port_inventory = None
+        return [errors.get(mode) for _, _, mode in items]
+
+    def _port_speed_mode(self, speed):
+        """
+        qsfp28_port_mode of a Port Speed value, a link speed "40G" or "40000", or the mode itself "MODE_QSFP"
+        :raises Exception: if the value has no mode in ATTRIBUTES.SPEED_MODES
+        """
+        speed_modes = dict((str(key).upper(), str(mode).upper()) for key, mode in self._port_speed_modes.items())
+        value = str(speed).strip().upper()
+        if value in speed_modes.values():
+            return value
+        if value.isdigit() and int(value) % 1000 == 0 and int(value) > 0:
+            value = "{}G".format(int(value) // 1000)
+        if value not in speed_modes:
+            raise Exception("Port Speed {} is not supported, allowed values: {}".format(
+                speed, ", ".join(sorted(speed_modes, key=self._port_sort_key) + sorted(set(speed_modes.values())))))
+        return speed_modes[value]
+
+    def _port_attribute_value(self, port_data, attribute_name):
+        if attribute_name in self._TRANSCEIVER_HEADERS:
+            record = self._transceivers.get(port_data.get(self._KEYS.NAME), port_data.get(self._KEYS.DEFAULT_NAME))
+            header_prefix = self._TRANSCEIVER_HEADERS[attribute_name]
+            return next((value for header, value in sorted((record or {}).items())
+                         if header.startswith(header_prefix)), None)
+        link_settings = port_data.get(self._KEYS.LINK_SETTINGS) or ""
+        link_status = port_data.get(self._KEYS.LINK_STATUS) or {}
+        if attribute_name == self._PORT_ATTRIBUTES.PORT_SPEED:
+            return link_status.get("speed") or link_settings.split("_")[0]
+        if attribute_name == self._PORT_ATTRIBUTES.DUPLEX:
+            duplex = link_status.get("duplex") or link_settings.split("_")[-1]
+            return "3" if duplex.upper() == "FULL" else "2"
+        if attribute_name == self._PORT_ATTRIBUTES.AUTO_NEGOTIATION:
+            return str(link_settings == self._VALUES.LINK_SETTINGS_AUTO)
+        raise Exception("Attribute {} is not supported".format(attribute_name))
+
+    def _port_stats_value(self, port_name, port_data, attribute_name):
+        """
+        Utilization or drop rate of the port over the samples kept by the stats sampler
+        :return: value, "NA" until the port is sampled twice
+        """
+        port_ident = str(self._get_port_identifier(port_name))
+        if attribute_name == self._PORT_ATTRIBUTES.UTILIZATION:
+            speed = self._port_attribute_value(port_data, self._PORT_ATTRIBUTES.PORT_SPEED) or ""
+            match = re.match(r"(\d+)(G?)", str(speed).upper())
+            speeds = {port_ident: int(match.group(1)) * (1000 if match.group(2) else 1)} if match else None
+            counters = [stat_name for stat_name in self._stats_sampler.stat_names if stat_name.endswith("_bytes")]
+            value = self._stats_sampler.report(speeds, counters).get(port_ident, {}).get("utilization")
+        else:
+            value = self._stats_sampler.report().get(port_ident, {}).get(
+                DropWatchdog.DROP_STAT + StatsSampler.RATE_SUFFIX)
+        return "NA" if value is None else "{:.2f}".format(value)
+
+    def _port_sort_key(self, port_id):
+        return tuple(int(part) for part in re.findall(r"\d+", str(port_id)))
+
+    def _autoload_port_names(self):
+        """
+        Port names of AUTOLOAD.PORT_RANGES, a range is expanded when both names differ by the last number only
+        :return: list of names, None if a range cannot be expanded
+        """
+        port_names = []
+        for first_name, last_name in self._autoload_port_ranges:
+            first_match = re.match(r"(.*?)(\d+)$", first_name)
+            last_match = re.match(r"(.*?)(\d+)$", last_name)
+            if not first_match or not last_match or first_match.group(1) != last_match.group(1):
+                self._logger.debug("Port range {}..{} is not expanded to names".format(first_name, last_name))
+                return None
+            width = len(first_match.group(2))
+            port_names.extend("{}{}".format(first_match.group(1), str(number).zfill(width))
+                              for number in range(int(first_match.group(2)), int(last_match.group(2)) + 1))
+        return port_names
+
+    def _get_scoped_ports(self):
+        """
+        Ports of the autoload scope. Ports of AUTOLOAD.PORT_RANGES are searched by name with AUTOLOAD.PORT_SEARCH,
+        port properties are read for the ports in scope only
+        """
+        criteria = self._autoload_port_search or {}
+        port_names = self._autoload_port_names() if self._autoload_port_ranges else None
+        if port_names is not None:
+            def search_port(port_name):
+                request_data = dict(criteria)
+                request_data[self._KEYS.NAME] = port_name
+                return self._nto_session.search_ports(request_data) or []
+
+            port_summaries = [port_data for result in self._run_per_member(search_port, port_names)
+                              for port_data in result]
+        elif criteria:
+            port_summaries = self._nto_session.search_ports(criteria) or []
+        else:
+            port_summaries = self._nto_session.get_ports() or []
+
+        port_idents = OrderedDict()
+        for port_data in port_summaries:
+            port_name = port_data.get(self._KEYS.NAME) or ""
+            blade_id, port_id = self._parse_port_name(port_name)
+            if not blade_id or not port_id or self._in_autoload_scope(blade_id, port_id):
+                port_idents[port_name] = port_data.get(self._KEYS.IDENTIFIER)
+        properties = ",".join([self._KEYS.IDENTIFIER, self._KEYS.NAME, self._KEYS.DEFAULT_NAME,
+                               self._KEYS.LINK_SETTINGS, self._KEYS.LINK_STATUS, self._KEYS.SRC_FILTER_LIST,
+                               self._KEYS.DST_FILTER_LIST])
+
+        def get_port_properties(port_name):
+            return self._nto_session.get_port_properties(port_idents[port_name], properties)
+
+        return self._run_per_member(get_port_properties, list(port_idents))
+
+    def _get_scoped_filters(self, port_list):
+        """
+        Filters of the ports in scope, limited to AUTOLOAD.FILTER_SEARCH results if set
+        :return: filter summaries
+        """
+        filter_uuids = list(OrderedDict.fromkeys(
+            filter_uuid for port_data in port_list for filter_uuid in
+            (port_data.get(self._KEYS.DST_FILTER_LIST) or []) + (port_data.get(self._KEYS.SRC_FILTER_LIST) or [])))
+        if self._autoload_filter_search:
+            searched = set(str(filter_data.get(self._KEYS.IDENTIFIER)) for filter_data in
+                           self._nto_session.search_filters(self._autoload_filter_search) or [])
+            filter_uuids = [filter_uuid for filter_uuid in filter_uuids if str(filter_uuid) in searched]
+        return [{self._KEYS.IDENTIFIER: filter_uuid} for filter_uuid in filter_uuids]
+
+    def _in_autoload_scope(self, blade_id, port_id):
+        """
+        Check the port against AUTOLOAD.BLADES and AUTOLOAD.PORT_RANGES, [[first port name, last port name]]
+        """
+        if self._autoload_blades and blade_id not in [str(blade) for blade in self._autoload_blades]:
+            return False
+        if not self._autoload_port_ranges:
+            return True
+        port_key = self._port_sort_key(port_id)
+        for first_name, last_name in self._autoload_port_ranges:
+            first_blade, first_port = self._parse_port_name(first_name)
+            last_blade, last_port = self._parse_port_name(last_name)
+            if (first_blade == blade_id == last_blade and
+                    self._port_sort_key(first_port) <= port_key <= self._port_sort_key(last_port)):
+                return True
+        return False
+
+    def _set_port_neighbors(self, port_table):
+        try:
+            neighbors = self._neighbors.refresh(port_table.keys())
+        except Exception as e:
+            self._logger.warning("Failed to fetch port neighbors: {}".format(e))
+            return
+        for port_uuid, port in port_table.items():
+            if neighbors.get(str(port_uuid)):
+                port.attributes.append(StringAttribute(self._PORT_ATTRIBUTES.NEIGHBOR, neighbors[str(port_uuid)]))
+
+    def _get_ports(self, extra_properties=None):
+        self._port_inventory = self._nto_session.get_ports(extra_properties)
+        return self._port_inventory
+
+    def _get_port_inventory(self):
+        if self._port_inventory is None:
+            return self._get_ports()
+        return self._port_inventory
+
+    def _get_port_index(self, refresh=False):
+        """
+        Device ports by (blade_id, port_id)
+        :rtype: dict
+        """
+        port_index = {}
+        for port_info in (self._get_ports() if refresh else self._get_port_inventory()) or []:
+            port_key = self._parse_port_name(port_info.get(self._KEYS.NAME))
+            if not all(port_key):
+                port_key = self._parse_port_name(port_info.get(self._KEYS.DEFAULT_NAME) or "")
+            if all(port_key):
+                port_index[port_key] = port_info
+        return port_index
+
+    def _get_indexed_port_identifier(self, port_index, cs_port):
+        port_info = port_index.get(self._parse_port_name(self._from_cs_port(cs_port)))
+        if not port_info:
+            raise Exception("Port {} is not found on the device".format(cs_port))
+        return port_info.get(self._KEYS.IDENTIFIER)
+
+    def _is_full_device_clear(self, ports):
+        """
+        Check that requested ports cover every port of the device
+        """
+        requested_ports = set(self._parse_port_name(self._from_cs_port(port)) for port in ports)
+        device_ports = set(self._get_port_index())
+        return bool(device_ports) and device_ports.issubset(requested_ports)
+
+    def _all_filters_managed(self):
+        filter_uuids = set(f.get(self._KEYS.IDENTIFIER) for f in self._get_filters())
+        managed_uuids = set(f.get(self._KEYS.IDENTIFIER) for tag in [self._VALUES.DRIVER_TAG, self._VALUES.POOL_TAG]
+                            for f in self._nto_session.search_filters({self._KEYS.DESCRIPTION: tag}))
+        return filter_uuids.issubset(managed_uuids)
+
+    def _clear_device(self):
+        """
+        Clear all filters and ports with a single bulk action, then refresh local caches
+        :return: True if the device was cleared
+        """
+        if self._full_clear_managed_only and not self._all_filters_managed():
+            self._logger.info("Device has filters not created by the driver, bulk clear skipped")
+            return False
+        self._logger.info("Clearing all filters and ports with a bulk action")
+        self._nto_session.clear_filters_and_ports()
+        if self._filter_pool:
+            self._filter_pool.reset()
+        self._get_ports()
+        return True
+
+    def _get_inventory_signature(self, port_list):
+        return sorted([port_info.get(self._KEYS.IDENTIFIER), port_info.get(self._KEYS.NAME)]
+                      for port_info in port_list or [])
 
     def _parse_port_name(self, port_name):
         blade_id = self._VALUES.BLADE_ID
@@ -524,32 +1666,174 @@ class DriverCommands(DriverCommandsInterface):
         dst_filters = port_data.get(self._KEYS.DST_FILTER_LIST)
         return src_filters, dst_filters
 
-    def _enable_port(self, port_ident):
+    def _enable_port(self, port_ident, mode=None):
         if not port_ident:
             raise Exception('Port uuid cannot be None')
-        request_data = {self._KEYS.MODE: self._VALUES.BIDI, self._KEYS.ENABLED: True}
+        request_data = {self._KEYS.MODE: mode or self._VALUES.BIDI, self._KEYS.ENABLED: True}
         self._nto_session.modify_port(port_ident, request_data)
 
+    def _disabled_port_state(self):
+        return {self._KEYS.MODE: self._VALUES.NETWORK, self._KEYS.ENABLED: False}
+
     def _disable_port(self, port_ident):
-        request_data = {self._KEYS.MODE: self._VALUES.NETWORK, self._KEYS.ENABLED: False}
-        self._nto_session.modify_port(port_ident, request_data)
+        self._nto_session.modify_port(port_ident, self._disabled_port_state())
 
     def _disable_port_no_filters(self, port_ident):
+        if self._nto_session.port_state_holds(port_ident, self._disabled_port_state()):
+            return
         src_filters, dst_filters = self._get_port_filters(port_ident)
         if not src_filters and not dst_filters:
             self._disable_port(port_ident)
 
+    def _modify_ports(self, port_idents, request_data, return_exceptions=False):
+        """
+        Apply the same mode/enabled state to many ports, with a temporary port group when there are
+        at least BULK_PORTS.MIN_PORTS ports to change, per port requests otherwise or if the group fails
+        :return: list of errors in the order of the ports when return_exceptions is set
+        """
+        port_idents = list(port_idents)
+        pending_ports = [port_ident for port_ident in port_idents if
+                         not self._nto_session.port_state_holds(port_ident, request_data)]
+        if 0 < self._bulk_ports_min <= len(pending_ports) and not self._ifc_cluster:
+            start_time = time.time()
+            group_name = "{}{}".format(self._VALUES.BULK_GROUP_PREFIX, uuid4().hex[:8])
+            group_request_data = {self._KEYS.NAME: group_name,
+                                  self._KEYS.MODE: request_data.get(self._KEYS.MODE),
+                                  self._KEYS.TYPE: self._VALUES.AGGREGATION_GROUP_TYPE,
+                                  self._KEYS.PORT_LIST: pending_ports,
+                                  self._KEYS.DESCRIPTION: self._VALUES.DRIVER_TAG}
+            try:
+                calls = self._nto_session.modify_ports_with_group(pending_ports, request_data, group_request_data)
+                self._logger.info("Ports {} set to {} in {:.2f}s with {} calls instead of {}".format(
+                    pending_ports, request_data, time.time() - start_time, calls, len(pending_ports)))
+                return [None] * len(port_idents)
+            except NtoPortGroupNotDeleted as e:
+                self._logger.error(str(e))
+                if not return_exceptions:
+                    raise
+                return [e if port_ident in pending_ports else None for port_ident in port_idents]
+            except Exception as e:
+                self._logger.warning("Cannot use port group for ports {}: {}, modifying ports one by one".format(
+                    pending_ports, e))
+
+        def modify_port(port_ident):
+            self._nto_session.modify_port(port_ident, request_data)
+
+        start_time = time.time()
+        errors = self._run_per_member(modify_port, port_idents, return_exceptions, by_identifier=True)
+        if pending_ports:
+            self._logger.debug("Ports {} set to {} in {:.2f}s with {} calls".format(
+                pending_ports, request_data, time.time() - start_time, len(pending_ports)))
+        return errors
+
     def _get_filters(self):
         return self._nto_session.get_filters()
 
+    def _get_filters_data(self):
+        """
+        All filters with their port lists, fetched in bulk
+        """
+        properties = [self._KEYS.IDENTIFIER, self._KEYS.SRC_PORT_LIST, self._KEYS.DST_PORT_LIST, self._KEYS.MODE,
+                      self._KEYS.DESCRIPTION, self._KEYS.SRC_PORT_GROUP_LIST]
+        filters = self._nto_session.get_filters_properties(",".join(properties))
+        if all(self._KEYS.SRC_PORT_LIST in f and self._KEYS.DST_PORT_LIST in f for f in filters):
+            return filters
+        self._logger.debug("Filter properties are not supported, fetching filters one by one")
+        return self._run_parallel(lambda f: self._get_filter(f.get(self._KEYS.IDENTIFIER)), filters)
+
+    def _get_tool_ports(self):
+        """
+        :return: port identifier -> port name of the tool ports
+        """
+        return dict((port_data.get(self._KEYS.IDENTIFIER), port_data.get(self._KEYS.NAME))
+                    for port_data in self._nto_session.get_ports() or []
+                    if port_data.get(self._KEYS.MODE) == self._VALUES.TOOL)
+
+    def _get_mapped_port_idents(self):
+        """
+        Ports of the driver mapping filters
+        """
+        return set(port_ident for filter_data in self._get_filters_data()
+                   if filter_data.get(self._KEYS.DESCRIPTION) == self._VALUES.DRIVER_TAG
+                   for port_ident in (filter_data.get(self._KEYS.SRC_PORT_LIST) or []) +
+                   (filter_data.get(self._KEYS.DST_PORT_LIST) or []))
+
+    def _is_group_mapping_filter(self, filter_data):
+        """
+        PASS_ALL filter of the driver from one port group to one destination, created by aggregation
+        """
+        return (filter_data.get(self._KEYS.MODE) == self._VALUES.PASS_ALL and
+                filter_data.get(self._KEYS.DESCRIPTION) == self._VALUES.DRIVER_TAG and
+                not filter_data.get(self._KEYS.SRC_PORT_LIST) and
+                len(filter_data.get(self._KEYS.SRC_PORT_GROUP_LIST) or []) == 1 and
+                len(filter_data.get(self._KEYS.DST_PORT_LIST) or []) == 1)
+
+    def _is_mapping_filter(self, filter_data):
+        return (filter_data.get(self._KEYS.MODE) == self._VALUES.PASS_ALL and
+                len(filter_data.get(self._KEYS.SRC_PORT_LIST) or []) == 1 and
+                bool(filter_data.get(self._KEYS.DST_PORT_LIST)))
+
     def _get_filter(self, uuid):
         return self._nto_session.get_filter(uuid)
 
-    def _create_filter(self, src_ident, dst_ident):
+    def _create_filter(self, src_ident, dst_idents):
+        """
+        Create PASS_ALL filter
+        :return: created filter identifier, if reported by the device
+        """
         request_data = {self._KEYS.SRC_PORT_LIST: [src_ident],
-                        self._KEYS.DST_PORT_LIST: [dst_ident],
-                        self._KEYS.MODE: self._VALUES.PASS_ALL}
-        self._nto_session.create_filter(request_data)
+                        self._KEYS.DST_PORT_LIST: list(dst_idents),
+                        self._KEYS.MODE: self._VALUES.PASS_ALL,
+                        self._KEYS.DESCRIPTION: self._VALUES.DRIVER_TAG}
+        filter_uuid = self._filter_pool.acquire() if self._filter_pool else None
+        if filter_uuid is not None:
+            try:
+                self._nto_session.modify_filter(filter_uuid, request_data)
+                return filter_uuid
+            except Exception as e:
+                self._logger.warning("Pooled filter {} cannot be reused: {}".format(filter_uuid, e))
+        response = self._nto_session.create_filter(request_data)
+        if isinstance(response, dict):
+            return response.get(self._KEYS.IDENTIFIER) or response.get(self._DEFAULT_KEYS.IDENTIFIER)
+
+    def _idle_filter_data(self):
+        return {self._KEYS.SRC_PORT_LIST: [],
+                self._KEYS.DST_PORT_LIST: [],
+                self._KEYS.MODE: self._VALUES.DENY_ALL,
+                self._KEYS.DESCRIPTION: self._VALUES.POOL_TAG}
+
+    def _create_idle_filter(self):
+        response = self._nto_session.create_filter(self._idle_filter_data())
+        if isinstance(response, dict):
+            return response.get(self._KEYS.IDENTIFIER) or response.get(self._DEFAULT_KEYS.IDENTIFIER)
+
+    def _discover_idle_filters(self):
+        return [f.get(self._KEYS.IDENTIFIER) for f in self._nto_session.search_filters(
+            {self._KEYS.DESCRIPTION: self._VALUES.POOL_TAG})]
+
+    def _retire_filter(self, filter_uuid, filter_data=None):
+        """
+        Return a driver filter to the pool, other filters or filters above the high watermark are deleted.
+        Filter memory is released for driver mapping filters only, other filters were never reserved
+        :param filter_data: filter properties, None for a filter created by the driver
+        """
+        is_reserved = filter_data is None or filter_data.get(self._KEYS.DESCRIPTION) == self._VALUES.DRIVER_TAG
+        is_poolable = is_reserved and not (filter_data or {}).get(self._KEYS.SRC_PORT_GROUP_LIST)
+        if self._filter_pool and is_poolable and self._filter_pool.accepts():
+            self._nto_session.modify_filter(filter_uuid, self._idle_filter_data())
+            self._nto_session.release_filter_memory(1)
+            self._filter_pool.put(filter_uuid)
+            return
+        self._nto_session.delete_filter(filter_uuid)
+        if is_reserved:
+            self._nto_session.release_filter_memory(1)
+
+    def _delete_reserved_filter(self, filter_uuid):
+        """
+        Delete a filter created by the driver which is not returned to the pool, e.g. a port group filter
+        """
+        self._nto_session.delete_filter(filter_uuid)
+        self._nto_session.release_filter_memory(1)
 
     def _get_filter_ports(self, filter_uuid):
         filter_data = self._get_filter(filter_uuid)
@@ -561,3 +1845,584 @@ class DriverCommands(DriverCommandsInterface):
         src_ports, dst_ports = self._get_filter_ports(filter_uuid)
         self._nto_session.delete_filter(filter_uuid)
         map(lambda uuid: self._disable_port_no_filters(uuid), src_ports + dst_ports)
+
+    def _run_parallel(self, func, items, return_exceptions=False):
+        return run_parallel(func, items, self._max_workers, return_exceptions)
+
+    def _run_per_member(self, func, port_items, return_exceptions=False, by_identifier=False):
+        """
+        _run_parallel over ports, in cluster mode concurrent calls of every cluster member are limited
+        :param port_items: port names, port identifiers if by_identifier
+        """
+        if not self._ifc_cluster:
+            return self._run_parallel(func, port_items, return_exceptions)
+        if self._port_members is None:
+            self._refresh_port_members()
+        port_names = {}
+        if by_identifier:
+            port_names = dict((str(port_data.get(self._KEYS.IDENTIFIER)), port_data.get(self._KEYS.NAME))
+                              for port_data in self._get_port_inventory() or [])
+
+        def member_of(port_item):
+            port_name = port_names.get(str(port_item)) or str(port_item)
+            return (self._port_members.get(str(port_item)) or self._port_members.get(port_name) or
+                    self._parse_port_name(port_name)[0])
+
+        return run_partitioned(func, port_items, member_of, self._max_workers, self._member_workers(),
+                               return_exceptions)
+
+    def _get_cte_members(self):
+        """
+        :return: identifiers of the cluster members
+        """
+        if self._cte_members is None:
+            self._cte_members = [member.get(self._KEYS.IDENTIFIER)
+                                 for member in self._nto_session.get_cte_members() or []]
+            self._logger.debug("Cluster members: {}".format(self._cte_members))
+        return self._cte_members
+
+    def _member_workers(self):
+        """
+        CLUSTER.MEMBER_CONCURRENCY, the workers shared equally by the cluster members if not set
+        """
+        if self._member_concurrency > 0:
+            return self._member_concurrency
+        return max(1, self._max_workers // max(1, len(self._get_cte_members())))
+
+    def _fetch_per_member(self, search, criteria=None, members=None):
+        """
+        Cluster objects fetched with one search per member, the members are searched concurrently
+        :param search: search_ports or search_filters of the session
+        :param criteria: search criteria added to the member criteria
+        :param members: dict filled with object identifier -> member identifier
+        :return: search summaries of all members merged by identifier, None if the members cannot be searched
+        """
+        member_uuids = self._get_cte_members()
+        if not member_uuids:
+            return None
+
+        def search_member(member_uuid):
+            request_data = dict(criteria or {})
+            request_data[self._member_key] = member_uuid
+            return search(request_data) or []
+
+        try:
+            member_results = run_partitioned(search_member, member_uuids, str, self._max_workers,
+                                             self._member_workers())
+        except Exception as e:
+            self._logger.warning("Cluster members cannot be searched by {}, fetching from the cluster: {}".format(
+                self._member_key, e))
+            return None
+        merged = OrderedDict()
+        for member_uuid, objects in zip(member_uuids, member_results):
+            for object_data in objects:
+                object_ident = str(object_data.get(self._KEYS.IDENTIFIER))
+                merged.setdefault(object_ident, object_data)
+                if members is not None:
+                    members.setdefault(object_ident, member_uuid)
+        return list(merged.values())
+
+    def _refresh_port_members(self):
+        """
+        Record the member of every cluster port for _run_per_member, the ports are searched per member
+        """
+        port_members = {}
+        port_list = self._fetch_per_member(self._nto_session.search_ports, None, port_members)
+        self._port_members = {}
+        for port_data in port_list or []:
+            port_ident = str(port_data.get(self._KEYS.IDENTIFIER))
+            self._port_members[port_ident] = port_members[port_ident]
+            if port_data.get(self._KEYS.NAME):
+                self._port_members[port_data.get(self._KEYS.NAME)] = port_members[port_ident]
+
+    def _teardown_ports(self, port_names):
+        """
+        Set based teardown, every filter touching the ports is processed once, concurrently,
+        ports left without filters are disabled in one final pass
+        """
+        start_time = time.time()
+        port_data_list = self._run_per_member(self._get_port_data, port_names)
+
+        delete_filters = set()
+        detach_filters = {}
+        cleared_ports = set()
+        group_members = {}
+        for port_data in port_data_list:
+            port_ident = port_data.get(self._KEYS.IDENTIFIER)
+            cleared_ports.add(port_ident)
+            delete_filters.update(port_data.get(self._KEYS.DST_FILTER_LIST) or [])
+            for filter_uuid in port_data.get(self._KEYS.SRC_FILTER_LIST) or []:
+                detach_filters.setdefault(filter_uuid, set()).add(port_ident)
+            port_group_id = port_data.get(self._KEYS.PORT_GROUP_ID)
+            if port_group_id is not None and not self._ifc_cluster:
+                group_members.setdefault(port_group_id, set()).add(port_ident)
+
+        port_groups = self._get_aggregation_groups(list(group_members))
+        modify_groups = {}
+        affected_ports = set()
+        for port_group_id, group_data in port_groups.items():
+            affected_ports.update(group_members[port_group_id])
+            remaining_ports = [uuid for uuid in group_data.get(self._KEYS.PORT_LIST) or []
+                               if uuid not in group_members[port_group_id]]
+            if remaining_ports:
+                modify_groups[port_group_id] = remaining_ports
+            else:
+                delete_filters.update(group_data.get(self._KEYS.DST_FILTER_LIST) or [])
+
+        filter_uuids = list(delete_filters | set(detach_filters))
+        if not filter_uuids and not modify_groups:
+            return
+        filter_table = dict(zip(filter_uuids, self._run_parallel(self._get_filter, filter_uuids)))
+
+        modify_filters = {}
+        for filter_uuid in filter_uuids:
+            src_ports = filter_table[filter_uuid].get(self._KEYS.SRC_PORT_LIST) or []
+            dst_ports = filter_table[filter_uuid].get(self._KEYS.DST_PORT_LIST) or []
+            if filter_uuid not in delete_filters:
+                remaining_dst_ports = [uuid for uuid in dst_ports if uuid not in detach_filters[filter_uuid]]
+                if remaining_dst_ports:
+                    modify_filters[filter_uuid] = remaining_dst_ports
+                    affected_ports.update(detach_filters[filter_uuid])
+                    continue
+                delete_filters.add(filter_uuid)
+            affected_ports.update(src_ports + dst_ports)
+
+        delete_groups = set(port_group_id for filter_uuid in delete_filters
+                            for port_group_id in filter_table[filter_uuid].get(self._KEYS.SRC_PORT_GROUP_LIST) or [])
+        port_groups.update(self._get_aggregation_groups([uuid for uuid in delete_groups if uuid not in port_groups]))
+        delete_groups = [uuid for uuid in delete_groups if uuid in port_groups]
+        for port_group_id in delete_groups:
+            affected_ports.update(port_groups[port_group_id].get(self._KEYS.PORT_LIST) or [])
+            modify_groups.pop(port_group_id, None)
+
+        self._run_parallel(lambda uuid: self._retire_filter(uuid, filter_table[uuid]), list(delete_filters))
+        self._run_parallel(self._nto_session.delete_port_group, delete_groups)
+        self._run_parallel(lambda uuid: self._nto_session.modify_port_group(
+            uuid, {self._KEYS.PORT_LIST: modify_groups[uuid]}), list(modify_groups))
+        self._run_parallel(lambda uuid: self._nto_session.modify_filter(
+            uuid, {self._KEYS.DST_PORT_LIST: modify_filters[uuid]}), list(modify_filters))
+
+        self._modify_ports(affected_ports & cleared_ports, self._disabled_port_state())
+        self._run_per_member(self._disable_port_no_filters, list(affected_ports - cleared_ports), by_identifier=True)
+        self._logger.info("Teardown completed in {:.2f}s, filters deleted: {}, filters modified: {}, "
+                          "ports affected: {}".format(time.time() - start_time, len(delete_filters),
+                                                      len(modify_filters), len(affected_ports)))
+
+    def _submit_mapping_command(self, command_name, src_port, dst_ports):
+        command = (command_name, src_port, list(dst_ports))
+        if self._mapping_window:
+            self._mapping_window.submit(command)
+            return
+        error = self._apply_mapping_commands([command])[0]
+        if error is not None:
+            raise error
+
+    def _apply_mapping_commands(self, commands):
+        """
+        Apply mapping commands, several commands are coalesced into one batch
+        :param commands: list of (command_name, src_port, dst_ports)
+        :return: list of errors in the order of the commands, None for succeeded commands
+        """
+        if len(commands) == 1:
+            command_name, src_port, dst_ports = commands[0]
+            try:
+                if command_name == self._MAPPING_COMMANDS.MAP_BIDI:
+                    self._map_bidi(src_port, dst_ports[0])
+                elif command_name == self._MAPPING_COMMANDS.MAP_UNI:
+                    self._map_uni(src_port, dst_ports)
+                else:
+                    self._map_clear_to(src_port, dst_ports)
+            except Exception as e:
+                return [e]
+            return [None]
+        return self._apply_mapping_batch(commands)
+
+    def _net_links(self, commands):
+        """
+        Net state of every link touched by the commands, later commands override earlier ones
+        :return: OrderedDict (src_port_name, dst_port_name) -> [is_mapped, set of command indexes]
+        """
+        links = OrderedDict()
+        cancelled = 0
+        for index, (command_name, src_port, dst_ports) in enumerate(commands):
+            src_port_name = self._from_cs_port(src_port)
+            dst_port_names = [self._from_cs_port(port) for port in dst_ports]
+            pairs = [(src_port_name, port_name) for port_name in dst_port_names]
+            if command_name == self._MAPPING_COMMANDS.MAP_BIDI:
+                pairs.append((dst_port_names[0], src_port_name))
+            is_mapped = command_name != self._MAPPING_COMMANDS.MAP_CLEAR_TO
+            for pair in pairs:
+                link = links.setdefault(pair, [is_mapped, set()])
+                if link[0] != is_mapped:
+                    cancelled += 1
+                link[0] = is_mapped
+                link[1].add(index)
+        if cancelled:
+            self._logger.info("Coalescing cancelled {} opposite link operations".format(cancelled))
+        return links
+
+    def _apply_mapping_batch(self, commands):
+        self._logger.info("Applying {} coalesced mapping commands".format(len(commands)))
+        errors = [None] * len(commands)
+        links = self._net_links(commands)
+
+        clear_groups = OrderedDict()
+        map_groups = OrderedDict()
+        group_commands = {}
+        for (src_port_name, dst_port_name), (is_mapped, indexes) in links.items():
+            groups = map_groups if is_mapped else clear_groups
+            groups.setdefault(src_port_name, []).append(dst_port_name)
+            group_commands.setdefault((is_mapped, src_port_name), set()).update(indexes)
+
+        # sources mapped by the same command, e.g. both directions of MapBidi, succeed or fail together
+        command_groups = {}
+        for (is_mapped, src_port_name), indexes in group_commands.items():
+            if is_mapped and src_port_name in map_groups:
+                for index in indexes:
+                    command_groups.setdefault(index, set()).add(src_port_name)
+
+        group_errors = {}
+        for src_port_name, dst_port_names in clear_groups.items():
+            try:
+                self._clear_links(src_port_name, dst_port_names)
+            except Exception as e:
+                group_errors[(False, src_port_name)] = e
+        for src_port_name, error in self._map_links(map_groups, list(command_groups.values())).items():
+            group_errors[(True, src_port_name)] = error
+
+        for group, error in group_errors.items():
+            for index in group_commands[group]:
+                if errors[index] is None:
+                    errors[index] = error
+        return errors
+
+    def _map_links(self, map_groups, linked_sources=None):
+        """
+        Create mappings for several sources, every port is read and enabled once
+        :param map_groups: OrderedDict src_port_name -> list of dst_port_names
+        :param linked_sources: list of sets of src_port_names mapped together, rolled back when one of them fails
+        :return: dict src_port_name -> error, for failed sources
+        """
+        filter_counts = dict((src_port_name, 1 if self._multi_dest_filters else len(dst_port_names))
+                             for src_port_name, dst_port_names in map_groups.items())
+        rejected_groups = {}
+        for src_port_name in map_groups:
+            try:
+                self._nto_session.reserve_filter_memory(filter_counts[src_port_name])
+            except FilterMemoryException as e:
+                self._logger.error("Mapping from {} rejected: {}".format(src_port_name, e))
+                rejected_groups[src_port_name] = e
+        map_groups = OrderedDict((src_port_name, dst_port_names) for src_port_name, dst_port_names in
+                                 map_groups.items() if src_port_name not in rejected_groups)
+
+        port_names = list(OrderedDict.fromkeys(
+            [name for src_port_name, dst_port_names in map_groups.items() for name in [src_port_name] + dst_port_names]))
+        port_data_table = dict(zip(port_names, self._run_per_member(self._get_port_data, port_names,
+                                                                    return_exceptions=True)))
+        port_errors = dict((name, data) for name, data in port_data_table.items() if isinstance(data, Exception))
+        aggregated = set()
+        for src_port_name, dst_port_names in map_groups.items():
+            if src_port_name not in port_errors:
+                try:
+                    if self._aggregates(port_data_table[src_port_name], len(dst_port_names)):
+                        aggregated.add(src_port_name)
+                except Exception as e:
+                    port_errors[src_port_name] = e
+        port_names = [name for name in port_names if name not in port_errors]
+        port_modes = dict((name, self._VALUES.NETWORK if name in aggregated else self._VALUES.BIDI)
+                          for name in port_names)
+        for mode in set(port_modes.values()):
+            mode_port_names = [name for name in port_names if port_modes[name] == mode]
+            port_errors.update(zip(mode_port_names, self._modify_ports(
+                [port_data_table[name].get(self._KEYS.IDENTIFIER) for name in mode_port_names],
+                {self._KEYS.MODE: mode, self._KEYS.ENABLED: True}, return_exceptions=True)))
+
+        plans = {}
+
+        def map_group(src_port_name):
+            dst_port_names = map_groups[src_port_name]
+            for name in [src_port_name] + dst_port_names:
+                if port_errors.get(name) is not None:
+                    self._nto_session.release_filter_memory(filter_counts[src_port_name])
+                    raise port_errors[name]
+            src_port_data = port_data_table[src_port_name]
+            dst_port_idents = [port_data_table[name].get(self._KEYS.IDENTIFIER) for name in dst_port_names]
+            plan = self._create_plan()
+            if src_port_name in aggregated:
+                for dst_port_ident in dst_port_idents:
+                    self._plan_aggregation(plan, src_port_data, dst_port_ident, [])
+            elif self._multi_dest_filters:
+                self._plan_multi_dest_filter(plan, src_port_data, dst_port_idents, [])
+            else:
+                for dst_port_ident in dst_port_idents:
+                    self._plan_create_filter(plan, src_port_data.get(self._KEYS.IDENTIFIER), [dst_port_ident], [])
+            self._execute_plan(plan, filter_counts[src_port_name])
+            plans[src_port_name] = plan
+
+        src_port_names = list(map_groups)
+        # aggregation groups are looked up while planning, sources of the same destination are planned in turn
+        group_errors = dict((name, error) for name, error in zip(src_port_names, run_parallel(
+            map_group, src_port_names, 1 if aggregated else self._max_workers, return_exceptions=True)) if error)
+        self._rollback_linked_sources(plans, group_errors, linked_sources or [])
+
+        mapped_ports = set(name for src_port_name, dst_port_names in map_groups.items()
+                           if src_port_name not in group_errors for name in [src_port_name] + dst_port_names)
+        for name in port_names:
+            if name not in mapped_ports and port_errors.get(name) is None:
+                port_data = port_data_table[name]
+                try:
+                    self._restore_port_state(port_data.get(self._KEYS.IDENTIFIER),
+                                             {self._KEYS.MODE: port_data.get(self._KEYS.MODE),
+                                              self._KEYS.ENABLED: port_data.get(self._KEYS.ENABLED)})
+                except Exception as e:
+                    self._logger.error("Cannot restore state of port {}: {}".format(name, e))
+        group_errors.update(rejected_groups)
+        return group_errors
+
+    def _rollback_linked_sources(self, plans, group_errors, linked_sources):
+        """
+        Roll back mapped sources linked to a failed source, they get the error of the failed source
+        """
+        rolled_back = True
+        while rolled_back:
+            rolled_back = False
+            for src_port_names in linked_sources:
+                error = next((group_errors[name] for name in src_port_names if name in group_errors), None)
+                if error is None:
+                    continue
+                for src_port_name in src_port_names:
+                    if src_port_name in group_errors or src_port_name not in plans:
+                        continue
+                    self._logger.error("Rolling back mapping from {}, a linked mapping failed: {}".format(
+                        src_port_name, error))
+                    plans.pop(src_port_name).rollback()
+                    group_errors[src_port_name] = error
+                    rolled_back = True
+
+    def _create_plan(self):
+        return MappingPlan(self._logger, self._max_workers)
+
+    def _execute_plan(self, plan, reserved=None):
+        """
+        Execute the plan, filter memory for the filters it creates is reserved first
+        :param reserved: number of filters already reserved by the caller, released if not created
+        """
+        create_operations = [operation for operation in plan.operations if
+                             operation.kind == self._CREATE_FILTER_KIND]
+        if reserved is None:
+            reserved = len(create_operations)
+            self._nto_session.reserve_filter_memory(reserved)
+        try:
+            plan.execute()
+        finally:
+            self._nto_session.release_filter_memory(
+                reserved - len([operation for operation in create_operations if operation.result is not None]))
+
+    def _plan_enable_port(self, plan, port_data, mode=None):
+        port_ident = port_data.get(self._KEYS.IDENTIFIER)
+        previous_state = {self._KEYS.MODE: port_data.get(self._KEYS.MODE),
+                          self._KEYS.ENABLED: port_data.get(self._KEYS.ENABLED)}
+        return plan.add("enable port {}".format(port_ident),
+                        lambda: self._enable_port(port_ident, mode),
+                        lambda result: self._restore_port_state(port_ident, previous_state))
+
+    def _plan_create_filter(self, plan, src_ident, dst_idents, depends_on):
+        return plan.add("create filter {}->{}".format(src_ident, dst_idents),
+                        lambda: self._create_filter(src_ident, dst_idents),
+                        lambda filter_uuid: self._delete_created_filter(filter_uuid, src_ident, dst_idents),
+                        depends_on, self._CREATE_FILTER_KIND)
+
+    def _plan_multi_dest_filter(self, plan, src_port_data, dst_idents, depends_on):
+        """
+        Map source to all destinations with a single filter, extending an existing
+        PASS_ALL filter of the source port created by the driver when there is one
+        """
+        src_port_ident = src_port_data.get(self._KEYS.IDENTIFIER)
+        for filter_uuid in src_port_data.get(self._KEYS.DST_FILTER_LIST) or []:
+            filter_data = self._get_filter(filter_uuid)
+            if (filter_data.get(self._KEYS.SRC_PORT_LIST) == [src_port_ident] and
+                    filter_data.get(self._KEYS.MODE) == self._VALUES.PASS_ALL and
+                    filter_data.get(self._KEYS.DESCRIPTION) == self._VALUES.DRIVER_TAG):
+                filter_dst_ports = filter_data.get(self._KEYS.DST_PORT_LIST) or []
+                return plan.add("extend filter {} with {}".format(filter_uuid, dst_idents),
+                                lambda: self._extend_filter(filter_uuid, filter_dst_ports, dst_idents),
+                                lambda extended: extended and self._nto_session.modify_filter(
+                                    filter_uuid, {self._KEYS.DST_PORT_LIST: filter_dst_ports}),
+                                depends_on)
+        return self._plan_create_filter(plan, src_port_ident, dst_idents, depends_on)
+
+    def _use_aggregation(self):
+        return bool(self._aggregation) and not self._ifc_cluster
+
+    def _aggregates(self, src_port_data, dst_count):
+        """
+        Check that the source is mapped through an aggregation port group. A port belongs to one port group only,
+        a source with several destinations is mapped with filters
+        :raises Exception: if the source is a port group member mapped to several destinations
+            or a BIDIRECTIONAL port receiving traffic, which cannot become a NETWORK port
+        """
+        if not self._use_aggregation():
+            return False
+        src_port_ident = src_port_data.get(self._KEYS.IDENTIFIER)
+        if dst_count != 1:
+            if src_port_data.get(self._KEYS.PORT_GROUP_ID) is not None:
+                raise Exception("Port {} is a member of port group {}, cannot be mapped to {} destinations".format(
+                    src_port_ident, src_port_data.get(self._KEYS.PORT_GROUP_ID), dst_count))
+            return False
+        if src_port_data.get(self._KEYS.MODE) == self._VALUES.BIDI and src_port_data.get(self._KEYS.SRC_FILTER_LIST):
+            raise Exception("Port {} is a BIDIRECTIONAL destination of filters {}, cannot be aggregated".format(
+                src_port_ident, src_port_data.get(self._KEYS.SRC_FILTER_LIST)))
+        return True
+
+    def _aggregation_group_name(self, dst_ident):
+        return "{}{}".format(self._VALUES.AGGREGATION_GROUP_PREFIX, dst_ident)
+
+    def _get_aggregation_groups(self, port_group_ids):
+        """
+        Port groups created by the driver
+        :return: dict port_group_id -> port group data
+        """
+        group_data_list = self._run_parallel(self._nto_session.get_port_group, port_group_ids)
+        return dict((port_group_id, group_data) for port_group_id, group_data in zip(port_group_ids, group_data_list)
+                    if group_data.get(self._KEYS.DESCRIPTION) == self._VALUES.DRIVER_TAG)
+
+    def _plan_aggregation(self, plan, src_port_data, dst_ident, depends_on):
+        """
+        Map the source to the destination through the aggregation port group of the destination,
+        the group feeds the destination with a single filter
+        """
+        src_port_ident = src_port_data.get(self._KEYS.IDENTIFIER)
+        group_name = self._aggregation_group_name(dst_ident)
+        groups = self._nto_session.search_port_groups({self._KEYS.NAME: group_name})
+        port_group_id = groups[0].get(self._KEYS.IDENTIFIER) if groups else None
+        src_port_group_id = src_port_data.get(self._KEYS.PORT_GROUP_ID)
+        if src_port_group_id is not None and str(src_port_group_id) != str(port_group_id):
+            raise Exception("Port {} is a member of port group {}, a port belongs to one port group only, "
+                            "cannot be aggregated to {}".format(src_port_ident, src_port_group_id, group_name))
+
+        if port_group_id is not None:
+            return plan.add("add port {} to group {}".format(src_port_ident, group_name),
+                            lambda: self._extend_port_group(port_group_id, [src_port_ident]),
+                            lambda added: self._shrink_port_group(port_group_id, added),
+                            depends_on)
+
+        group_operation = plan.add("create port group {}".format(group_name),
+                                   lambda: self._create_aggregation_group(group_name, [src_port_ident]),
+                                   lambda uuid: uuid is not None and self._nto_session.delete_port_group(uuid),
+                                   depends_on)
+        return plan.add("create filter {}->{}".format(group_name, [dst_ident]),
+                        lambda: self._create_group_filter(group_operation.result, dst_ident),
+                        lambda uuid: uuid is not None and self._delete_reserved_filter(uuid),
+                        [group_operation], self._CREATE_FILTER_KIND)
+
+    def _create_aggregation_group(self, group_name, port_idents):
+        request_data = {self._KEYS.NAME: group_name,
+                        self._KEYS.MODE: self._VALUES.NETWORK,
+                        self._KEYS.TYPE: self._VALUES.AGGREGATION_GROUP_TYPE,
+                        self._KEYS.PORT_LIST: list(port_idents),
+                        self._KEYS.DESCRIPTION: self._VALUES.DRIVER_TAG}
+        response = self._nto_session.create_port_group(request_data)
+        if isinstance(response, dict):
+            return response.get(self._KEYS.IDENTIFIER)
+
+    def _create_group_filter(self, port_group_id, dst_ident):
+        if port_group_id is None:
+            raise Exception("Port group identifier is not reported by the device")
+        request_data = {self._KEYS.SRC_PORT_GROUP_LIST: [port_group_id],
+                        self._KEYS.DST_PORT_LIST: [dst_ident],
+                        self._KEYS.MODE: self._VALUES.PASS_ALL,
+                        self._KEYS.DESCRIPTION: self._VALUES.DRIVER_TAG}
+        response = self._nto_session.create_filter(request_data)
+        if isinstance(response, dict):
+            return response.get(self._KEYS.IDENTIFIER)
+
+    def _extend_port_group(self, port_group_id, port_idents):
+        """
+        Add ports to the current member list of the group
+        :return: added ports
+        """
+        port_list = self._nto_session.get_port_group(port_group_id).get(self._KEYS.PORT_LIST) or []
+        added_ports = [uuid for uuid in port_idents if uuid not in port_list]
+        if added_ports:
+            self._nto_session.modify_port_group(port_group_id, {self._KEYS.PORT_LIST: port_list + added_ports})
+        return added_ports
+
+    def _shrink_port_group(self, port_group_id, port_idents):
+        """
+        Remove ports from the current member list of the group, members added meanwhile are kept
+        """
+        if not port_idents:
+            return
+        port_list = self._nto_session.get_port_group(port_group_id).get(self._KEYS.PORT_LIST) or []
+        self._nto_session.modify_port_group(port_group_id, {
+            self._KEYS.PORT_LIST: [uuid for uuid in port_list if uuid not in port_idents]})
+
+    def _detach_group_member(self, port_group_id, src_ident, dst_idents):
+        """
+        Remove the source from the aggregation group feeding the destinations,
+        the group and its filter are deleted with the last member
+        """
+        group_data = self._get_aggregation_groups([port_group_id]).get(port_group_id)
+        if not group_data:
+            return
+        filter_uuids = group_data.get(self._KEYS.DST_FILTER_LIST) or []
+        filter_dst_ports = [uuid for filter_uuid in filter_uuids
+                            for uuid in self._get_filter(filter_uuid).get(self._KEYS.DST_PORT_LIST) or []]
+        if not any(uuid in filter_dst_ports for uuid in dst_idents):
+            return
+        remaining_ports = [uuid for uuid in group_data.get(self._KEYS.PORT_LIST) or [] if uuid != src_ident]
+        if remaining_ports:
+            self._nto_session.modify_port_group(port_group_id, {self._KEYS.PORT_LIST: remaining_ports})
+            self._disable_port_no_filters(src_ident)
+            return
+        self._run_parallel(lambda uuid: self._retire_filter(uuid, self._get_filter(uuid)), filter_uuids)
+        self._nto_session.delete_port_group(port_group_id)
+        map(lambda uuid: self._disable_port_no_filters(uuid), [src_ident] + filter_dst_ports)
+
+    def _restore_port_state(self, port_ident, previous_state):
+        if None in previous_state.values():
+            self._disable_port_no_filters(port_ident)
+        else:
+            self._nto_session.modify_port(port_ident, previous_state)
+
+    def _delete_created_filter(self, filter_uuid, src_ident, dst_idents):
+        if filter_uuid is None:
+            filter_uuid = self._find_filter(src_ident, dst_idents)
+        if filter_uuid is not None:
+            self._retire_filter(filter_uuid)
+
+    def _find_filter(self, src_ident, dst_idents):
+        for filter_uuid in self._get_port_data(src_ident).get(self._KEYS.DST_FILTER_LIST) or []:
+            src_ports, dst_ports = self._get_filter_ports(filter_uuid)
+            if src_ports == [src_ident] and dst_ports == list(dst_idents):
+                return filter_uuid
+
+    def _extend_filter(self, filter_uuid, filter_dst_ports, dst_idents):
+        """
+        :return: True if the filter was modified
+        """
+        new_dst_ports = list(filter_dst_ports) + [uuid for uuid in dst_idents if uuid not in filter_dst_ports]
+        if new_dst_ports == list(filter_dst_ports):
+            return False
+        self._nto_session.modify_filter(filter_uuid, {self._KEYS.DST_PORT_LIST: new_dst_ports})
+        return True
+
+    def _detach_filter_destinations(self, filter_uuid, dst_idents, src_ports=None, dst_ports=None,
+                                    filter_data=None):
+        """
+        Remove destinations from a filter, the filter is retired when no destinations left
+        """
+        if src_ports is None or dst_ports is None:
+            filter_data = self._get_filter(filter_uuid)
+            src_ports = filter_data.get(self._KEYS.SRC_PORT_LIST) or []
+            dst_ports = filter_data.get(self._KEYS.DST_PORT_LIST) or []
+        remaining_dst_ports = [uuid for uuid in dst_ports if uuid not in dst_idents]
+        if not remaining_dst_ports:
+            self._retire_filter(filter_uuid, filter_data)
+            map(lambda uuid: self._disable_port_no_filters(uuid), src_ports + dst_ports)
+            return
+        if len(remaining_dst_ports) == len(dst_ports):
+            return
+        self._nto_session.modify_filter(filter_uuid, {self._KEYS.DST_PORT_LIST: remaining_dst_ports})
+        map(lambda uuid: self._disable_port_no_filters(uuid),
+            [uuid for uuid in dst_ports if uuid not in remaining_dst_ports])
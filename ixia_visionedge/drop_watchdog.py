@@ -0,0 +1,63 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import json
+import os
+import time
+
+from ixia_visionedge.stats_sampler import StatsSampler
+
+
+class DropWatchdog(StatsSampler):
+    """
+    Polls overflow drop counters of all tool ports with one getStats call per interval,
+    drop increases are appended to the report file and optionally reset with one resetDrops call
+    """
+    DROP_STAT = "tp_total_drop_count_packets"
+
+    def __init__(self, fetch, get_tool_ports, reset_drops, report_path, interval, logger):
+        """
+        :param fetch: callable with stat names and port identifiers, returns stats_snapshot records
+        :param get_tool_ports: callable returning port identifier -> port name of the tool ports
+        :param reset_drops: callable with port identifiers, None to keep the counters
+        :param report_path: report file, JSON record per line
+        :param interval: polling interval, seconds
+        """
+        super(DropWatchdog, self).__init__(fetch, [self.DROP_STAT], self._get_tool_port_idents, 2, interval, logger)
+        self._get_tool_ports = get_tool_ports
+        self._reset_drops = reset_drops
+        self._report_path = report_path
+        self._port_names = {}
+
+    def _get_tool_port_idents(self):
+        self._port_names = dict((str(port_ident), port_name)
+                                for port_ident, port_name in (self._get_tool_ports() or {}).items())
+        return self._port_names.keys()
+
+    def sample(self):
+        ring = super(DropWatchdog, self).sample()
+        deltas = ring.deltas(self.DROP_STAT, 1) if ring else None
+        if deltas is None:
+            return ring
+        drops = [(port_ident, int(delta)) for port_ident, delta in zip(ring.port_idents, deltas) if delta > 0]
+        if drops:
+            self._report(drops)
+            if self._reset_drops:
+                reset_idents = [port_ident for port_ident, _ in drops]
+                self._reset_drops(reset_idents)
+                with self._lock:
+                    if self._ring is ring:
+                        ring.zero(self.DROP_STAT, reset_idents)
+        return ring
+
+    def _report(self, drops):
+        report_dir = os.path.dirname(self._report_path)
+        if report_dir and not os.path.isdir(report_dir):
+            os.makedirs(report_dir)
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        with open(self._report_path, "a") as report_file:
+            for port_ident, delta in drops:
+                report_file.write(json.dumps({"time": timestamp, "port": port_ident,
+                                              "name": self._port_names.get(port_ident), "drops": delta}) + "\n")
+        self._logger.warning("Overflow drops on {} tool ports: {}".format(
+            len(drops), ", ".join("{} +{}".format(self._port_names.get(port_ident) or port_ident, delta)
+                                  for port_ident, delta in drops)))
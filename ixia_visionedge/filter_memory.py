@@ -0,0 +1,72 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import time
+from threading import Lock
+
+
+class FilterMemoryException(Exception):
+    pass
+
+
+class FilterMemoryModel(object):
+    """
+    Predicts dynamic filter memory usage from getMemoryMeters data. The meters are cached
+    and the estimate is adjusted by the filters created and deleted by the driver until the next refresh.
+    The most loaded line card is used, filters are not bound to a line card in advance.
+    """
+    FILTER_MEMORY_TYPES = ("DYNAMIC_FILTER_NON_IP", "DYNAMIC_FILTER_IP")
+
+    def __init__(self, threshold, filter_cost, ttl):
+        """
+        :param threshold: max allowed allocation, percent
+        :param filter_cost: predicted allocation of one filter, percent
+        :param ttl: meters refresh interval, seconds
+        """
+        self._threshold = threshold
+        self._filter_cost = filter_cost
+        self._ttl = ttl
+        self._lock = Lock()
+        self._allocated = None
+        self._updated = 0
+
+    def _allocation(self, meters):
+        return max([meter.get("alloc_pcnt") or 0
+                    for unit in meters or []
+                    for memory in unit.get("memory_meters") or []
+                    if memory.get("memory_type") in self.FILTER_MEMORY_TYPES
+                    for meter in memory.get("meters") or []] or [0])
+
+    def _refresh(self, get_meters):
+        if self._allocated is None or time.time() - self._updated > self._ttl:
+            self._allocated = self._allocation(get_meters())
+            self._updated = time.time()
+
+    @property
+    def allocated(self):
+        return self._allocated
+
+    def reserve(self, filter_count, get_meters, freed_count=0):
+        """
+        Check that the filters fit and account for them
+        :param filter_count: number of filters going to be created
+        :param get_meters: callable returning getMemoryMeters data
+        :param freed_count: number of filters deleted before the creation, taken into account by the check only
+        :raises FilterMemoryException: if predicted allocation exceeds the threshold
+        """
+        with self._lock:
+            self._refresh(get_meters)
+            predicted = self._allocated + (filter_count - freed_count) * self._filter_cost
+            if predicted > self._threshold:
+                raise FilterMemoryException(
+                    "Not enough filter memory for {} filters, allocated {}%, predicted {}%, threshold {}%".format(
+                        filter_count, self._allocated, predicted, self._threshold))
+            self._allocated += filter_count * self._filter_cost
+
+    def release(self, filter_count):
+        with self._lock:
+            if self._allocated is not None:
+                self._allocated = max(0, self._allocated - filter_count * self._filter_cost)
+
+    def invalidate(self):
+        with self._lock:
+            self._allocated = None
@@ -0,0 +1,116 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from threading import Event, Lock, Thread
+
+
+class FilterPool(object):
+    """
+    Pool of idle driver filters reused by mappings instead of creating new ones. A background thread
+    keeps the pool size between the watermarks, off the command path
+    """
+
+    def __init__(self, low_watermark, high_watermark, create, delete, discover, logger, interval=60, background=True):
+        """
+        :param low_watermark: pool is refilled up to this size
+        :param high_watermark: pool is trimmed down to this size, released filters above it are not accepted
+        :param create: callable creating an idle filter, returns its identifier
+        :param delete: callable with a filter identifier
+        :param discover: callable returning identifiers of idle filters already present on the device
+        :param interval: maintenance interval, seconds
+        :param background: start the maintenance thread with the first use, maintain() is called by the owner otherwise
+        """
+        self._low_watermark = low_watermark
+        self._high_watermark = max(low_watermark, high_watermark)
+        self._create = create
+        self._delete = delete
+        self._discover = discover
+        self._logger = logger
+        self._interval = interval
+        self._background = background
+        self._filters = []
+        self._discovered = False
+        self._lock = Lock()
+        self._wakeup = Event()
+        self._stopped = Event()
+        self._thread = None
+
+    @property
+    def size(self):
+        with self._lock:
+            return len(self._filters)
+
+    def _start(self):
+        if self._background and self._thread is None and not self._stopped.is_set():
+            self._thread = Thread(target=self._run, name="FilterPoolMaintenance")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def acquire(self):
+        """
+        :return: idle filter identifier, None if the pool is empty
+        """
+        with self._lock:
+            self._start()
+            filter_uuid = self._filters.pop() if self._filters else None
+            if len(self._filters) < self._low_watermark:
+                self._wakeup.set()
+        return filter_uuid
+
+    def accepts(self):
+        with self._lock:
+            self._start()
+            return len(self._filters) < self._high_watermark
+
+    def put(self, filter_uuid):
+        with self._lock:
+            if filter_uuid is not None and filter_uuid not in self._filters:
+                self._filters.append(filter_uuid)
+
+    def reset(self):
+        """
+        Forget pooled filters, e.g. after the device configuration was replaced
+        """
+        with self._lock:
+            self._filters = []
+            self._discovered = False
+            self._wakeup.set()
+
+    def stop(self):
+        """
+        Stop the maintenance thread after its current run, pooled filters stay on the device
+        """
+        self._stopped.set()
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self._interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self.maintain()
+            except Exception as e:
+                self._logger.error("Filter pool maintenance failed: {}".format(e))
+
+    def maintain(self):
+        with self._lock:
+            discovered = self._discovered
+        if not discovered:
+            filter_uuids = self._discover()
+            with self._lock:
+                self._filters.extend(uuid for uuid in filter_uuids if uuid not in self._filters)
+                self._discovered = True
+
+        with self._lock:
+            missing = self._low_watermark - len(self._filters)
+            extra = [self._filters.pop(0) for _ in range(len(self._filters) - self._high_watermark)]
+        created = 0
+        for _ in range(missing):
+            self.put(self._create())
+            created += 1
+        for filter_uuid in extra:
+            self._delete(filter_uuid)
+        if created or extra:
+            self._logger.debug("Filter pool maintenance, created: {}, deleted: {}, size: {}".format(
+                created, len(extra), self.size))
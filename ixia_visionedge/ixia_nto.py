@@ -27,16 +27,23 @@ import sys
 
 
 class NtoException(Exception):
-    pass
+    # status code of the device response, None if the error is not a device response
+    code = None
 
 
 class NtoAuthException(NtoException):
     pass
 
 
+class NtoDeadlineExceeded(NtoException):
+    # transport error of the request interrupted by the deadline, None if no request was sent
+    transport_error = None
+
+
 class NtoApiClient(object):
 
-    def __init__(self, host, username, password, port=8000, debug=False, logFile=None, logger=None):
+    def __init__(self, host, username, password, port=8000, debug=False, logFile=None, logger=None, maxsize=1,
+                 timeout_provider=None):
         # urllib3.disable_warnings()
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
         self.host = host
@@ -50,14 +57,17 @@ class NtoApiClient(object):
         self.connection = ''
         self.logFile = logFile
         self.logger = logger
+        self.timeout = 240
+        self.timeout_provider = timeout_provider
 
         self.auth_b64 = base64.b64encode(bytearray(username + ":" + password, 'ascii')).decode('ascii')
         self.password_headers = {'Authorization': 'Basic ' + self.auth_b64, 'Content-type': 'application/json'}
 
         # self.connection = urllib3.connectionpool.HTTPSConnectionPool(host, port=port, ssl_version='TLSv1_2')
         self.connection = urllib3.connectionpool.HTTPSConnectionPool(host, port=port, cert_reqs='CERT_NONE',
-                                                                     ca_certs=None, timeout=240, retries=2)
-        response = self.connection.urlopen('GET', '/api/auth', headers=self.password_headers)
+                                                                     ca_certs=None, timeout=self.timeout, retries=0,
+                                                                     maxsize=maxsize)
+        response = self._urlopen('GET', '/api/auth', headers=self.password_headers)
 
         if debug:
             self._log("Status=%s" % response.status)
@@ -90,6 +100,25 @@ class NtoApiClient(object):
             if handle is not sys.stdout:
                 handle.close()
 
+    def _urlopen(self, HTTPMethod, URL, **kwargs):
+        """ Open URL, the timeout is limited by the remaining budget
+            reported by timeout_provider. """
+
+        if self.timeout_provider:
+            remaining = self.timeout_provider()
+            if remaining is not None:
+                kwargs['timeout'] = min(remaining, self.timeout)
+        try:
+            return self.connection.urlopen(HTTPMethod, URL, **kwargs)
+        except urllib3.exceptions.HTTPError as e:
+            if self.timeout_provider:
+                try:
+                    self.timeout_provider()
+                except NtoDeadlineExceeded as deadline_error:
+                    deadline_error.transport_error = e
+                    raise deadline_error
+            raise
+
     def _callServer(self, HTTPMethod, URL, argsAPI=None, decode=True):
         """ Call server method HTTPMethod with error handling
             and returns the response. """
@@ -102,7 +131,7 @@ class NtoApiClient(object):
             self._log(" argsAPI=%s\n" % argsAPI)
 
         argsAPI = json.dumps(argsAPI)
-        response = self.connection.urlopen(HTTPMethod, URL, body=argsAPI, headers=self.token_headers)
+        response = self._urlopen(HTTPMethod, URL, body=argsAPI, headers=self.token_headers)
 
         if self.debug:
             self._log("Response:\n")
@@ -126,9 +155,13 @@ class NtoApiClient(object):
             if code:
                 descr = data.get("description", "Error occured")
                 if code in [400, 403, 404, 500, 501, 503, 504]:
-                    raise NtoException("Status code {}, {}".format(code, descr))
+                    error = NtoException("Status code {}, {}".format(code, descr))
                 elif code == 401:
-                    raise NtoAuthException("Status code {}, {}".format(code, descr))
+                    error = NtoAuthException("Status code {}, {}".format(code, descr))
+                else:
+                    return data
+                error.code = code
+                raise error
         return data
 
     def setDebug(self, debug=False):
@@ -145,7 +178,7 @@ class NtoApiClient(object):
         Sample usage:
         >>> nto.authenticate()
         """
-        response = self.connection.urlopen('GET', '/api/auth', headers=self.password_headers)
+        response = self._urlopen('GET', '/api/auth', headers=self.password_headers)
 
         if self.debug:
             self._log("Status=%s" % response.status)
@@ -457,12 +490,27 @@ class NtoApiClient(object):
         buffer.extend(b'\r\n')
 
         hdrs = {'Authentication': self.token, 'Content-type': 'multipart/form-data; boundary=' + boundary}
-        response = self.connection.urlopen('POST', '/api/actions/import', body=buffer, headers=hdrs)
+        response = self._urlopen('POST', '/api/actions/import', body=buffer, headers=hdrs)
         # self._log (response.status, response.reason)
         data = response.data
 
         return data
 
+    def importConfigChecked(self, argsAPI):
+        """ importConfigChecked :
+        importConfig with the response checked for error codes like other server calls.
+
+        Sample usage:
+        >>> nto.importConfigChecked({'boundary': 'INCLUDE', 'import_type': 'CUSTOM', 'file_name': '/Users/fmota/Desktop/snmp+user.ata'})
+        {u'message': u'Configuration imported from /Users/fmota/Desktop/snmp+user.ata.'}
+        """
+        data = self.importConfig(argsAPI)
+        try:
+            data = json.loads(data.decode('ascii'))
+        except ValueError:
+            return data
+        return self._validate_response_data(data)
+
     def installLicense(self, argsAPI):
         """ installLicense :
         This command installs a license file on a NTO, a union, or a member.
@@ -1128,6 +1176,14 @@ class NtoApiClient(object):
         """
         return self._callServer('GET', '/api/cte_filters')
 
+    def getAllCteFiltersProperties(self, properties):
+        """ getAllCteFiltersProperties :
+        Fetch one or more properties of all the CTE filters.
+
+        Sample usage:
+        """
+        return self._callServer('GET', '/api/cte_filters?properties=' + properties)
+
     def searchCteFilter(self, argsAPI):
         """ searchCteFilter :
         Search a specific CTE filter by certain properties.
@@ -1294,8 +1350,16 @@ class NtoApiClient(object):
         """
         return self._callServer('GET', '/api/cte_ports')
 
-    def searchCtePortGroup(self, argsAPI):
-        """ searchCtePortGroup :
+    def getAllCtePortsProperties(self, properties):
+        """ getAllCtePortsProperties :
+        Fetch one or more properties of all the CTE ports.
+
+        Sample usage:
+        """
+        return self._callServer('GET', '/api/cte_ports?properties=' + properties)
+
+    def searchCtePorts(self, argsAPI):
+        """ searchCtePorts :
         Search a specific CTE port by certain properties.
 
         Sample usage:
@@ -1620,6 +1684,16 @@ class NtoApiClient(object):
         """
         return self._callServer('GET', '/api/filters')
 
+    def getAllFiltersProperties(self, properties):
+        """ getAllFiltersProperties :
+        Fetch one or more properties of all the filters in the system.
+
+        Sample usage:
+        >>> nto.getAllFiltersProperties('id,source_port_list,dest_port_list')
+        [{u'id': 460, u'source_port_list': [58], u'dest_port_list': [59]}, {u'id': 461, u'source_port_list': [410, 428], u'dest_port_list': []}]
+        """
+        return self._callServer('GET', '/api/filters?properties=' + properties)
+
     def getFilter(self, filter):
         """ getFilter :
         Fetch the properties of a filter object which is specified by its filter_id_or_name.
@@ -2086,6 +2160,16 @@ class NtoApiClient(object):
         """
         return self._callServer('GET', '/api/ports')
 
+    def getAllPortsProperties(self, properties):
+        """ getAllPortsProperties :
+        Fetch one or more properties of all the ports in the system.
+
+        Sample usage:
+        >>> nto.getAllPortsProperties('id,name,mode,enabled')
+        [{u'id': 58, u'name': u'P1-01', u'mode': u'NETWORK', u'enabled': False}, {u'id': 59, u'name': u'P1-02', u'mode': u'BIDIRECTIONAL', u'enabled': True}]
+        """
+        return self._callServer('GET', '/api/ports?properties=' + properties)
+
     def getPort(self, port):
         """ getPort :
         Fetch the properties of a port object which is specified by its
@@ -0,0 +1,107 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from ixia_visionedge.concurrency import run_parallel, DEFAULT_MAX_WORKERS
+
+
+class MappingPlanException(Exception):
+    def __init__(self, operation, error, rollback_errors=None):
+        self.operation = operation
+        self.error = error
+        self.rollback_errors = rollback_errors or []
+        message = "Operation '{}' failed: {}".format(operation.name, error)
+        if self.rollback_errors:
+            message += ", rollback errors: {}".format(", ".join(str(e) for e in self.rollback_errors))
+        super(MappingPlanException, self).__init__(message)
+
+
+class PlanOperation(object):
+    def __init__(self, name, action, compensation=None, depends_on=None, kind=None):
+        """
+        :param name: operation name, used in logs
+        :param action: callable without arguments, its result is passed to the compensation
+        :param compensation: callable with the action result, reverts the action
+        :param depends_on: list of operations which have to be completed before
+        :param kind: operation kind used by the caller to select operations, e.g. filter creations
+        """
+        self.name = name
+        self.action = action
+        self.compensation = compensation
+        self.depends_on = list(depends_on or [])
+        self.kind = kind
+        self.result = None
+
+    def __repr__(self):
+        return self.name
+
+
+class MappingPlan(object):
+    """
+    Explicit list of device operations with dependencies. Operations run stage by stage, each stage
+    concurrently. On failure completed operations are compensated in reverse order.
+    """
+
+    def __init__(self, logger, max_workers=DEFAULT_MAX_WORKERS):
+        self._logger = logger
+        self._max_workers = max_workers
+        self._operations = []
+        self._completed = []
+
+    @property
+    def operations(self):
+        return list(self._operations)
+
+    def add(self, name, action, compensation=None, depends_on=None, kind=None):
+        operation = PlanOperation(name, action, compensation, depends_on, kind)
+        self._operations.append(operation)
+        return operation
+
+    def _stages(self):
+        stages = []
+        scheduled = set()
+        pending = list(self._operations)
+        while pending:
+            stage = [op for op in pending if all(dep in scheduled for dep in op.depends_on)]
+            if not stage:
+                raise Exception("Mapping plan has unresolved dependencies: {}".format(pending))
+            stages.append(stage)
+            scheduled.update(stage)
+            pending = [op for op in pending if op not in scheduled]
+        return stages
+
+    def _run_operation(self, operation):
+        try:
+            operation.result = operation.action()
+        except Exception as e:
+            return e
+
+    def execute(self):
+        completed = self._completed = []
+        for stage in self._stages():
+            errors = run_parallel(self._run_operation, stage, self._max_workers)
+            failed = [(op, error) for op, error in zip(stage, errors) if error is not None]
+            completed.extend(op for op, error in zip(stage, errors) if error is None)
+            if failed:
+                operation, error = failed[0]
+                self._logger.error("Operation '{}' failed: {}, rolling back".format(operation.name, error))
+                raise MappingPlanException(operation, error, self._rollback(completed))
+
+    def rollback(self):
+        """
+        Compensate the operations of an executed plan, e.g. when a related plan failed
+        :return: list of compensation errors
+        """
+        completed, self._completed = self._completed, []
+        return self._rollback(completed)
+
+    def _rollback(self, completed):
+        errors = []
+        for operation in reversed(completed):
+            if not operation.compensation:
+                continue
+            try:
+                self._logger.debug("Rolling back '{}'".format(operation.name))
+                operation.compensation(operation.result)
+            except Exception as e:
+                self._logger.error("Cannot roll back '{}': {}".format(operation.name, e))
+                errors.append(e)
+        return errors
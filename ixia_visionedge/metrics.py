@@ -0,0 +1,30 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from threading import Lock
+
+
+class Metrics(object):
+    """
+    Thread safe counters and gauges of a device session
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = Lock()
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + value
+            return self._values[name]
+
+    def set(self, name, value):
+        with self._lock:
+            self._values[name] = value
+
+    def get(self, name, default=0):
+        with self._lock:
+            return self._values.get(name, default)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
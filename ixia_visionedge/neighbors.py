@@ -0,0 +1,64 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from threading import Lock
+
+
+class NeighborCache(object):
+    """
+    LLDP neighbors of the device ports fetched with getAllNeighbors in chunks of ports.
+    Records are expected as {"port_id": local port, "neighbors": [{"system_name": ..., "port_id": ...}]}
+    """
+    PORT_ID = "port_id"
+    NEIGHBORS = "neighbors"
+    SYSTEM_NAME = "system_name"
+    CHASSIS_ID = "chassis_id"
+    PORT_DESCRIPTION = "port_description"
+
+    def __init__(self, fetch, chunk_size, run_parallel, logger):
+        """
+        :param fetch: callable with a list of port identifiers, returns neighbor records
+        :param chunk_size: ports per request
+        :param run_parallel: callable with func and items, returns results
+        """
+        self._fetch = fetch
+        self._chunk_size = max(1, chunk_size)
+        self._run_parallel = run_parallel
+        self._logger = logger
+        self._lock = Lock()
+        self._neighbors = {}
+
+    def _describe(self, neighbor):
+        return "{}:{}".format(neighbor.get(self.SYSTEM_NAME) or neighbor.get(self.CHASSIS_ID) or "",
+                              neighbor.get(self.PORT_ID) or neighbor.get(self.PORT_DESCRIPTION) or "")
+
+    def refresh(self, port_idents):
+        """
+        Fetch neighbors of the ports, ports without neighbors are cached as well
+        :return: port identifier -> neighbors description
+        :rtype: dict
+        """
+        port_idents = [str(port_ident) for port_ident in port_idents]
+        chunks = [port_idents[i:i + self._chunk_size] for i in range(0, len(port_idents), self._chunk_size)]
+        neighbors = dict((port_ident, "") for port_ident in port_idents)
+        for records in self._run_parallel(self._fetch, chunks):
+            for record in records or []:
+                neighbors[str(record.get(self.PORT_ID))] = ", ".join(
+                    self._describe(neighbor) for neighbor in record.get(self.NEIGHBORS) or [])
+        with self._lock:
+            self._neighbors.update(neighbors)
+        self._logger.debug("Neighbors of {} ports fetched with {} requests".format(len(port_idents), len(chunks)))
+        return neighbors
+
+    def invalidate(self):
+        with self._lock:
+            self._neighbors = {}
+
+    def get(self, port_ident):
+        """
+        :return: neighbors description of the port, fetched if it is not cached
+        """
+        port_ident = str(port_ident)
+        with self._lock:
+            if port_ident in self._neighbors:
+                return self._neighbors[port_ident]
+        return self.refresh([port_ident]).get(port_ident)
@@ -0,0 +1,72 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import time
+from threading import Lock
+
+from ixia_visionedge.batching import CoalescingWindow
+
+
+class PortAttributeReader(object):
+    """
+    Port properties used by attribute values. Concurrent reads are coalesced into one bulk projection fetch,
+    fetched properties of all ports are cached for a short time
+    """
+    KEY_PROPERTIES = ("name", "default_name")
+
+    def __init__(self, fetch_all, properties, ttl, window, logger):
+        """
+        :param fetch_all: callable with comma separated properties, returns list of port records
+        :param properties: port properties to fetch
+        :param ttl: cache time, seconds
+        :param window: window coalescing concurrent reads, seconds, 0 to fetch immediately
+        """
+        self._fetch_all = fetch_all
+        self._properties = list(self.KEY_PROPERTIES) + [p for p in properties if p not in self.KEY_PROPERTIES]
+        self._ttl = ttl
+        self._logger = logger
+        self._lock = Lock()
+        self._ports = {}
+        self._window = CoalescingWindow(window, self._fetch) if window > 0 else None
+
+    def _cached(self, port_name):
+        with self._lock:
+            entry = self._ports.get(port_name)
+            if entry and time.time() - entry[0] <= self._ttl:
+                return entry[1]
+
+    def get(self, port_name):
+        """
+        :return: dict of port properties
+        :raises Exception: if the port is not found
+        """
+        port_data = self._cached(port_name)
+        if port_data is not None:
+            return port_data
+        if self._window:
+            return self._window.submit(port_name)
+        result = self._fetch([port_name])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _fetch(self, port_names):
+        port_list = self._fetch_all(",".join(self._properties)) or []
+        fetched_ports = dict((port_data.get(key), port_data) for port_data in port_list
+                             for key in self.KEY_PROPERTIES if port_data.get(key))
+        fetched = time.time()
+        with self._lock:
+            self._ports.update((port_name, (fetched, port_data)) for port_name, port_data in fetched_ports.items())
+        self._logger.debug("Properties of {} ports fetched for {} requests".format(len(port_list), len(port_names)))
+        return [fetched_ports.get(port_name) or Exception("Port {} is not found".format(port_name))
+                for port_name in port_names]
+
+    def invalidate(self, port_name=None):
+        with self._lock:
+            if port_name is None:
+                self._ports.clear()
+                return
+            entry = self._ports.get(port_name)
+            for key in self.KEY_PROPERTIES:
+                if entry and entry[1].get(key):
+                    self._ports.pop(entry[1].get(key), None)
+            self._ports.pop(port_name, None)
@@ -0,0 +1,66 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from threading import Lock
+
+
+class PortStateCache(object):
+    """
+    Last known mode/enabled state of the device ports, keyed by port identifier
+    """
+    FIELDS = ("mode", "enabled")
+
+    def __init__(self):
+        self._states = {}
+        self._lock = Lock()
+        self.saved_writes = 0
+
+    def _normalize_identifier(self, identifier):
+        return str(identifier)
+
+    def seed(self, port_list, identifier_key):
+        """
+        Seed states from the bulk port fetch, entries without state fields are ignored
+        :param port_list: list of port records
+        :type port_list: list
+        :param identifier_key: "id" or "uuid"
+        """
+        for port_data in port_list or []:
+            port_ident = port_data.get(identifier_key)
+            if port_ident is not None:
+                self.update(port_ident, port_data)
+
+    def update(self, port_ident, data):
+        state = dict((field, data[field]) for field in self.FIELDS if field in data)
+        if not state:
+            return
+        with self._lock:
+            self._states.setdefault(self._normalize_identifier(port_ident), {}).update(state)
+
+    def get(self, port_ident):
+        with self._lock:
+            state = self._states.get(self._normalize_identifier(port_ident))
+            return dict(state) if state else None
+
+    def holds(self, port_ident, request_data):
+        """
+        Check that the requested state is already applied to the port
+        :rtype: bool
+        """
+        if not request_data or any(key not in self.FIELDS for key in request_data):
+            return False
+        state = self.get(port_ident)
+        if not state:
+            return False
+        return all(key in state and state[key] == value for key, value in request_data.items())
+
+    def invalidate(self, port_ident=None):
+        with self._lock:
+            if port_ident is None:
+                self._states.clear()
+            else:
+                self._states.pop(self._normalize_identifier(port_ident), None)
+
+    def register_saved_write(self):
+        with self._lock:
+            self.saved_writes += 1
+            return self.saved_writes
@@ -0,0 +1,50 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import random
+import socket
+
+import urllib3
+
+from ixia_visionedge.ixia_nto import NtoException
+
+
+class NtoRetriesExhausted(NtoException):
+    pass
+
+
+class RetryPolicy(object):
+    """
+    Retry rules of NtoApiClient calls by method name. Idempotent calls are retried with exponential
+    backoff and jitter, creations only after checking that the object was not created by the failed call,
+    other calls are never retried
+    """
+    RETRYABLE_ERRORS = (urllib3.exceptions.HTTPError, socket.error)
+    IDEMPOTENT_PREFIXES = ("get", "search", "modify", "delete", "enable", "disable", "clear", "export")
+    CHECKED_METHODS = ("createFilter", "createCteFilter", "createPortGroup")
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=8.0):
+        """
+        :param max_attempts: attempts of a call, including the first one
+        :param base_delay: delay before the first retry, seconds, doubled for every next retry
+        :param max_delay: delay limit, seconds
+        """
+        self.max_attempts = max_attempts
+        self._base_delay = float(base_delay)
+        self._max_delay = float(max_delay)
+
+    def is_idempotent(self, name):
+        return name.startswith(self.IDEMPOTENT_PREFIXES)
+
+    def is_checked(self, name):
+        return name in self.CHECKED_METHODS
+
+    def allows(self, name):
+        return self.is_idempotent(name) or self.is_checked(name)
+
+    def delay(self, attempt):
+        """
+        Backoff with equal jitter, half of the delay is random
+        :param attempt: number of the failed attempt, starting with 1
+        """
+        delay = min(self._max_delay, self._base_delay * 2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
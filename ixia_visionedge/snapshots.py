@@ -0,0 +1,39 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import json
+import os
+import re
+
+
+class SnapshotStore(object):
+    """
+    Local storage of exported device configurations, keyed by reservation id
+    """
+    CONFIG_EXTENSION = ".ata"
+    METADATA_EXTENSION = ".json"
+
+    def __init__(self, path):
+        self._path = path
+
+    def _base_path(self, reservation_id):
+        return os.path.join(self._path, re.sub(r"[^\w.-]", "_", str(reservation_id)))
+
+    def config_path(self, reservation_id):
+        if not os.path.isdir(self._path):
+            os.makedirs(self._path)
+        return self._base_path(reservation_id) + self.CONFIG_EXTENSION
+
+    def exists(self, reservation_id):
+        base_path = self._base_path(reservation_id)
+        return os.path.isfile(base_path + self.CONFIG_EXTENSION) and os.path.isfile(
+            base_path + self.METADATA_EXTENSION)
+
+    def save_metadata(self, reservation_id, metadata):
+        with open(self._base_path(reservation_id) + self.METADATA_EXTENSION, "w") as metadata_file:
+            json.dump(metadata, metadata_file)
+
+    def load_metadata(self, reservation_id):
+        if not self.exists(reservation_id):
+            raise Exception("Snapshot for reservation {} is not found".format(reservation_id))
+        with open(self._base_path(reservation_id) + self.METADATA_EXTENSION) as metadata_file:
+            return json.load(metadata_file)
@@ -0,0 +1,225 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import time
+from array import array
+from threading import Event, Lock, Thread
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class StatsRing(object):
+    """
+    Fixed size ring of counter samples of a set of ports, one row of port values per sample.
+    Rows are kept in NumPy arrays if available, in flat arrays of doubles otherwise
+    """
+
+    def __init__(self, capacity, counters, port_idents):
+        """
+        :param capacity: number of samples kept
+        :param counters: stat names
+        :param port_idents: port identifiers, columns of the rows
+        """
+        self.port_idents = list(port_idents)
+        self._capacity = max(2, capacity)
+        self._width = len(self.port_idents)
+        self._times = array('d', [0.0]) * self._capacity
+        if numpy is not None:
+            self._rows = dict((counter, numpy.zeros((self._capacity, self._width))) for counter in counters)
+        else:
+            self._rows = dict((counter, array('d', [0.0]) * (self._capacity * self._width)) for counter in counters)
+        self._count = 0
+
+    @property
+    def size(self):
+        return min(self._count, self._capacity)
+
+    def push(self, sample_time, values):
+        """
+        :param sample_time: seconds
+        :param values: stat name -> list of port values in port_idents order
+        """
+        position = self._count % self._capacity
+        self._times[position] = sample_time
+        for counter, rows in self._rows.items():
+            row = values.get(counter) or [0.0] * self._width
+            if numpy is not None:
+                rows[position] = row
+            else:
+                rows[position * self._width:(position + 1) * self._width] = array('d', row)
+        self._count += 1
+
+    def zero(self, counter, port_idents):
+        """
+        Set the newest values of the ports to 0, the next deltas of counters reset on the device start from 0
+        """
+        if not self._count:
+            return
+        row = self._row(counter, 0)
+        for port_ident in port_idents:
+            row[self.port_idents.index(port_ident)] = 0.0
+        if numpy is None:
+            position = (self._count - 1) % self._capacity
+            self._rows[counter][position * self._width:(position + 1) * self._width] = row
+
+    def _row(self, counter, age):
+        position = (self._count - 1 - age) % self._capacity
+        rows = self._rows[counter]
+        if numpy is not None:
+            return rows[position]
+        return rows[position * self._width:(position + 1) * self._width]
+
+    def _time(self, age):
+        return self._times[(self._count - 1 - age) % self._capacity]
+
+    def deltas(self, counter, age=None):
+        """
+        Counter increase of every port between the newest sample and the sample of the age,
+        the oldest kept sample by default. After a counter reset the newest value is the increase
+        """
+        if self.size < 2:
+            return None
+        age = self.size - 1 if age is None else min(age, self.size - 1)
+        newest, oldest = self._row(counter, 0), self._row(counter, age)
+        if numpy is not None:
+            return numpy.where(newest >= oldest, newest - oldest, newest)
+        return [new - old if new >= old else new for new, old in zip(newest, oldest)]
+
+    def rates(self, counter, age=None):
+        """
+        Per second rate of every port
+        """
+        deltas = self.deltas(counter, age)
+        if deltas is None:
+            return None
+        age = self.size - 1 if age is None else min(age, self.size - 1)
+        interval = (self._time(0) - self._time(age)) or 1.0
+        if numpy is not None:
+            return deltas / interval
+        return [delta / interval for delta in deltas]
+
+    def utilization(self, counter, speeds, age=None):
+        """
+        Link utilization of every port, percent
+        :param counter: bytes counter
+        :param speeds: port speeds in port_idents order, Mbps, 0 if unknown
+        """
+        rates = self.rates(counter, age)
+        if rates is None:
+            return None
+        if numpy is not None:
+            speeds = numpy.asarray(speeds, dtype=float) * 1e6
+            return numpy.divide(rates * 800, speeds, out=numpy.zeros(self._width), where=speeds > 0)
+        return [rate * 800 / (speed * 1e6) if speed else 0.0 for rate, speed in zip(rates, speeds)]
+
+
+class StatsSampler(object):
+    """
+    Samples a stat set of the mapped ports with one getStats call per interval
+    """
+    IDENTIFIER = "id"
+    RATE_SUFFIX = "_rate"
+
+    def __init__(self, fetch, stat_names, get_port_idents, capacity, interval, logger, ports_refresh=0):
+        """
+        :param fetch: callable with stat names and port identifiers, returns stats_snapshot records
+        :param stat_names: stat names
+        :param get_port_idents: callable returning identifiers of the ports to sample
+        :param capacity: number of samples kept
+        :param interval: sampling interval, seconds
+        :param ports_refresh: time the sampled port set is kept, seconds, 0 to get it on every sample
+        """
+        self._fetch = fetch
+        self._stat_names = list(stat_names)
+        self._get_port_idents = get_port_idents
+        self._ports_refresh = ports_refresh
+        self._port_idents = None
+        self._port_idents_time = 0
+        self._capacity = capacity
+        self._interval = interval
+        self._logger = logger
+        self._lock = Lock()
+        self._ring = None
+        self._stopped = Event()
+        self._thread = None
+
+    @property
+    def ring(self):
+        return self._ring
+
+    @property
+    def stat_names(self):
+        return list(self._stat_names)
+
+    def _sampled_port_idents(self):
+        now = time.time()
+        if self._port_idents is None or now - self._port_idents_time >= self._ports_refresh:
+            self._port_idents = sorted(set(str(port_ident) for port_ident in self._get_port_idents() or []))
+            self._port_idents_time = now
+        return self._port_idents
+
+    def reset(self):
+        """
+        Drop the kept samples and the sampled port set, used when the device is changed
+        """
+        with self._lock:
+            self._ring = None
+            self._port_idents = None
+
+    def sample(self):
+        port_idents = self._sampled_port_idents()
+        if not port_idents:
+            return None
+        records = dict((str(record.get(self.IDENTIFIER)), record)
+                       for record in self._fetch(self._stat_names, port_idents) or [])
+        values = dict((stat_name, [float(records.get(port_ident, {}).get(stat_name) or 0)
+                                   for port_ident in port_idents])
+                      for stat_name in self._stat_names)
+        with self._lock:
+            # port set changed, samples of different ports are not comparable
+            if self._ring is None or self._ring.port_idents != port_idents:
+                self._ring = StatsRing(self._capacity, self._stat_names, port_idents)
+            self._ring.push(time.time(), values)
+            return self._ring
+
+    def report(self, speeds=None, utilization_counters=None):
+        """
+        :param speeds: port identifier -> speed, Mbps
+        :param utilization_counters: bytes counters, utilization of a port is the highest one
+        :return: port identifier -> {stat name + "_rate": value, "utilization": value}
+        :rtype: dict
+        """
+        with self._lock:
+            ring = self._ring
+            if ring is None or ring.size < 2:
+                return {}
+            report = dict((port_ident, {}) for port_ident in ring.port_idents)
+            for stat_name in self._stat_names:
+                for port_ident, rate in zip(ring.port_idents, ring.rates(stat_name)):
+                    report[port_ident][stat_name + self.RATE_SUFFIX] = float(rate)
+            if speeds and utilization_counters:
+                port_speeds = [float(speeds.get(port_ident) or 0) for port_ident in ring.port_idents]
+                for counter in utilization_counters:
+                    for port_ident, value in zip(ring.port_idents, ring.utilization(counter, port_speeds)):
+                        report[port_ident]["utilization"] = max(report[port_ident].get("utilization", 0.0),
+                                                                float(value))
+            return report
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="StatsSampler")
+                self._thread.daemon = True
+                self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            try:
+                self.sample()
+            except Exception as e:
+                self._logger.error("Stats sampling failed: {}".format(e))
@@ -0,0 +1,93 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import re
+import time
+from threading import Lock
+
+_TOKEN_RE = re.compile(r"Port:\s*([^\s<(]+)"
+                       r"|<t[hd](?:\s+bgcolor='([^']*)')?[^>]*>([^<]*)</t[hd]>"
+                       r"|(</tr>)", re.IGNORECASE)
+_HEADER_COLOR = "silver"
+
+
+def parse_transceiver_info(html):
+    """
+    Parse getTranceiverInfo HTML of a line card in one pass. Header rows (silver cells) name the values
+    of the following rows, the first row after a header row is used for multi lane transceivers
+    :param html: line_card_tranceiver_info
+    :return: port name -> {lower case header: value}
+    :rtype: dict
+    """
+    ports = {}
+    record = None
+    headers = None
+    cells = []
+    header_row = True
+    for match in _TOKEN_RE.finditer(html or ""):
+        port_name, color, text, row_end = match.groups()
+        if port_name:
+            record = ports.setdefault(port_name, {})
+            headers = None
+        elif row_end:
+            if cells and header_row:
+                headers = [cell.lower() for cell in cells]
+            elif cells and headers and record is not None:
+                for header, value in zip(headers, cells):
+                    record.setdefault(header, value)
+                headers = None
+            cells = []
+            header_row = True
+        else:
+            header_row = header_row and (color or "").lower() == _HEADER_COLOR
+            cells.append(text.replace("&nbsp;", " ").strip())
+    return ports
+
+
+class TransceiverInfoCache(object):
+    """
+    Transceiver records of all line cards from one getTranceiverInfo call, refreshed after the interval.
+    HTML of a line card is parsed again only if it was changed
+    """
+    LINE_CARD_NUMBER = "line_card_number"
+    LINE_CARD_INFO = "line_card_tranceiver_info"
+
+    def __init__(self, fetch, ttl, logger):
+        """
+        :param fetch: callable returning getTranceiverInfo data
+        :param ttl: refresh interval, seconds
+        """
+        self._fetch = fetch
+        self._ttl = ttl
+        self._logger = logger
+        self._lock = Lock()
+        self._line_cards = {}
+        self._ports = {}
+        self._updated = None
+
+    def _refresh(self):
+        line_cards = {}
+        for line_card in self._fetch() or []:
+            number = line_card.get(self.LINE_CARD_NUMBER)
+            html = line_card.get(self.LINE_CARD_INFO)
+            cached = self._line_cards.get(number)
+            line_cards[number] = cached if cached and cached[0] == html else (html, parse_transceiver_info(html))
+        self._line_cards = line_cards
+        self._ports = dict((port_name, record) for _, ports in line_cards.values()
+                           for port_name, record in ports.items())
+        self._updated = time.time()
+        self._logger.debug("Transceiver info of {} line cards, {} ports".format(len(line_cards), len(self._ports)))
+
+    def get(self, *port_names):
+        """
+        :param port_names: names of the port, the first found is used
+        :return: transceiver record, None if the port has no transceiver
+        :rtype: dict
+        """
+        with self._lock:
+            if self._updated is None or time.time() - self._updated > self._ttl:
+                self._refresh()
+            return next((self._ports[port_name] for port_name in port_names if port_name in self._ports), None)
+
+    def invalidate(self):
+        with self._lock:
+            self._updated = None
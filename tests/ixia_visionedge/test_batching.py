@@ -0,0 +1,43 @@
+import time
+from threading import Thread
+from unittest import TestCase
+
+from mock import Mock
+
+from ixia_visionedge.batching import CoalescingWindow
+from ixia_visionedge.deadline import command_deadline
+from ixia_visionedge.ixia_nto import NtoDeadlineExceeded
+
+
+class TestCoalescingWindow(TestCase):
+    def test_concurrent_items_flushed_together(self):
+        flush = Mock(side_effect=lambda items: [item * 2 for item in items])
+        instance = CoalescingWindow(0.2, flush)
+        results = {}
+
+        def submit(item):
+            results[item] = instance.submit(item)
+
+        threads = [Thread(target=submit, args=(item,)) for item in range(3)]
+        map(lambda thread: thread.start(), threads)
+        map(lambda thread: thread.join(), threads)
+        flush.assert_called_once()
+        self.assertEqual(results, {0: 0, 1: 2, 2: 4})
+
+    def test_error_raised_to_caller(self):
+        instance = CoalescingWindow(0, lambda items: [Exception('failed') for _ in items])
+        with self.assertRaises(Exception):
+            instance.submit(1)
+
+    def test_waiting_caller_bounded_by_deadline(self):
+        flush = Mock(side_effect=lambda items: items)
+        instance = CoalescingWindow(0.5, flush)
+        leader = Thread(target=instance.submit, args=(1,))
+        leader.start()
+        while instance._pending is None:
+            time.sleep(0.01)
+        with command_deadline('MapUni', 0.1):
+            with self.assertRaises(NtoDeadlineExceeded):
+                instance.submit(2)
+        leader.join()
+        flush.assert_called_once_with([1])
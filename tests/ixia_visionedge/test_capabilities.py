@@ -0,0 +1,24 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from ixia_visionedge.capabilities import CapabilityProfile, CapabilityStore
+
+
+class TestCapabilityStore(TestCase):
+    def setUp(self):
+        self._path = tempfile.mkdtemp()
+        self._instance = CapabilityStore(os.path.join(self._path, 'profiles', 'capabilities.json'))
+
+    def tearDown(self):
+        shutil.rmtree(self._path)
+
+    def test_profile_keyed_by_address_and_firmware(self):
+        self.assertIsNone(self._instance.load('192.168.42.240', '5.3.0'))
+        self._instance.save(CapabilityProfile('192.168.42.240', '5.3.0', True))
+        self._instance.save(CapabilityProfile('192.168.42.241', '5.3.0', False))
+        profile = self._instance.load('192.168.42.240', '5.3.0')
+        self.assertTrue(profile.cluster)
+        self.assertFalse(self._instance.load('192.168.42.241', '5.3.0').cluster)
+        self.assertIsNone(self._instance.load('192.168.42.240', '5.4.0'))
@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from mock import Mock
+
+from ixia_visionedge.circuit_breaker import CircuitBreaker, NtoCircuitOpen
+
+
+class TestCircuitBreaker(TestCase):
+    def setUp(self):
+        self._probe = Mock()
+        self._instance = CircuitBreaker('192.168.42.240', 2, 0, Mock())
+
+    def _open(self):
+        self._instance.record_failure()
+        self._instance.record_failure()
+        self.assertEqual(self._instance.state, CircuitBreaker.OPEN)
+
+    def test_fails_fast_while_open(self):
+        self._instance = CircuitBreaker('192.168.42.240', 2, 3600, Mock())
+        self._instance.record_failure()
+        self._instance.before_call(self._probe)
+        self._open()
+        with self.assertRaises(NtoCircuitOpen):
+            self._instance.before_call(self._probe)
+        self._probe.assert_not_called()
+        self.assertEqual(self._instance.metrics.get('circuit.rejected'), 1)
+
+    def test_probe_closes_circuit(self):
+        self._open()
+        self._instance.before_call(self._probe)
+        self._probe.assert_called_once_with()
+        self.assertEqual(self._instance.state, CircuitBreaker.CLOSED)
+
+    def test_failed_probe_reopens_circuit(self):
+        self._open()
+        self._probe.side_effect = Exception('Connection refused')
+        with self.assertRaises(NtoCircuitOpen):
+            self._instance.before_call(self._probe)
+        self.assertEqual(self._instance.state, CircuitBreaker.OPEN)
+        self.assertEqual(self._instance.metrics.get('circuit.opened'), 2)
@@ -0,0 +1,37 @@
+import time
+from threading import Lock
+from unittest import TestCase
+
+from ixia_visionedge.concurrency import run_partitioned
+
+
+class TestRunPartitioned(TestCase):
+    def test_concurrency_limited_per_partition(self):
+        lock = Lock()
+        active = {}
+        peaks = {}
+
+        def call(item):
+            partition = item[0]
+            with lock:
+                active[partition] = active.get(partition, 0) + 1
+                peaks[partition] = max(peaks.get(partition, 0), active[partition])
+            time.sleep(0.05)
+            with lock:
+                active[partition] -= 1
+            return item.upper()
+
+        items = ['a1', 'a2', 'a3', 'a4', 'b1', 'b2']
+        results = run_partitioned(call, items, lambda item: item[0], max_workers=6, partition_workers=2)
+        self.assertEqual(results, ['A1', 'A2', 'A3', 'A4', 'B1', 'B2'])
+        self.assertEqual(peaks, {'a': 2, 'b': 2})
+
+    def test_exceptions_returned_in_place(self):
+        def call(item):
+            if item == 2:
+                raise Exception('failed')
+            return item
+
+        results = run_partitioned(call, [1, 2, 3], lambda item: item % 2, max_workers=2, return_exceptions=True)
+        self.assertEqual(results[0::2], [1, 3])
+        self.assertIsInstance(results[1], Exception)
@@ -0,0 +1,54 @@
+import time
+from unittest import TestCase
+
+import urllib3
+from mock import Mock
+
+from ixia_visionedge.concurrency import run_parallel
+from ixia_visionedge.deadline import command_deadline, current_deadline, remaining_timeout
+from ixia_visionedge.ixia_nto import NtoApiClient, NtoDeadlineExceeded
+
+
+class TestDeadline(TestCase):
+    def test_no_deadline(self):
+        with command_deadline('MapBidi', 0):
+            self.assertIsNone(remaining_timeout())
+
+    def test_nested_deadline_does_not_extend(self):
+        with command_deadline('MapClear', 10):
+            with command_deadline('MapBidi', 100):
+                self.assertLessEqual(remaining_timeout(), 10)
+            with command_deadline('MapBidi', 1):
+                self.assertLessEqual(remaining_timeout(), 1)
+        self.assertIsNone(current_deadline())
+
+    def test_deadline_exceeded(self):
+        with command_deadline('MapUni', 0.01):
+            time.sleep(0.02)
+            with self.assertRaises(NtoDeadlineExceeded):
+                remaining_timeout()
+
+    def test_deadline_passed_to_workers(self):
+        with command_deadline('MapClear', 10):
+            results = run_parallel(lambda item: remaining_timeout(), [1, 2, 3], max_workers=3)
+        self.assertTrue(all(0 < result <= 10 for result in results))
+
+    def test_client_uses_remaining_budget(self):
+        client = NtoApiClient.__new__(NtoApiClient)
+        client.connection = Mock()
+        client.timeout = 240
+        client.timeout_provider = remaining_timeout
+        with command_deadline('MapBidi', 5):
+            client._urlopen('GET', '/api/ports')
+        self.assertLessEqual(client.connection.urlopen.call_args[1]['timeout'], 5)
+
+    def test_client_timeout_reported_with_transport_error(self):
+        client = NtoApiClient.__new__(NtoApiClient)
+        client.connection = Mock()
+        transport_error = urllib3.exceptions.ReadTimeoutError(None, '/api/ports', 'Read timed out')
+        client.connection.urlopen.side_effect = transport_error
+        client.timeout = 240
+        client.timeout_provider = Mock(side_effect=[5, NtoDeadlineExceeded('MapBidi exceeded its deadline of 5s')])
+        with self.assertRaises(NtoDeadlineExceeded) as context:
+            client._urlopen('GET', '/api/ports')
+        self.assertIs(context.exception.transport_error, transport_error)
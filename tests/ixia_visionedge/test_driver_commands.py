@@ -1,9 +1,23 @@
 from unittest import TestCase
 
-from mock import Mock
+import socket
+from threading import Thread
+
+from mock import Mock, patch
 
 from cloudshell.layer_one.core.driver_commands_interface import DriverCommandsInterface
-from ixia_visionedge.driver_commands import DriverCommands
+from ixia_visionedge.batching import CoalescingWindow
+from ixia_visionedge.driver_commands import DriverCommands, NtoSession, NtoPortGroupNotDeleted
+from ixia_visionedge.circuit_breaker import NtoCircuitOpen
+from ixia_visionedge.concurrency import run_partitioned
+from ixia_visionedge.filter_memory import FilterMemoryModel, FilterMemoryException
+from ixia_visionedge.filter_pool import FilterPool
+from ixia_visionedge.capabilities import CapabilityProfile
+from ixia_visionedge.ixia_nto import NtoAuthException, NtoDeadlineExceeded, NtoException
+from ixia_visionedge.retry_policy import RetryPolicy, NtoRetriesExhausted
+from ixia_visionedge.mapping_plan import MappingPlanException
+from ixia_visionedge.neighbors import NeighborCache
+from ixia_visionedge.stats_sampler import StatsSampler
 
 
 
@@ -16,3 +30,812 @@ class TestDriverCommands(TestCase):
 
     def test_implementing_interface(self):
         self.assertIsInstance(self._instance, DriverCommandsInterface)
+
+
+class TestDriverCommandsMapping(TestCase):
+    ADDRESS = '192.168.42.240'
+
+    @patch('ixia_visionedge.driver_commands.NtoSession')
+    def setUp(self, nto_session_class):
+        self._logger = Mock()
+        self._runtime_config_instance = Mock()
+        self._runtime_config_instance.read_key.side_effect = lambda key, default=None: {
+            'MULTI_DEST_FILTERS': True}.get(key, default)
+        self._nto_session = nto_session_class.return_value
+        self._nto_session.ifc_cluster = False
+        self._ports = {'P01': {'id': 1, 'dest_filter_list': [], 'source_filter_list': []},
+                       'P02': {'id': 2, 'dest_filter_list': [], 'source_filter_list': []},
+                       'P03': {'id': 3, 'dest_filter_list': [], 'source_filter_list': []}}
+        self._filters = {}
+        self._nto_session.get_port_data.side_effect = self._get_port_data
+        self._nto_session.get_filter.side_effect = lambda ident: self._filters[ident]
+        self._nto_session.get_ports.return_value = [{'id': data['id'], 'name': name}
+                                                    for name, data in self._ports.items()]
+        self._instance = DriverCommands(self._logger, self._runtime_config_instance)
+        self._instance._max_workers = 1
+
+    def _get_port_data(self, ident):
+        if ident in self._ports:
+            return self._ports[ident]
+        return next(data for data in self._ports.values() if data['id'] == ident)
+
+    def _cs_port(self, port_id):
+        return '{}/1/{}'.format(self.ADDRESS, port_id)
+
+    def test_map_uni_creates_single_filter(self):
+        self._instance.map_uni(self._cs_port(1), [self._cs_port(2), self._cs_port(3)])
+        self._nto_session.create_filter.assert_called_once_with(
+            {'source_port_list': [1], 'dest_port_list': [2, 3], 'mode': 'PASS_ALL', 'description': 'CloudShell L1'})
+
+    def test_map_uni_extends_existing_filter(self):
+        self._ports['P01']['dest_filter_list'] = [10]
+        self._filters[10] = {'id': 10, 'source_port_list': [1], 'dest_port_list': [2], 'mode': 'PASS_ALL',
+                             'description': 'CloudShell L1'}
+        self._instance.map_uni(self._cs_port(1), [self._cs_port(2), self._cs_port(3)])
+        self._nto_session.create_filter.assert_not_called()
+        self._nto_session.modify_filter.assert_called_once_with(10, {'dest_port_list': [2, 3]})
+
+    def test_map_uni_keeps_filter_not_created_by_driver(self):
+        self._ports['P01']['dest_filter_list'] = [10]
+        self._filters[10] = {'id': 10, 'source_port_list': [1], 'dest_port_list': [2], 'mode': 'PASS_ALL',
+                             'description': 'user'}
+        self._instance.map_uni(self._cs_port(1), [self._cs_port(3)])
+        self._nto_session.modify_filter.assert_not_called()
+        self._nto_session.create_filter.assert_called_once_with(
+            {'source_port_list': [1], 'dest_port_list': [3], 'mode': 'PASS_ALL', 'description': 'CloudShell L1'})
+
+    def test_map_clear_to_detaches_destination(self):
+        self._ports['P01']['dest_filter_list'] = [10]
+        self._filters[10] = {'id': 10, 'source_port_list': [1], 'dest_port_list': [2, 3], 'mode': 'PASS_ALL'}
+        self._instance.map_clear_to(self._cs_port(1), [self._cs_port(2)])
+        self._nto_session.delete_filter.assert_not_called()
+        self._nto_session.modify_filter.assert_called_once_with(10, {'dest_port_list': [3]})
+
+    def test_map_clear_deletes_each_filter_once(self):
+        self._ports['P01'].update({'dest_filter_list': [10], 'source_filter_list': [11]})
+        self._ports['P02'].update({'dest_filter_list': [11], 'source_filter_list': [10]})
+        self._filters[10] = {'id': 10, 'source_port_list': [1], 'dest_port_list': [2], 'mode': 'PASS_ALL'}
+        self._filters[11] = {'id': 11, 'source_port_list': [2], 'dest_port_list': [1], 'mode': 'PASS_ALL'}
+        self._instance.map_clear([self._cs_port(1), self._cs_port(2)])
+        self.assertEqual(sorted(c[0][0] for c in self._nto_session.delete_filter.call_args_list), [10, 11])
+        self.assertEqual(self._nto_session.get_filter.call_count, 2)
+        self.assertEqual(sorted(c[0][0] for c in self._nto_session.modify_port.call_args_list), [1, 2])
+
+    def test_map_bidi_rolls_back_on_failure(self):
+        self._ports['P01'].update({'mode': 'NETWORK', 'enabled': False})
+        self._ports['P02'].update({'mode': 'NETWORK', 'enabled': False})
+        self._nto_session.create_filter.side_effect = [{'id': 10}, Exception('Filter memory exhausted')]
+        with self.assertRaises(MappingPlanException):
+            self._instance.map_bidi(self._cs_port(1), self._cs_port(2))
+        self._nto_session.delete_filter.assert_called_once_with(10)
+        self._nto_session.modify_port.assert_any_call(1, {'mode': 'NETWORK', 'enabled': False})
+        self._nto_session.modify_port.assert_any_call(2, {'mode': 'NETWORK', 'enabled': False})
+
+    def test_coalesced_commands_cancel_out(self):
+        errors = self._instance._apply_mapping_commands([('MapUni', self._cs_port(1), [self._cs_port(3)]),
+                                                         ('MapBidi', self._cs_port(1), [self._cs_port(2)]),
+                                                         ('MapClearTo', self._cs_port(1), [self._cs_port(3)])])
+        self.assertEqual(errors, [None, None, None])
+        self.assertEqual(sorted(c[0][0]['dest_port_list'] for c in self._nto_session.create_filter.call_args_list),
+                         [[1], [2]])
+        self.assertEqual(sorted(c[0][0] for c in self._nto_session.modify_port.call_args_list), [1, 2])
+
+    def test_coalesced_map_bidi_rolls_back_both_directions(self):
+        self._ports['P04'] = {'id': 4, 'dest_filter_list': [], 'source_filter_list': []}
+
+        def create_filter(request_data):
+            if request_data['source_port_list'] == [2]:
+                raise Exception('Filter memory exhausted')
+            return {'id': 10 * request_data['source_port_list'][0]}
+
+        self._nto_session.create_filter.side_effect = create_filter
+        errors = self._instance._apply_mapping_commands([('MapBidi', self._cs_port(1), [self._cs_port(2)]),
+                                                         ('MapUni', self._cs_port(3), [self._cs_port(4)])])
+        self.assertIsInstance(errors[0], MappingPlanException)
+        self.assertIsNone(errors[1])
+        self._nto_session.delete_filter.assert_called_once_with(10)
+
+    def test_apply_topology_changes_difference_only(self):
+        self._nto_session.port_state_holds.return_value = False
+        self._nto_session.get_filters_properties.return_value = [
+            {'id': 10, 'source_port_list': [1], 'dest_port_list': [2], 'mode': 'PASS_ALL',
+             'description': 'CloudShell L1'},
+            {'id': 11, 'source_port_list': [1], 'dest_port_list': [3], 'mode': 'PASS_ALL',
+             'description': 'CloudShell L1'}]
+        self._instance._multi_dest_filters = False
+        summary = self._instance.apply_topology([(self._cs_port(1), self._cs_port(2)),
+                                                 (self._cs_port(2), self._cs_port(3))])
+        self._nto_session.delete_filter.assert_called_once_with(11)
+        self._nto_session.create_filter.assert_called_once_with(
+            {'source_port_list': [2], 'dest_port_list': [3], 'mode': 'PASS_ALL', 'description': 'CloudShell L1'})
+        self.assertEqual(summary['links_unchanged'], 1)
+        self._nto_session.get_port_data.assert_not_called()
+
+    def _set_aggregation_group(self):
+        port_modes = {1: 'NETWORK', 2: 'NETWORK', 3: 'BIDIRECTIONAL'}
+        self._nto_session.port_state_holds.side_effect = lambda uuid, state: state == {
+            'mode': port_modes.get(uuid), 'enabled': True}
+        self._nto_session.get_filters_properties.return_value = [
+            {'id': 20, 'source_port_list': [], 'source_port_group_list': [30], 'dest_port_list': [3],
+             'mode': 'PASS_ALL', 'description': 'CloudShell L1'}]
+        self._nto_session.get_port_group.return_value = {'id': 30, 'port_list': [1, 2],
+                                                         'description': 'CloudShell L1'}
+
+    def test_apply_topology_keeps_aggregated_links(self):
+        self._set_aggregation_group()
+        summary = self._instance.apply_topology([(self._cs_port(1), self._cs_port(3)),
+                                                 (self._cs_port(2), self._cs_port(3))])
+        self._nto_session.create_filter.assert_not_called()
+        self._nto_session.delete_filter.assert_not_called()
+        self._nto_session.modify_port_group.assert_not_called()
+        self.assertEqual(summary['links_unchanged'], 2)
+        self.assertEqual(summary['ports_enabled'], 0)
+
+    def test_apply_topology_shrinks_aggregation_group(self):
+        self._set_aggregation_group()
+        summary = self._instance.apply_topology([(self._cs_port(1), self._cs_port(3))])
+        self._nto_session.create_filter.assert_not_called()
+        self._nto_session.modify_port_group.assert_called_once_with(30, {'port_list': [1]})
+        self.assertEqual(summary['links_unchanged'], 1)
+        self.assertEqual(summary['ports_disabled'], 1)
+
+    def test_apply_topology_keeps_filters_not_created_by_driver(self):
+        self._nto_session.port_state_holds.return_value = False
+        self._nto_session.get_filters_properties.return_value = [
+            {'id': 10, 'source_port_list': [1], 'dest_port_list': [2], 'mode': 'PASS_ALL', 'description': 'user'},
+            {'id': 11, 'source_port_list': [2], 'dest_port_list': [3], 'mode': 'PASS_ALL', 'description': ''}]
+        summary = self._instance.apply_topology([(self._cs_port(1), self._cs_port(2))])
+        self._nto_session.delete_filter.assert_not_called()
+        self._nto_session.modify_filter.assert_not_called()
+        self._nto_session.create_filter.assert_not_called()
+        self.assertEqual(summary['links_unchanged'], 1)
+        self.assertEqual(summary['ports_disabled'], 0)
+
+    def test_apply_topology_shrinks_and_extends_filter_once(self):
+        self._nto_session.port_state_holds.return_value = False
+        self._nto_session.get_filters_properties.return_value = [
+            {'id': 10, 'source_port_list': [1], 'dest_port_list': [2, 3], 'mode': 'PASS_ALL',
+             'description': 'CloudShell L1'}]
+        self._nto_session.get_ports.return_value.append({'id': 4, 'name': 'P04'})
+        summary = self._instance.apply_topology([(self._cs_port(1), self._cs_port(2)),
+                                                 (self._cs_port(1), self._cs_port(4))])
+        self._nto_session.modify_filter.assert_called_once_with(10, {'dest_port_list': [2, 4]})
+        self.assertEqual(summary['filters_modified'], 1)
+
+    def test_apply_topology_releases_reservation_on_failure(self):
+        self._nto_session.port_state_holds.return_value = False
+        self._nto_session.get_filters_properties.return_value = []
+        self._instance._multi_dest_filters = False
+        self._nto_session.create_filter.side_effect = [{'id': 10}, Exception('Filter creation failed')]
+        with self.assertRaises(Exception):
+            self._instance.apply_topology([(self._cs_port(1), self._cs_port(2)), (self._cs_port(1), self._cs_port(3))])
+        self._nto_session.reserve_filter_memory.assert_called_once_with(2, 0)
+        self._nto_session.release_filter_memory.assert_called_once_with(1)
+
+    def test_map_clear_all_ports_uses_bulk_clear(self):
+        self._instance._full_clear = True
+        self._nto_session.get_filters.return_value = [{'id': 10}]
+        self._nto_session.search_filters.return_value = [{'id': 10}]
+        self._instance.map_clear([self._cs_port(1), self._cs_port(2), self._cs_port(3)])
+        self._nto_session.clear_filters_and_ports.assert_called_once_with()
+        self._nto_session.delete_filter.assert_not_called()
+
+    def test_map_clear_all_ports_guarded_by_unmanaged_filters(self):
+        self._instance._full_clear = True
+        self._nto_session.get_filters.return_value = [{'id': 10}, {'id': 12}]
+        self._nto_session.search_filters.return_value = [{'id': 10}]
+        self._instance.map_clear([self._cs_port(1), self._cs_port(2), self._cs_port(3)])
+        self._nto_session.clear_filters_and_ports.assert_not_called()
+
+    def test_filter_memory_rejects_before_writes(self):
+        self._instance._multi_dest_filters = False
+        self._nto_session.reserve_filter_memory.side_effect = FilterMemoryException('Not enough filter memory')
+        with self.assertRaises(FilterMemoryException):
+            self._instance.map_uni(self._cs_port(1), [self._cs_port(2), self._cs_port(3)])
+        self._nto_session.reserve_filter_memory.assert_called_once_with(2)
+        self._nto_session.modify_port.assert_not_called()
+        self._nto_session.create_filter.assert_not_called()
+
+    def test_coalesced_batch_rejects_groups_over_capacity(self):
+        self._nto_session.reserve_filter_memory.side_effect = [None, FilterMemoryException('Not enough memory')]
+        errors = self._instance._apply_mapping_commands([('MapUni', self._cs_port(1), [self._cs_port(3)]),
+                                                         ('MapUni', self._cs_port(2), [self._cs_port(3)])])
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], FilterMemoryException)
+        self._nto_session.create_filter.assert_called_once_with(
+            {'source_port_list': [1], 'dest_port_list': [3], 'mode': 'PASS_ALL', 'description': 'CloudShell L1'})
+
+    def test_aggregation_creates_group_and_single_filter(self):
+        self._instance._aggregation = True
+        self._nto_session.search_port_groups.return_value = []
+        self._nto_session.create_port_group.return_value = {'id': 405}
+        self._instance.map_uni(self._cs_port(1), [self._cs_port(3)])
+        self._nto_session.create_port_group.assert_called_once_with(
+            {'name': 'CS_AGG_3', 'mode': 'NETWORK', 'type': 'INTERCONNECT', 'port_list': [1],
+             'description': 'CloudShell L1'})
+        self._nto_session.create_filter.assert_called_once_with(
+            {'source_port_group_list': [405], 'dest_port_list': [3], 'mode': 'PASS_ALL',
+             'description': 'CloudShell L1'})
+        self._nto_session.modify_port.assert_any_call(1, {'mode': 'NETWORK', 'enabled': True})
+
+    def test_aggregation_adds_source_to_existing_group(self):
+        self._instance._aggregation = True
+        self._nto_session.search_port_groups.return_value = [{'id': 405, 'name': 'CS_AGG_3'}]
+        self._nto_session.get_port_group.return_value = {'id': 405, 'port_list': [1]}
+        self._instance.map_uni(self._cs_port(2), [self._cs_port(3)])
+        self._nto_session.modify_port_group.assert_called_once_with(405, {'port_list': [1, 2]})
+        self._nto_session.create_filter.assert_not_called()
+
+    def test_aggregation_source_with_two_destinations_uses_filter(self):
+        self._instance._aggregation = True
+        self._instance.map_uni(self._cs_port(1), [self._cs_port(2), self._cs_port(3)])
+        self._nto_session.create_port_group.assert_not_called()
+        self._nto_session.create_filter.assert_called_once_with(
+            {'source_port_list': [1], 'dest_port_list': [2, 3], 'mode': 'PASS_ALL', 'description': 'CloudShell L1'})
+        self._nto_session.modify_port.assert_any_call(1, {'mode': 'BIDIRECTIONAL', 'enabled': True})
+
+        self._ports['P01']['port_group_id'] = 405
+        with self.assertRaises(Exception):
+            self._instance.map_uni(self._cs_port(1), [self._cs_port(2), self._cs_port(3)])
+
+    def test_coalesced_aggregation_of_one_destination_creates_group_once(self):
+        self._instance._aggregation = True
+        self._instance._max_workers = 4
+        self._nto_session.search_port_groups.side_effect = [[], [{'id': 405, 'name': 'CS_AGG_3'}]]
+        self._nto_session.create_port_group.return_value = {'id': 405}
+        self._nto_session.get_port_group.return_value = {'id': 405, 'port_list': [1]}
+        errors = self._instance._apply_mapping_commands([('MapUni', self._cs_port(1), [self._cs_port(3)]),
+                                                         ('MapUni', self._cs_port(2), [self._cs_port(3)])])
+        self.assertEqual(errors, [None, None])
+        self._nto_session.create_port_group.assert_called_once()
+        self._nto_session.modify_port_group.assert_called_once_with(405, {'port_list': [1, 2]})
+
+    def test_aggregation_rejects_bidirectional_destination(self):
+        self._instance._aggregation = True
+        self._ports['P01'].update({'mode': 'BIDIRECTIONAL', 'source_filter_list': [11]})
+        with self.assertRaises(Exception):
+            self._instance.map_uni(self._cs_port(1), [self._cs_port(3)])
+        self._nto_session.modify_port.assert_not_called()
+        self._nto_session.create_port_group.assert_not_called()
+
+    def test_aggregation_undo_keeps_concurrent_members(self):
+        self._instance._aggregation = True
+        self._nto_session.search_port_groups.return_value = [{'id': 405, 'name': 'CS_AGG_3'}]
+        self._nto_session.get_port_group.side_effect = [{'id': 405, 'port_list': [1]},
+                                                        {'id': 405, 'port_list': [1, 2, 4]}]
+        plan = self._instance._create_plan()
+        extend_operation = self._instance._plan_aggregation(plan, self._ports['P02'], 3, [])
+        plan.add('fail', Mock(side_effect=Exception('Failed')), depends_on=[extend_operation])
+        with self.assertRaises(MappingPlanException):
+            plan.execute()
+        self.assertEqual(self._nto_session.modify_port_group.call_args_list[-1][0], (405, {'port_list': [1, 4]}))
+
+    def test_map_clear_destination_deletes_aggregation_group(self):
+        self._nto_session.port_state_holds.return_value = False
+        self._ports['P01']['port_group_id'] = 405
+        self._ports['P02']['port_group_id'] = 405
+        self._ports['P03']['source_filter_list'] = [10]
+        self._filters[10] = {'id': 10, 'source_port_list': [], 'source_port_group_list': [405],
+                             'dest_port_list': [3], 'mode': 'PASS_ALL'}
+        self._nto_session.get_port_group.return_value = {'id': 405, 'port_list': [1, 2], 'dest_filter_list': [10],
+                                                         'description': 'CloudShell L1'}
+        self._instance.map_clear([self._cs_port(3)])
+        self._nto_session.delete_filter.assert_called_once_with(10)
+        self._nto_session.delete_port_group.assert_called_once_with(405)
+        self.assertEqual(sorted(c[0][0] for c in self._nto_session.modify_port.call_args_list), [1, 2, 3])
+
+    def test_modify_ports_with_temporary_group(self):
+        self._instance._bulk_ports_min = 2
+        self._nto_session.port_state_holds.side_effect = lambda ident, data: ident == 3
+        self._instance._modify_ports([1, 2, 3], {'mode': 'BIDIRECTIONAL', 'enabled': True})
+        group_request_data = self._nto_session.modify_ports_with_group.call_args[0][2]
+        self.assertEqual(group_request_data['port_list'], [1, 2])
+        self.assertEqual(group_request_data['mode'], 'BIDIRECTIONAL')
+        self._nto_session.modify_port.assert_not_called()
+
+    def test_modify_ports_falls_back_to_port_requests(self):
+        self._instance._bulk_ports_min = 2
+        self._nto_session.port_state_holds.return_value = False
+        self._nto_session.modify_ports_with_group.side_effect = Exception('Port is a member of port group PG1')
+        errors = self._instance._modify_ports([1, 2], {'mode': 'NETWORK', 'enabled': False}, return_exceptions=True)
+        self.assertEqual(errors, [None, None])
+        self.assertEqual(sorted(c[0][0] for c in self._nto_session.modify_port.call_args_list), [1, 2])
+
+    def test_modify_ports_group_left_not_retried_per_port(self):
+        self._instance._bulk_ports_min = 2
+        self._nto_session.port_state_holds.return_value = False
+        self._nto_session.modify_ports_with_group.side_effect = NtoPortGroupNotDeleted('Group 405 is not deleted')
+        errors = self._instance._modify_ports([1, 2], {'mode': 'NETWORK', 'enabled': False}, return_exceptions=True)
+        self.assertTrue(all(isinstance(error, NtoPortGroupNotDeleted) for error in errors))
+        self._nto_session.modify_port.assert_not_called()
+
+    def test_filter_pool_reuse_and_retire(self):
+        self._instance._multi_dest_filters = False
+        self._instance._filter_pool = Mock()
+        self._instance._filter_pool.acquire.return_value = 20
+        self._instance._filter_pool.accepts.return_value = True
+        self._instance.map_uni(self._cs_port(1), [self._cs_port(2)])
+        self._nto_session.create_filter.assert_not_called()
+        self._nto_session.modify_filter.assert_called_once_with(
+            20, {'source_port_list': [1], 'dest_port_list': [2], 'mode': 'PASS_ALL', 'description': 'CloudShell L1'})
+
+        self._ports['P01']['dest_filter_list'] = [20]
+        self._filters[20] = {'id': 20, 'source_port_list': [1], 'dest_port_list': [2], 'mode': 'PASS_ALL',
+                             'description': 'CloudShell L1'}
+        self._instance.map_clear_to(self._cs_port(1), [self._cs_port(2)])
+        self._nto_session.modify_filter.assert_called_with(
+            20, {'source_port_list': [], 'dest_port_list': [], 'mode': 'DENY_ALL', 'description': 'CloudShell L1 pool'})
+        self._instance._filter_pool.put.assert_called_once_with(20)
+        self._nto_session.delete_filter.assert_not_called()
+
+    def test_filter_memory_released_once_when_pool_trimmed(self):
+        api_client = Mock()
+        api_client.getCteCluster.return_value = None
+        api_client.getMemoryMeters.return_value = [{'memory_meters': [
+            {'memory_type': 'DYNAMIC_FILTER_IP', 'meters': [{'alloc_pcnt': 10}]}]}]
+        session = NtoSession(logger=self._logger, filter_memory=FilterMemoryModel(90, 1, 60))
+        session._session = api_client
+        self._instance._nto_session = session
+        self._instance._filter_pool = FilterPool(0, 1, Mock(), session.delete_filter, Mock(return_value=[]),
+                                                 self._logger, background=False)
+        session.reserve_filter_memory(1)
+        self.assertEqual(session._filter_memory.allocated, 11)
+
+        self._instance._retire_filter(20)
+        self.assertEqual(session._filter_memory.allocated, 10)
+        self._instance._filter_pool._high_watermark = 0
+        self._instance._filter_pool.maintain()
+        api_client.deleteFilter.assert_called_once_with('20')
+        self.assertEqual(session._filter_memory.allocated, 10)
+
+        self._instance._retire_filter(30, {'id': 30, 'description': 'user filter'})
+        self.assertEqual(session._filter_memory.allocated, 10)
+
+    def test_get_attribute_value_reads_projected_properties(self):
+        self._nto_session.get_ports_properties.return_value = [
+            {'name': 'P01', 'default_name': 'P01', 'link_settings': 'AUTO',
+             'link_status': {'speed': '10000', 'duplex': 'FULL'}},
+            {'name': 'P02', 'default_name': 'P02', 'link_settings': '1G_HALF', 'link_status': {}}]
+        self.assertEqual(self._instance.get_attribute_value(self._cs_port(1), 'Port Speed')._value, '10000')
+        self.assertEqual(self._instance.get_attribute_value(self._cs_port(1), 'Auto Negotiation')._value, 'True')
+        self.assertEqual(self._instance.get_attribute_value(self._cs_port(2), 'Port Speed')._value, '1G')
+        self.assertEqual(self._instance.get_attribute_value(self._cs_port(2), 'Duplex')._value, '2')
+        self._nto_session.get_ports_properties.assert_called_once_with('name,default_name,link_settings,link_status')
+
+    def test_restore_snapshot_validates_inventory(self):
+        self._instance._snapshots = Mock()
+        self._instance._snapshots.load_metadata.return_value = {'inventory': [[1, 'P01'], [2, 'P02']],
+                                                                'sections': {'filters': 'ALL'}}
+        with self.assertRaises(Exception):
+            self._instance.restore_snapshot('res-1')
+        self._nto_session.import_config.assert_not_called()
+        self._instance._snapshots.load_metadata.return_value['inventory'].append([3, 'P03'])
+        self._instance.restore_snapshot('res-1')
+        self._nto_session.import_config.assert_called_once_with(
+            {'boundary': 'INCLUDE', 'import_type': 'CUSTOM', 'filters': 'ALL',
+             'file_name': self._instance._snapshots.config_path.return_value})
+
+    def test_get_attribute_value_reads_transceiver_info(self):
+        self._nto_session.get_ports_properties.return_value = [{'name': 'P01', 'default_name': 'P1-01'}]
+        self._nto_session.get_transceiver_info.return_value = [{'line_card_number': 1, 'line_card_tranceiver_info': (
+            "<b>Port: P1-01</b><table><tr><th bgcolor='silver'>Rx Power (dBm)</th><th bgcolor='silver'>Wavelength</th>"
+            "</tr><tr><td>-3.01</td><td>1310</td></tr></table>")}]
+        self.assertEqual(self._instance.get_attribute_value(self._cs_port(1), 'Rx Power (dBm)')._value, '-3.01')
+        self.assertEqual(self._instance.get_attribute_value(self._cs_port(1), 'Wavelength')._value, '1310')
+        self.assertEqual(self._instance.get_attribute_value(self._cs_port(1), 'Tx Power (dBm)')._value, 'NA')
+        self._nto_session.get_transceiver_info.assert_called_once_with()
+
+    @patch('ixia_visionedge.stats_sampler.time')
+    def test_get_attribute_value_reads_sampled_stats(self, time_mock):
+        self._instance._stats_sampler = StatsSampler(
+            self._nto_session.get_port_stats, ['np_total_rx_count_bytes', 'tp_total_drop_count_packets'],
+            lambda: [1], 60, 1, Mock())
+        self._nto_session.get_ports_properties.return_value = [
+            {'name': 'P01', 'default_name': 'P01', 'link_settings': '10G_FULL', 'link_status': {}}]
+        self._nto_session.get_port_stats.return_value = [
+            {'id': '1', 'np_total_rx_count_bytes': 0, 'tp_total_drop_count_packets': 0}]
+        time_mock.time.return_value = 0
+        self._instance._stats_sampler.sample()
+        self.assertEqual(self._instance.get_attribute_value(self._cs_port(1), 'Utilization (%)')._value, 'NA')
+        self._nto_session.get_port_stats.return_value = [
+            {'id': '1', 'np_total_rx_count_bytes': 1250000000, 'tp_total_drop_count_packets': 50}]
+        time_mock.time.return_value = 10
+        self._instance._stats_sampler.sample()
+        self.assertEqual(self._instance.get_attribute_value(self._cs_port(1), 'Utilization (%)')._value, '10.00')
+        self.assertEqual(self._instance.get_attribute_value(self._cs_port(1), 'Drop Rate (pps)')._value, '5.00')
+
+    def test_command_logs_session_metrics(self):
+        self._nto_session.get_metrics.return_value = {'retries.total': 2}
+        self._instance.map_uni(self._cs_port(1), [self._cs_port(2)])
+        self._logger.debug.assert_any_call("MapUni metrics: {'retries.total': 2}")
+
+    def test_get_attribute_value_not_available_when_disabled(self):
+        for attribute_name in ('Utilization (%)', 'Drop Rate (pps)', 'Neighbor'):
+            self.assertEqual(self._instance.get_attribute_value(self._cs_port(1), attribute_name)._value, 'NA')
+        self._nto_session.get_ports_properties.assert_not_called()
+
+    def test_autoload_fills_chassis_and_port_attributes(self):
+        self._nto_session.get_system_info.return_value = {'serial_number': 'A1B2C3', 'software_version': '5.3.0'}
+        self._nto_session.get_ports.return_value = [
+            {'id': 1, 'name': 'P01', 'link_settings': 'AUTO', 'link_status': {'speed': '10000'}},
+            {'id': 2, 'name': 'P02', 'link_settings': '1G_FULL', 'link_status': {}}]
+        self._nto_session.get_filters.return_value = []
+        chassis = self._instance.get_resource_description(self.ADDRESS).resource_info_list[0]
+        self.assertEqual(chassis.serial_number, 'A1B2C3')
+        self.assertEqual(sorted((a.name, a.value) for a in chassis.attributes),
+                         [('OS Version', '5.3.0'), ('Serial Number', 'A1B2C3')])
+        ports = chassis.child_resources['1'].child_resources
+        self.assertEqual([(a.name, a.value) for a in ports['1'].attributes], [('Port Speed', '10000')])
+        self.assertEqual([(a.name, a.value) for a in ports['2'].attributes], [('Port Speed', '1G')])
+        self._nto_session.get_ports.assert_called_once_with(['link_settings', 'link_status'])
+        self._nto_session.get_port_data.assert_not_called()
+
+    def test_scoped_autoload(self):
+        self._instance._autoload_port_search = {'mode': 'NETWORK'}
+        self._instance._autoload_filter_search = {'description': 'CloudShell L1'}
+        self._instance._autoload_port_ranges = [['P02', 'P10']]
+        device_ports = {'P01': 1, 'P02': 2, 'P03': 3, 'P11': 11}
+        self._nto_session.search_ports.side_effect = lambda request_data: [
+            {'id': device_ports[request_data['name']], 'name': request_data['name']}] if request_data[
+            'name'] in device_ports else []
+        self._nto_session.get_port_properties.side_effect = lambda port_ident, properties: {
+            2: {'id': 2, 'name': 'P02', 'dest_filter_list': [10], 'source_filter_list': []},
+            3: {'id': 3, 'name': 'P03', 'dest_filter_list': [], 'source_filter_list': [10, 12]}}[port_ident]
+        self._nto_session.search_filters.return_value = [{'id': 10}, {'id': 20}]
+        self._filters[10] = {'id': 10, 'source_port_list': [2], 'dest_port_list': [3]}
+        chassis = self._instance.get_resource_description(self.ADDRESS).resource_info_list[0]
+        ports = chassis.child_resources['1'].child_resources
+        self.assertEqual(sorted(ports), ['2', '3'])
+        self.assertEqual(ports['3'].mapping, ports['2'])
+        self.assertEqual(sorted(c[0][0]['name'] for c in self._nto_session.search_ports.call_args_list),
+                         ['P{:02d}'.format(number) for number in range(2, 11)])
+        self.assertEqual(self._nto_session.search_ports.call_args[0][0]['mode'], 'NETWORK')
+        self.assertEqual(sorted(c[0][0] for c in self._nto_session.get_port_properties.call_args_list), [2, 3])
+        self._nto_session.get_filter.assert_called_once_with(10)
+        self._nto_session.get_ports.assert_not_called()
+        self._nto_session.get_filters.assert_not_called()
+        self._instance._autoload_blades = [2]
+        self.assertFalse(self._instance._in_autoload_scope('1', '2'))
+
+    def test_autoload_port_range_names(self):
+        self._instance._autoload_port_ranges = [['P2-01', 'P2-03'], ['P9', 'P10']]
+        self.assertEqual(self._instance._autoload_port_names(), ['P2-01', 'P2-02', 'P2-03', 'P9', 'P10'])
+        self._instance._autoload_port_ranges = [['P1-16', 'P2-01']]
+        self.assertIsNone(self._instance._autoload_port_names())
+
+    def test_autoload_sets_port_neighbors(self):
+        self._instance._neighbors = NeighborCache(self._nto_session.get_neighbors, 128, self._instance._run_parallel,
+                                                  self._logger)
+        self._nto_session.get_neighbors.return_value = [
+            {'port_id': 2, 'neighbors': [{'system_name': 'sw1', 'port_id': 'Ethernet1'}]}]
+        self._nto_session.get_filters.return_value = []
+        chassis = self._instance.get_resource_description(self.ADDRESS).resource_info_list[0]
+        ports = chassis.child_resources['1'].child_resources
+        self.assertEqual([(a.name, a.value) for a in ports['2'].attributes], [('Neighbor', 'sw1:Ethernet1')])
+        self.assertEqual(ports['1'].attributes, [])
+        self._nto_session.get_neighbors.assert_called_once_with(['1', '2', '3'])
+        self.assertEqual(self._instance.get_attribute_value(self._cs_port(2), 'Neighbor')._value, 'sw1:Ethernet1')
+
+    def _set_cluster_members(self):
+        self._nto_session.ifc_cluster = True
+        self._instance._max_workers = 8
+        self._nto_session.get_cte_members.return_value = [{'uuid': 'm1'}, {'uuid': 'm2'}]
+        member_ports = {'m1': [{'uuid': 'u1', 'name': 'S1-P01'}], 'm2': [{'uuid': 'u2', 'name': 'S2-P01'}]}
+        self._nto_session.search_ports.side_effect = lambda request_data: member_ports[
+            request_data['cte_member_uuid']]
+
+    def test_cluster_port_calls_partitioned_by_member(self):
+        self._set_cluster_members()
+        with patch('ixia_visionedge.driver_commands.run_partitioned', wraps=run_partitioned) as run_partitioned_mock:
+            self._instance._run_per_member(Mock(), ['S1-P01', 'u2'])
+        func, port_items, member_of, max_workers, member_workers, _ = run_partitioned_mock.call_args[0]
+        self.assertEqual([member_of(port_item) for port_item in port_items], ['m1', 'm2'])
+        self.assertEqual((max_workers, member_workers), (8, 4))
+        self.assertEqual(self._nto_session.search_ports.call_count, 2)
+
+    def test_cluster_autoload_fetches_per_member(self):
+        self._set_cluster_members()
+        self._nto_session.get_system_info.return_value = {}
+        self._nto_session.get_ports.return_value = [
+            {'uuid': 'u1', 'name': 'S1-P01', 'link_settings': '10G_FULL', 'link_status': {}},
+            {'uuid': 'u2', 'name': 'S2-P01', 'link_settings': 'AUTO', 'link_status': {'speed': '40000'}}]
+        self._nto_session.search_filters.side_effect = lambda request_data: [{'uuid': 'f1', 'name': 'F1'}]
+        self._filters['f1'] = {'uuid': 'f1', 'source_port_uuid_list': ['u1'], 'dest_port_uuid_list': ['u2']}
+        chassis = self._instance.get_resource_description(self.ADDRESS).resource_info_list[0]
+        self.assertEqual(sorted(chassis.child_resources), ['1', '2'])
+        src_port = chassis.child_resources['1'].child_resources['1']
+        dst_port = chassis.child_resources['2'].child_resources['1']
+        self.assertEqual(dst_port.mapping, src_port)
+        self.assertEqual([(a.name, a.value) for a in dst_port.attributes], [('Port Speed', '40000')])
+        self.assertEqual(self._nto_session.search_filters.call_count, 2)
+        self._nto_session.get_filter.assert_called_once_with('f1')
+        self._nto_session.get_ports.assert_called_once_with(['link_settings', 'link_status'])
+        self.assertEqual(self._instance._port_members, {'u1': 'm1', 'S1-P01': 'm1', 'u2': 'm2', 'S2-P01': 'm2'})
+
+    def test_login_to_other_device_resets_device_state(self):
+        self._nto_session.address = self.ADDRESS
+        self._instance._neighbors = NeighborCache(Mock(return_value=[]), 128, self._instance._run_parallel, Mock())
+        self._instance._neighbors.refresh([1])
+        self._instance._filter_pool = Mock()
+        self._instance._stats_sampler = StatsSampler(Mock(return_value=[]), ['tp_total_drop_count_packets'],
+                                                     lambda: [1], 60, 1, Mock())
+        self._instance._stats_sampler.sample()
+        self._instance._port_members = {'u1': 'm1'}
+        self._instance.login('192.168.42.244', 'admin', 'admin')
+        self.assertIsNone(self._instance._stats_sampler.ring)
+        self.assertIsNone(self._instance._port_members)
+        self.assertEqual(self._instance._neighbors._neighbors, {})
+        self._instance._filter_pool.reset.assert_called_once_with()
+        self._instance._stats_sampler.stop()
+
+    def test_cluster_fetch_falls_back_when_member_search_fails(self):
+        self._set_cluster_members()
+        self._nto_session.search_ports.side_effect = NtoException('Unknown property cte_member_uuid')
+        self.assertIsNone(self._instance._fetch_per_member(self._nto_session.search_ports))
+
+    def test_set_port_speed_coalesced_per_mode(self):
+        self._instance._port_attributes = Mock()
+        self._instance._speed_window = CoalescingWindow(0.2, self._instance._change_port_speeds)
+        threads = [Thread(target=self._instance.set_attribute_value, args=(self._cs_port(port_id), 'Port Speed', mode))
+                   for port_id, mode in [(1, 'MODE_QSFP'), (2, 'MODE_SFP'), (3, 'MODE_QSFP')]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted((sorted(c[0][0]), c[0][1]) for c in self._nto_session.change_port_speed.call_args_list),
+                         [([1, 3], 'MODE_QSFP'), ([2], 'MODE_SFP')])
+        self.assertEqual(sorted(c[0][0] for c in self._instance._port_attributes.invalidate.call_args_list),
+                         ['P01', 'P02', 'P03'])
+        with self.assertRaises(Exception):
+            self._instance.set_attribute_value(self._cs_port(1), 'Duplex', '3')
+
+    def test_set_port_speed_maps_speed_to_mode(self):
+        self._instance._port_attributes = Mock()
+        self._instance.set_attribute_value(self._cs_port(1), 'Port Speed', '40G')
+        self._nto_session.change_port_speed.assert_called_with([1], 'MODE_QSFP')
+        self._instance.set_attribute_value(self._cs_port(2), 'Port Speed', '10000')
+        self._nto_session.change_port_speed.assert_called_with([2], 'MODE_SFP')
+        with self.assertRaises(Exception):
+            self._instance.set_attribute_value(self._cs_port(3), 'Port Speed', '7G')
+        self.assertEqual(self._nto_session.change_port_speed.call_count, 2)
+
+
+class TestNtoSessionPortStates(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+        self._instance = NtoSession(logger=self._logger)
+        self._api_client = Mock()
+        self._api_client.getCteCluster.return_value = None
+        self._instance._session = self._api_client
+
+    def test_modify_port_skipped_when_state_holds(self):
+        self._api_client.getAllPortsProperties.return_value = [
+            {'id': 58, 'name': 'P01', 'mode': 'BIDIRECTIONAL', 'enabled': True}]
+        self._instance.get_ports()
+        self._instance.modify_port(58, {'mode': 'BIDIRECTIONAL', 'enabled': True})
+        self._api_client.modifyPort.assert_not_called()
+
+    def test_modify_port_write_through(self):
+        self._instance.modify_port(58, {'mode': 'NETWORK', 'enabled': False})
+        self._instance.modify_port(58, {'mode': 'NETWORK', 'enabled': False})
+        self._api_client.modifyPort.assert_called_once_with('58', {'mode': 'NETWORK', 'enabled': False})
+
+    def test_change_port_speed_invalidates_states(self):
+        self._instance.modify_port(58, {'mode': 'NETWORK', 'enabled': True})
+        self._instance.modify_port(59, {'mode': 'NETWORK', 'enabled': True})
+        self._instance.change_port_speed([58], 'MODE_SFP')
+        self._api_client.changePortSpeed.assert_called_once_with({'port_list': ['58'], 'qsfp28_port_mode': 'MODE_SFP'})
+        self.assertFalse(self._instance.port_state_holds(58, {'mode': 'NETWORK', 'enabled': True}))
+        self.assertTrue(self._instance.port_state_holds(59, {'mode': 'NETWORK', 'enabled': True}))
+
+    def test_modify_ports_with_group_reads_states_back(self):
+        self._api_client.createPortGroup.return_value = {'id': 405}
+        self._api_client.getAllPortsProperties.return_value = [{'id': 58, 'mode': 'NETWORK', 'enabled': False},
+                                                               {'id': 59, 'mode': 'BIDIRECTIONAL', 'enabled': False}]
+        calls = self._instance.modify_ports_with_group([58, 59], {'mode': 'NETWORK', 'enabled': False},
+                                                       {'name': 'CS_TMP_1', 'mode': 'NETWORK', 'port_list': [58, 59]})
+        self._api_client.disablePortGroup.assert_called_once_with('405')
+        self._api_client.deletePortGroup.assert_called_once_with('405')
+        self._api_client.getAllPortsProperties.assert_called_once_with('id,name,default_name,mode,enabled')
+        self._api_client.modifyPort.assert_called_once_with('59', {'mode': 'NETWORK', 'enabled': False})
+        self.assertEqual(calls, 5)
+        self.assertTrue(self._instance.port_state_holds(58, {'mode': 'NETWORK', 'enabled': False}))
+        self.assertTrue(self._instance.port_state_holds(59, {'mode': 'NETWORK', 'enabled': False}))
+
+    def test_modify_ports_with_group_raises_if_group_left(self):
+        self._api_client.createPortGroup.return_value = {'id': 405}
+        self._api_client.deletePortGroup.side_effect = NtoException('Status code 500, Port group is locked')
+        with self.assertRaises(NtoPortGroupNotDeleted):
+            self._instance.modify_ports_with_group([58, 59], {'mode': 'NETWORK', 'enabled': False},
+                                                   {'name': 'CS_TMP_1', 'mode': 'NETWORK', 'port_list': [58, 59]})
+        self.assertFalse(self._instance.port_state_holds(58, {'mode': 'NETWORK', 'enabled': False}))
+
+    def test_import_config_checked_through_wrapper(self):
+        self._instance.modify_port(58, {'mode': 'NETWORK', 'enabled': True})
+        self._api_client.importConfigChecked.side_effect = NtoException('Status code 500, Import failed')
+        with self.assertRaises(NtoException):
+            self._instance.import_config({'import_type': 'CUSTOM'})
+        self._api_client.importConfigChecked.side_effect = None
+        self._instance.import_config({'import_type': 'CUSTOM'})
+        self._api_client.importConfigChecked.assert_called_with({'import_type': 'CUSTOM'})
+        self.assertFalse(self._instance.port_state_holds(58, {'mode': 'NETWORK', 'enabled': True}))
+
+
+class TestNtoSessionCapabilities(TestCase):
+    def setUp(self):
+        self._store = Mock()
+        self._store.load.return_value = None
+        self._instance = NtoSession(address='192.168.42.240', logger=Mock(), capability_store=self._store)
+        self._api_client = Mock()
+        self._api_client.getSystemProperty.return_value = {'software_version': '5.3.0'}
+        self._api_client.getCteCluster.side_effect = self._status_error(404)
+        self._instance._session = self._api_client
+
+    def _status_error(self, code):
+        error = NtoException('Status code {}'.format(code))
+        error.code = code
+        return error
+
+    def test_standalone_probed_once_and_saved(self):
+        self.assertFalse(self._instance.ifc_cluster)
+        self.assertFalse(self._instance.ifc_cluster)
+        self._api_client.getCteCluster.assert_called_once_with()
+        self.assertEqual(self._store.save.call_args[0][0].to_dict(), {
+            'address': '192.168.42.240', 'firmware': '5.3.0', 'cluster': False})
+
+    def test_stored_profile_skips_cte_probe(self):
+        self._store.load.return_value = CapabilityProfile('192.168.42.240', '5.3.0', True)
+        self.assertTrue(self._instance.ifc_cluster)
+        self._store.load.assert_called_once_with('192.168.42.240', '5.3.0')
+        self._api_client.getCteCluster.assert_not_called()
+
+    def test_unreachable_device_not_cached(self):
+        self._api_client.getCteCluster.side_effect = NtoRetriesExhausted('getCteCluster failed')
+        with self.assertRaises(NtoRetriesExhausted):
+            self._instance.ifc_cluster
+        self._api_client.getCteCluster.side_effect = None
+        self._api_client.getCteCluster.return_value = {'name': 'cluster'}
+        self.assertTrue(self._instance.ifc_cluster)
+
+    def test_server_error_not_saved_as_standalone(self):
+        self._api_client.getCteCluster.side_effect = self._status_error(503)
+        with self.assertRaises(NtoException):
+            self._instance.ifc_cluster
+        self._store.save.assert_not_called()
+        self._api_client.getCteCluster.side_effect = self._status_error(501)
+        self.assertFalse(self._instance.ifc_cluster)
+        self._store.save.assert_called_once()
+
+    def test_login_to_other_device_resets_profile(self):
+        self.assertFalse(self._instance.ifc_cluster)
+        self._instance.set_login_details('192.168.42.241', 'admin', 'admin')
+        self._instance._session = self._api_client
+        self._instance.ifc_cluster
+        self._store.load.assert_called_with('192.168.42.241', '5.3.0')
+
+    def test_login_after_firmware_upgrade_probes_again(self):
+        self.assertFalse(self._instance.ifc_cluster)
+        self._instance.set_login_details('192.168.42.240', 'admin', 'admin')
+        self.assertFalse(self._instance.ifc_cluster)
+        self._api_client.getCteCluster.assert_called_once_with()
+
+        self._api_client.getSystemProperty.return_value = {'software_version': '5.4.0'}
+        self._api_client.getCteCluster.side_effect = None
+        self._api_client.getCteCluster.return_value = {'name': 'cluster'}
+        self._instance.set_login_details('192.168.42.240', 'admin', 'admin')
+        self.assertTrue(self._instance.ifc_cluster)
+        self._store.load.assert_called_with('192.168.42.240', '5.4.0')
+        self.assertEqual(self._api_client.getSystemProperty.call_count, 3)
+
+
+class TestNtoSessionRetries(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+        self._instance = NtoSession(logger=self._logger, retry_policy=RetryPolicy(base_delay=0))
+        self._api_client = Mock()
+        self._api_client.getCteCluster.return_value = None
+        self._instance._session = self._api_client
+
+    def test_get_retried(self):
+        self._api_client.getPort.side_effect = [socket.error('Connection reset'), {'id': 58}]
+        self.assertEqual(self._instance.getPort('58'), {'id': 58})
+        self.assertEqual(self._instance.metrics.get('retries.getPort'), 1)
+
+    def test_retries_exhausted(self):
+        self._api_client.modifyPort.side_effect = socket.error('Connection reset')
+        with self.assertRaises(NtoRetriesExhausted):
+            self._instance.modifyPort('58', {'enabled': True})
+        self.assertEqual(self._api_client.modifyPort.call_count, 3)
+
+    def test_retried_delete_not_found_is_deleted(self):
+        not_found = NtoException('Status code 404, Not found')
+        not_found.code = 404
+        self._api_client.deleteFilter.side_effect = [socket.error('Read timed out'), not_found]
+        self.assertIsNone(self._instance.deleteFilter('10'))
+        self.assertEqual(self._api_client.deleteFilter.call_count, 2)
+        self._api_client.deleteFilter.side_effect = not_found
+        with self.assertRaises(NtoException):
+            self._instance.deleteFilter('10')
+
+    def test_create_not_repeated_when_object_exists(self):
+        request_data = {'source_port_list': [58], 'dest_port_list': [59], 'mode': 'PASS_ALL'}
+        self._api_client.createFilter.side_effect = socket.error('Read timed out')
+        self._api_client.searchFilters.side_effect = lambda search: [{'id': 10, 'name': search['name']}]
+        self.assertEqual(self._instance.createFilter(request_data), {'id': 10})
+        sent_data = dict(self._api_client.createFilter.call_args[0][0])
+        sent_name = sent_data.pop('name')
+        self.assertTrue(sent_name.startswith('CS_'))
+        self.assertEqual(sent_data, request_data)
+        self._api_client.searchFilters.assert_called_once_with({'name': sent_name})
+
+    def test_identical_filter_created_before_not_taken(self):
+        request_data = {'source_port_list': [58], 'dest_port_list': [59], 'mode': 'PASS_ALL'}
+        self._api_client.createFilter.side_effect = [socket.error('Read timed out'), {'id': 11}]
+        self._api_client.searchFilters.return_value = []
+        self._api_client.getAllFiltersProperties.return_value = [dict(request_data, id=10, name='F1')]
+        self.assertEqual(self._instance.createFilter(request_data), {'id': 11})
+        first_name = self._api_client.createFilter.call_args_list[0][0][0]['name']
+        self.assertEqual(self._api_client.createFilter.call_args_list[1][0][0]['name'], first_name)
+
+    @patch('ixia_visionedge.driver_commands.NtoApiClient')
+    def test_auth_reinit_once_per_session(self, api_client_class):
+        self._instance.set_login_details('192.168.42.240', 'admin', 'admin')
+        stale_session = self._api_client
+        self._instance._session = stale_session
+        new_session = Mock()
+        api_client_class.return_value = new_session
+        stale_session.getPort.side_effect = NtoAuthException('Status code 401')
+        new_session.getPort.return_value = {'id': 58}
+        self.assertEqual(self._instance.getPort('58'), {'id': 58})
+        self.assertEqual(api_client_class.call_count, 1)
+
+    def test_non_idempotent_call_not_retried(self):
+        self._api_client.importConfig.side_effect = socket.error('Connection reset')
+        with self.assertRaises(socket.error):
+            self._instance.importConfig({})
+        self._api_client.importConfig.assert_called_once_with({})
+
+    @patch('ixia_visionedge.driver_commands.NtoApiClient')
+    def test_auth_failures_raise(self, api_client_class):
+        self._instance.set_login_details('192.168.42.240', 'admin', 'admin')
+        api_client_class.return_value = self._api_client
+        self._api_client.getPort.side_effect = NtoAuthException('Status code 401')
+        with self.assertRaises(NtoAuthException):
+            self._instance.getPort('58')
+
+    def test_circuit_breaker_opens_on_failures(self):
+        self._instance = NtoSession('192.168.42.241', logger=self._logger, retry_policy=RetryPolicy(max_attempts=1),
+                                    circuit_breaker_threshold=2, circuit_breaker_reset=3600)
+        self._instance._session = self._api_client
+        self._api_client.getPort.side_effect = socket.error('Connection refused')
+        for _ in range(2):
+            with self.assertRaises(NtoRetriesExhausted):
+                self._instance.getPort('58')
+        with self.assertRaises(NtoCircuitOpen):
+            self._instance.getPort('58')
+        self.assertEqual(self._api_client.getPort.call_count, 2)
+        self.assertEqual(self._instance.get_metrics()['circuit.state'], 'OPEN')
+
+    def test_circuit_breaker_opens_on_deadline_timeouts(self):
+        self._instance = NtoSession('192.168.42.242', logger=self._logger, circuit_breaker_threshold=2,
+                                    circuit_breaker_reset=3600)
+        self._instance._session = self._api_client
+        timeout = NtoDeadlineExceeded('MapUni exceeded its deadline of 5s')
+        timeout.transport_error = socket.timeout('Read timed out')
+        self._api_client.getPort.side_effect = timeout
+        for _ in range(2):
+            with self.assertRaises(NtoDeadlineExceeded):
+                self._instance.getPort('58')
+        with self.assertRaises(NtoCircuitOpen):
+            self._instance.getPort('58')
+        self.assertEqual(self._instance.get_metrics()['circuit.state'], 'OPEN')
+
+    def test_exhausted_budget_not_counted_by_circuit_breaker(self):
+        self._instance = NtoSession('192.168.42.243', logger=self._logger, circuit_breaker_threshold=2,
+                                    circuit_breaker_reset=3600)
+        self._instance._session = self._api_client
+        self._api_client.getPort.side_effect = NtoDeadlineExceeded('MapUni exceeded its deadline of 5s')
+        for _ in range(5):
+            with self.assertRaises(NtoDeadlineExceeded):
+                self._instance.getPort('58')
+        self.assertEqual(self._instance.get_metrics()['circuit.state'], 'CLOSED')
@@ -0,0 +1,45 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import Mock
+
+from ixia_visionedge.drop_watchdog import DropWatchdog
+
+
+class TestDropWatchdog(TestCase):
+    def setUp(self):
+        self._path = tempfile.mkdtemp()
+        self._report_path = os.path.join(self._path, 'Logs', 'drops.log')
+        self._fetch = Mock()
+        self._reset_drops = Mock()
+        self._instance = DropWatchdog(self._fetch, Mock(return_value={58: 'P01', 59: 'P02'}), self._reset_drops,
+                                      self._report_path, 10, Mock())
+
+    def tearDown(self):
+        shutil.rmtree(self._path)
+
+    def _sample(self, drops):
+        self._fetch.return_value = [{'id': port_ident, 'tp_total_drop_count_packets': count}
+                                    for port_ident, count in drops.items()]
+        self._instance.sample()
+
+    def test_drop_increases_reported_and_reset(self):
+        self._sample({'58': 10, '59': 0})
+        self.assertFalse(os.path.exists(self._report_path))
+        self._sample({'58': 10, '59': 7})
+        self._sample({'58': 12, '59': 3})
+        self._fetch.assert_called_with(['tp_total_drop_count_packets'], ['58', '59'])
+        with open(self._report_path) as report_file:
+            records = [json.loads(line) for line in report_file]
+        self.assertEqual([(r['name'], r['drops']) for r in records], [('P02', 7), ('P01', 2), ('P02', 3)])
+        self.assertEqual([c[0][0] for c in self._reset_drops.call_args_list], [['59'], ['58', '59']])
+
+    def test_drops_after_reset_counted_from_zero(self):
+        for count in [100, 130, 150, 150]:
+            self._sample({'58': count, '59': 0})
+        with open(self._report_path) as report_file:
+            records = [json.loads(line) for line in report_file]
+        self.assertEqual([(r['name'], r['drops']) for r in records], [('P01', 30), ('P01', 150), ('P01', 150)])
@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+from mock import Mock
+
+from ixia_visionedge.filter_memory import FilterMemoryModel, FilterMemoryException
+
+
+class TestFilterMemoryModel(TestCase):
+    METERS = [{'unit_name': 'LC1', 'memory_meters': [
+        {'memory_type': 'DYNAMIC_FILTER_NON_IP', 'meters': [{'alloc_pcnt': 89, 'meter_name': 'FILTER_L2_L3_L4'}]},
+        {'memory_type': 'NETWORK_PORT_FILTER', 'meters': [{'alloc_pcnt': 100, 'meter_name': 'NETWORK_PORT'}]}]},
+              {'unit_name': 'LC2', 'memory_meters': [
+                  {'memory_type': 'DYNAMIC_FILTER_IP', 'meters': [{'alloc_pcnt': 50, 'meter_name': 'DYNAMIC_DIP'}]}]}]
+
+    def setUp(self):
+        self._get_meters = Mock(return_value=self.METERS)
+        self._instance = FilterMemoryModel(95, 2, 60)
+
+    def test_reserve_uses_cached_meters(self):
+        self._instance.reserve(2, self._get_meters)
+        self.assertEqual(self._instance.allocated, 93)
+        with self.assertRaises(FilterMemoryException):
+            self._instance.reserve(2, self._get_meters)
+        self._instance.reserve(2, self._get_meters, freed_count=1)
+        self.assertEqual(self._get_meters.call_count, 1)
+
+    def test_release_and_invalidate(self):
+        self._instance.reserve(1, self._get_meters)
+        self._instance.release(3)
+        self.assertEqual(self._instance.allocated, 85)
+        self._instance.invalidate()
+        self._instance.reserve(0, self._get_meters)
+        self.assertEqual(self._instance.allocated, 89)
+        self.assertEqual(self._get_meters.call_count, 2)
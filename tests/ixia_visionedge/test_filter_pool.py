@@ -0,0 +1,41 @@
+from unittest import TestCase
+
+from mock import Mock
+
+from ixia_visionedge.filter_pool import FilterPool
+
+
+class TestFilterPool(TestCase):
+    def setUp(self):
+        self._create = Mock(side_effect=range(100, 200))
+        self._delete = Mock()
+        self._discover = Mock(return_value=[10, 11])
+        self._instance = FilterPool(3, 4, self._create, self._delete, self._discover, Mock(), interval=3600,
+                                    background=False)
+
+    def tearDown(self):
+        self._instance.stop()
+
+    def test_maintain_refills_to_low_watermark(self):
+        self._instance.maintain()
+        self.assertEqual(self._instance.size, 3)
+        self.assertEqual(self._create.call_count, 1)
+        self.assertEqual(self._instance.acquire(), 100)
+
+    def test_maintain_trims_to_high_watermark(self):
+        self._instance.maintain()
+        for filter_uuid in [20, 21, 22]:
+            self._instance.put(filter_uuid)
+        self.assertFalse(self._instance.accepts())
+        self._instance.maintain()
+        self.assertEqual(self._instance.size, 4)
+        self.assertEqual(sorted(c[0][0] for c in self._delete.call_args_list), [10, 11])
+        self._discover.assert_called_once_with()
+
+    def test_stop_ends_maintenance_thread(self):
+        self._instance = FilterPool(3, 4, self._create, self._delete, self._discover, Mock(), interval=3600)
+        self._instance.acquire()
+        self.assertTrue(self._instance._thread.is_alive())
+        self._instance.stop()
+        self._instance._thread.join(5)
+        self.assertFalse(self._instance._thread.is_alive())
@@ -0,0 +1,41 @@
+from unittest import TestCase
+
+from mock import Mock
+
+from ixia_visionedge.mapping_plan import MappingPlan, MappingPlanException
+
+
+class TestMappingPlan(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+        self._instance = MappingPlan(self._logger, max_workers=1)
+
+    def test_execute_respects_dependencies(self):
+        calls = []
+        first = self._instance.add('first', lambda: calls.append('first'))
+        self._instance.add('second', lambda: calls.append('second'), depends_on=[first])
+        self._instance.execute()
+        self.assertEqual(calls, ['first', 'second'])
+
+    def test_rollback_completed_operations(self):
+        compensation = Mock()
+        failed_action = Mock(side_effect=Exception('create failed'))
+        enable = self._instance.add('enable', Mock(return_value='port'), compensation)
+        failed = self._instance.add('create', failed_action, Mock(), depends_on=[enable])
+        self._instance.add('create back', Mock(), Mock(), depends_on=[failed])
+        with self.assertRaises(MappingPlanException):
+            self._instance.execute()
+        compensation.assert_called_once_with('port')
+
+    def test_operation_kind(self):
+        create = self._instance.add('create filter 1->[2]', Mock(), kind='create_filter')
+        self._instance.add('enable port 1', Mock())
+        self.assertEqual([op for op in self._instance.operations if op.kind == 'create_filter'], [create])
+
+    def test_rollback_after_execute(self):
+        compensation = Mock()
+        self._instance.add('create filter 1->[2]', Mock(return_value=10), compensation)
+        self._instance.execute()
+        self.assertEqual(self._instance.rollback(), [])
+        self.assertEqual(self._instance.rollback(), [])
+        compensation.assert_called_once_with(10)
@@ -0,0 +1,25 @@
+from unittest import TestCase
+
+from mock import Mock
+
+from ixia_visionedge.neighbors import NeighborCache
+
+
+class TestNeighborCache(TestCase):
+    def setUp(self):
+        self._fetch = Mock(side_effect=lambda port_idents: [
+            {'port_id': port_ident, 'neighbors': [{'system_name': 'sw1', 'port_id': 'Eth1/{}'.format(port_ident)}]}
+            for port_ident in port_idents if port_ident != '3'])
+        self._instance = NeighborCache(self._fetch, 2, lambda func, items: [func(item) for item in items], Mock())
+
+    def test_refresh_in_chunks(self):
+        neighbors = self._instance.refresh([1, 2, 3])
+        self.assertEqual(neighbors, {'1': 'sw1:Eth1/1', '2': 'sw1:Eth1/2', '3': ''})
+        self.assertEqual([c[0][0] for c in self._fetch.call_args_list], [['1', '2'], ['3']])
+
+    def test_get_cached_or_fetched(self):
+        self._instance.refresh([1, 3])
+        self.assertEqual(self._instance.get(3), '')
+        self.assertEqual(self._fetch.call_count, 1)
+        self.assertEqual(self._instance.get(2), 'sw1:Eth1/2')
+        self._fetch.assert_called_with(['2'])
@@ -0,0 +1,31 @@
+from unittest import TestCase
+
+from mock import Mock
+
+from ixia_visionedge.port_attributes import PortAttributeReader
+
+
+class TestPortAttributeReader(TestCase):
+    PORTS = [{'name': 'P01', 'default_name': 'P01', 'link_settings': '10G_FULL'},
+             {'name': 'Uplink', 'default_name': 'P02', 'link_settings': 'AUTO'}]
+
+    def setUp(self):
+        self._fetch_all = Mock(return_value=self.PORTS)
+        self._instance = PortAttributeReader(self._fetch_all, ['link_settings'], 60, 0, Mock())
+
+    def test_single_fetch_serves_ports(self):
+        self.assertEqual(self._instance.get('P01')['link_settings'], '10G_FULL')
+        self.assertEqual(self._instance.get('P02')['link_settings'], 'AUTO')
+        self.assertEqual(self._instance.get('Uplink')['link_settings'], 'AUTO')
+        self._fetch_all.assert_called_once_with('name,default_name,link_settings')
+
+    def test_invalidate_port(self):
+        self._instance.get('P02')
+        self._instance.invalidate('Uplink')
+        self._instance.get('P01')
+        self._instance.get('P02')
+        self.assertEqual(self._fetch_all.call_count, 2)
+
+    def test_unknown_port(self):
+        with self.assertRaises(Exception):
+            self._instance.get('P03')
@@ -0,0 +1,26 @@
+from unittest import TestCase
+
+from ixia_visionedge.port_state_cache import PortStateCache
+
+
+class TestPortStateCache(TestCase):
+    def setUp(self):
+        self._instance = PortStateCache()
+
+    def test_seed_from_bulk_fetch(self):
+        self._instance.seed([{'id': 58, 'name': 'P1-01', 'mode': 'NETWORK', 'enabled': False},
+                             {'id': 59, 'name': 'P1-02'}], 'id')
+        self.assertEqual(self._instance.get('58'), {'mode': 'NETWORK', 'enabled': False})
+        self.assertIsNone(self._instance.get(59))
+
+    def test_holds(self):
+        self._instance.update(58, {'mode': 'BIDIRECTIONAL', 'enabled': True})
+        self.assertTrue(self._instance.holds('58', {'mode': 'BIDIRECTIONAL', 'enabled': True}))
+        self.assertFalse(self._instance.holds(58, {'mode': 'NETWORK', 'enabled': False}))
+        self.assertFalse(self._instance.holds(58, {'mode': 'BIDIRECTIONAL', 'link_settings': 'AUTO'}))
+        self.assertFalse(self._instance.holds(60, {'enabled': True}))
+
+    def test_invalidate(self):
+        self._instance.update(58, {'enabled': True})
+        self._instance.invalidate(58)
+        self.assertFalse(self._instance.holds(58, {'enabled': True}))
@@ -0,0 +1,19 @@
+from unittest import TestCase
+
+from ixia_visionedge.retry_policy import RetryPolicy
+
+
+class TestRetryPolicy(TestCase):
+    def setUp(self):
+        self._instance = RetryPolicy(max_attempts=5, base_delay=1, max_delay=4)
+
+    def test_allows(self):
+        self.assertTrue(self._instance.allows('getPort'))
+        self.assertTrue(self._instance.allows('modifyFilter'))
+        self.assertTrue(self._instance.allows('createFilter'))
+        self.assertFalse(self._instance.allows('createPortGroupFromPorts'))
+        self.assertFalse(self._instance.allows('importConfig'))
+
+    def test_delay_backoff_with_jitter(self):
+        for attempt, delay in [(1, 1), (2, 2), (3, 4), (6, 4)]:
+            self.assertTrue(delay / 2.0 <= self._instance.delay(attempt) <= delay)
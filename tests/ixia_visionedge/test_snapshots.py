@@ -0,0 +1,25 @@
+import shutil
+import tempfile
+from unittest import TestCase
+
+from ixia_visionedge.snapshots import SnapshotStore
+
+
+class TestSnapshotStore(TestCase):
+    def setUp(self):
+        self._path = tempfile.mkdtemp()
+        self._instance = SnapshotStore(self._path)
+
+    def tearDown(self):
+        shutil.rmtree(self._path)
+
+    def test_save_and_load(self):
+        config_path = self._instance.config_path('a1b2/c3')
+        open(config_path, 'wb').close()
+        self._instance.save_metadata('a1b2/c3', {'inventory': [[58, 'P01']]})
+        self.assertTrue(self._instance.exists('a1b2/c3'))
+        self.assertEqual(self._instance.load_metadata('a1b2/c3'), {'inventory': [[58, 'P01']]})
+
+    def test_load_missing_snapshot(self):
+        with self.assertRaises(Exception):
+            self._instance.load_metadata('missing')
@@ -0,0 +1,59 @@
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from ixia_visionedge.stats_sampler import StatsRing, StatsSampler
+
+
+class TestStatsRing(TestCase):
+    def setUp(self):
+        self._instance = StatsRing(3, ['bytes'], ['1', '2'])
+
+    def test_rates_over_kept_samples(self):
+        self.assertIsNone(self._instance.rates('bytes'))
+        for sample_time, row in [(0, [0, 0]), (10, [100, 50]), (20, [300, 100]), (30, [600, 10])]:
+            self._instance.push(sample_time, {'bytes': row})
+        self.assertEqual(self._instance.size, 3)
+        self.assertEqual(list(self._instance.rates('bytes')), [25.0, 0.5])
+        self.assertEqual(list(self._instance.deltas('bytes', age=1)), [300.0, 10.0])
+
+    def test_utilization(self):
+        self._instance.push(0, {'bytes': [0, 0]})
+        self._instance.push(1, {'bytes': [125000000, 125000000]})
+        self.assertEqual(list(self._instance.utilization('bytes', [10000, 0])), [10.0, 0.0])
+
+
+class TestStatsSampler(TestCase):
+    def setUp(self):
+        self._fetch = Mock()
+        self._port_idents = Mock(return_value={58, 59})
+        self._instance = StatsSampler(self._fetch, ['np_total_rx_count_bytes'], self._port_idents, 10, 1, Mock())
+
+    @patch('ixia_visionedge.stats_sampler.time')
+    def test_one_fetch_per_sample(self, time_mock):
+        for sample_time, values in [(0, (0, 0)), (10, (1000, 500))]:
+            time_mock.time.return_value = sample_time
+            self._fetch.return_value = [{'id': '58', 'np_total_rx_count_bytes': values[0]},
+                                        {'id': '59', 'np_total_rx_count_bytes': values[1]}]
+            self._instance.sample()
+        self._fetch.assert_called_with(['np_total_rx_count_bytes'], ['58', '59'])
+        self.assertEqual(self._fetch.call_count, 2)
+        report = self._instance.report({'58': 1}, ['np_total_rx_count_bytes'])
+        self.assertEqual(report['58'], {'np_total_rx_count_bytes_rate': 100.0, 'utilization': 0.08})
+        self.assertEqual(report['59']['np_total_rx_count_bytes_rate'], 50.0)
+
+    def test_port_set_change_restarts_samples(self):
+        self._fetch.return_value = []
+        self._instance.sample()
+        self._port_idents.return_value = {58}
+        self.assertEqual(self._instance.sample().size, 1)
+
+    @patch('ixia_visionedge.stats_sampler.time')
+    def test_port_set_kept_for_refresh_time(self, time_mock):
+        instance = StatsSampler(self._fetch, ['np_total_rx_count_bytes'], self._port_idents, 10, 1, Mock(),
+                                ports_refresh=60)
+        self._fetch.return_value = []
+        for sample_time in [0, 30, 60]:
+            time_mock.time.return_value = sample_time
+            instance.sample()
+        self.assertEqual(self._port_idents.call_count, 2)
@@ -0,0 +1,37 @@
+from unittest import TestCase
+
+from mock import Mock
+
+from ixia_visionedge.transceiver_info import parse_transceiver_info, TransceiverInfoCache
+
+
+def _table(port_name, headers, rows):
+    html = ("<table border='2'><tr><td bgcolor='#6495ED'><font size='+1' color='black'><b>Port: {} (demo)</b></font>"
+            "<br/><br/><table border='1'><tr>").format(port_name)
+    html += "".join("<th bgcolor='silver'>{}</th>".format(header) for header in headers) + "</tr>"
+    for row in rows:
+        html += "<tr>" + "".join("<th bgcolor='white'>{}</th>".format(value) for value in row) + "</tr>"
+    return html + "</table></td></tr></table>"
+
+
+class TestParseTransceiverInfo(TestCase):
+    HTML = ("<h1>Demo sample</h1><br/>" +
+            _table('P1-01', ['Hardware Info', 'Vendor Name', 'Wavelength (nm)'], [['SFP', 'ANUE SYSTEMS', '850']]) +
+            _table('P1-02', ['Lane', 'Rx Power (dBm)', 'Tx Power (dBm)'], [['1', '-2.10', '-1.50'],
+                                                                            ['2', '-2.20', '-1.60']]))
+
+    def test_records_by_port(self):
+        ports = parse_transceiver_info(self.HTML)
+        self.assertEqual(ports['P1-01'], {'hardware info': 'SFP', 'vendor name': 'ANUE SYSTEMS',
+                                          'wavelength (nm)': '850'})
+        self.assertEqual(ports['P1-02'], {'lane': '1', 'rx power (dbm)': '-2.10', 'tx power (dbm)': '-1.50'})
+
+    def test_cache_parses_changed_line_cards_only(self):
+        fetch = Mock(return_value=[{'line_card_number': 1, 'line_card_tranceiver_info': self.HTML}])
+        instance = TransceiverInfoCache(fetch, 60, Mock())
+        self.assertEqual(instance.get('P01', 'P1-02')['rx power (dbm)'], '-2.10')
+        self.assertIsNone(instance.get('P1-03'))
+        self.assertEqual(fetch.call_count, 1)
+        instance.invalidate()
+        self.assertEqual(instance.get('P1-01')['wavelength (nm)'], '850')
+        self.assertEqual(fetch.call_count, 2)